@@ -0,0 +1,245 @@
+# Shared cache of Manim's typesetting intermediates (Tex and Text SVGs)
+# Manim names these files by a hash of their content, so they can be reused by any render
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Subdirectories of a Manim media dir that hold content-addressed intermediates
+ASSET_DIRS = ("Tex", "texts")
+
+# Manim settings that locate each of those subdirectories
+MANIM_SETTINGS = ("tex_dir", "text_dir")
+
+# Lockfile in the cache dir, held shared by renders and exclusively by eviction
+LOCK_FILE = "cache.lock"
+
+class AssetCache:
+    """
+    Persistent Tex/Text asset cache shared by every render, capped in size.
+    
+    Manim's tex_dir and text_dir settings point at the cache, so a render
+    reuses the SVGs typeset by earlier renders and writes new ones straight
+    into the cache, at a constant cost per render whatever the cache size.
+    Manim names these files by a hash of their content and writes them in
+    place, not atomically: two renders typesetting the same new text at once
+    write the same file, and one of them may read it half-written.
+    
+    Eviction removes the assets with the oldest modification time once the
+    cache is over max_bytes, except those written in the last grace_seconds;
+    it scans the cache only when a render added files. Renders hold a shared
+    flock on the cache's lockfile (see in_use) and eviction an exclusive one,
+    so no asset is removed while any process renders with the cache. Where
+    flock is unavailable (e.g. Windows), only one process may use the cache.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True, grace_seconds: float = 60):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.grace_seconds = grace_seconds
+        self.counters = {"renders": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        # Modification times of the asset dirs when the cache was last checked for eviction
+        self._dir_mtimes = None
+    
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += amount
+    
+    def directories(self) -> Dict[str, str]:
+        """
+        Get the Manim settings that point a render at the cache.
+        
+        Returns:
+            Dict[str, str]: tex_dir and text_dir, or nothing when the cache is disabled
+        """
+        if not self.enabled:
+            return {}
+        settings = {}
+        for setting, asset_dir in zip(MANIM_SETTINGS, ASSET_DIRS):
+            settings[setting] = os.path.abspath(os.path.join(self.cache_dir, asset_dir))
+            os.makedirs(settings[setting], exist_ok=True)
+        return settings
+    
+    def config_file(self) -> str:
+        """
+        Write a Manim config file with the cache's tex_dir and text_dir, for the manim command.
+        
+        Returns:
+            str: Path to the config file, or "" when the cache is disabled
+        """
+        settings = self.directories()
+        if not settings:
+            return ""
+        path = os.path.join(self.cache_dir, "manim.cfg")
+        # configparser interpolates %, so it is escaped
+        content = "[CLI]\n" + "".join(f"{name} = {value.replace('%', '%%')}\n" for name, value in settings.items())
+        try:
+            with open(path) as f:
+                if f.read() == content:
+                    return path
+        except OSError:
+            pass
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
+    
+    @contextmanager
+    def _locked(self, exclusive: bool, wait: bool = True) -> Iterator[bool]:
+        """
+        Hold the cache's lockfile across processes.
+        
+        Args:
+            exclusive (bool): Take the lock exclusively (eviction) rather than shared (renders)
+            wait (bool): Wait for the lock instead of giving up when it is held
+        
+        Yields:
+            bool: True if the lock is held, False if it was busy and wait is False
+        """
+        try:
+            import fcntl
+        except ImportError:
+            yield True
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, LOCK_FILE), "a") as lock_file:
+            operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            try:
+                fcntl.flock(lock_file, operation if wait else operation | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @contextmanager
+    def in_use(self) -> Iterator[None]:
+        """
+        Keep eviction away from the cache while a render reads and writes it.
+        """
+        if not self.enabled:
+            yield
+            return
+        with self._locked(exclusive=False):
+            yield
+    
+    def rendered(self) -> int:
+        """
+        Record a finished render and evict if it added assets to the cache.
+        
+        Eviction is put off to a later render while another render is using
+        the cache.
+        
+        Returns:
+            int: Number of evicted assets
+        """
+        if not self.enabled:
+            return 0
+        self.count("renders")
+        dir_mtimes = []
+        for asset_dir in ASSET_DIRS:
+            try:
+                dir_mtimes.append(os.stat(os.path.join(self.cache_dir, asset_dir)).st_mtime_ns)
+            except OSError:
+                dir_mtimes.append(None)
+        with self._lock:
+            # A directory's modification time changes when files are added to it
+            if dir_mtimes == self._dir_mtimes:
+                return 0
+        evicted = self.evict(wait=False)
+        if evicted is None:
+            return 0
+        with self._lock:
+            self._dir_mtimes = dir_mtimes
+        return evicted
+    
+    def evict(self, wait: bool = True) -> Optional[int]:
+        """
+        Remove the oldest assets until the cache fits in max_bytes.
+        
+        Assets are ordered by modification time, set when Manim writes
+        them; access times are not used, since many mounts do not keep them.
+        
+        Args:
+            wait (bool): Wait for running renders to finish instead of giving up
+        
+        Returns:
+            Optional[int]: Number of evicted assets, or None if wait is False and a render is using the cache
+        """
+        with self._locked(exclusive=True, wait=wait) as locked:
+            if not locked:
+                return None
+            return self._evict()
+    
+    def _evict(self) -> int:
+        """Remove the oldest assets past the grace period, with the lockfile held exclusively."""
+        entries = []
+        total = 0
+        # Assets written since then may still be in use by a render outside the lock
+        cutoff = time.time() - self.grace_seconds
+        with self._lock:
+            for asset_dir in ASSET_DIRS:
+                directory = os.path.join(self.cache_dir, asset_dir)
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                for name in names:
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+            
+            evicted = 0
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes or mtime > cutoff:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            self.counters["evicted"] += evicted
+            return evicted
+    
+    def stats(self) -> Dict:
+        """
+        Get the cache counters and its current size.
+        
+        Returns:
+            Dict: renders and evicted counts, plus files and bytes on disk
+        """
+        files = size = 0
+        for asset_dir in ASSET_DIRS:
+            directory = os.path.join(self.cache_dir, asset_dir)
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                try:
+                    size += os.stat(os.path.join(directory, name)).st_size
+                    files += 1
+                except OSError:
+                    continue
+        with self._lock:
+            return dict(self.counters, files=files, bytes=size)
+
+# Shared cache used by every scene render
+asset_cache = AssetCache(
+    cache_dir=os.path.expanduser(os.getenv("ASSET_CACHE_DIR", "~/.cache/langgraph-workflow/assets")),
+    max_bytes=int(os.getenv("ASSET_CACHE_MAX_MB", "512")) * 1024 * 1024,
+    enabled=os.getenv("ASSET_CACHE", "1") != "0",
+    grace_seconds=float(os.getenv("ASSET_CACHE_GRACE_SECONDS", "60")),
+)
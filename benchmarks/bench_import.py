@@ -0,0 +1,140 @@
+# Benchmark: cold-start import time of the entry points, measured with python -X importtime
+# Every sample runs in a fresh interpreter, so nothing is already in sys.modules. Reports the
+# median cumulative import time per module and the imports that cost the most on their own,
+# and fails when a module exceeds the budget.
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Repository root, the working directory of every measured interpreter
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points measured by default: the CLI, the graph, the service and the renderer workers
+DEFAULT_MODULES = ("main", "workflow", "service", "rendererPool")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse the report written by -X importtime.
+    
+    Args:
+        stderr (str): The interpreter's stderr
+    
+    Returns:
+        List[Dict]: One entry per imported module with "module", "self_us", "cumulative_us" and "depth"
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return entries
+
+def measure_import(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+    
+    Args:
+        module (str): The module to import
+    
+    Returns:
+        Dict: "module", "total_ms" and the parsed "imports"
+    
+    Raises:
+        Exception: If the import fails
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+    imports = parse_importtime(result.stderr)
+    top = [entry for entry in imports if entry["module"] == module and entry["depth"] == 0]
+    total_us = top[-1]["cumulative_us"] if top else sum(entry["self_us"] for entry in imports)
+    return {"module": module, "total_ms": total_us / 1000, "imports": imports}
+
+def run_suite(modules: List[str], runs: int = 5, top: int = 10) -> Dict:
+    """
+    Measure the import time of every module.
+    
+    Args:
+        modules (List[str]): The modules to import
+        runs (int): Fresh interpreters per module; the median is reported
+        top (int): Number of most expensive imports reported per module
+    
+    Returns:
+        Dict: Per module, the median, min and max total_ms and the imports with the highest self time
+    """
+    results = {}
+    for module in modules:
+        samples = [measure_import(module) for _ in range(max(1, runs))]
+        totals = [sample["total_ms"] for sample in samples]
+        median_sample = sorted(samples, key=lambda sample: sample["total_ms"])[len(samples) // 2]
+        offenders = sorted(median_sample["imports"], key=lambda entry: entry["self_us"], reverse=True)[:top]
+        results[module] = {
+            "runs": len(samples),
+            "median_ms": round(statistics.median(totals), 1),
+            "min_ms": round(min(totals), 1),
+            "max_ms": round(max(totals), 1),
+            "top_imports": [{"module": entry["module"], "self_ms": round(entry["self_us"] / 1000, 2)} for entry in offenders],
+        }
+    return results
+
+def over_budget(results: Dict, budget_ms: float) -> List[str]:
+    """
+    List the modules whose median import time exceeds the budget.
+    
+    Args:
+        results (Dict): Results of run_suite
+        budget_ms (float): The budget, in milliseconds
+    
+    Returns:
+        List[str]: A description of every module over the budget
+    """
+    return [
+        f"{module}: {result['median_ms']:.1f} ms > {budget_ms:.1f} ms"
+        for module, result in results.items() if result["median_ms"] > budget_ms
+    ]
+
+def print_results(results: Dict) -> None:
+    """Print the median import time and the most expensive imports of every module."""
+    for module, result in results.items():
+        print(f"{module:<14} median {result['median_ms']:>8.1f} ms  (min {result['min_ms']:.1f}, max {result['max_ms']:.1f}, {result['runs']} runs)")
+        for entry in result["top_imports"]:
+            print(f"    {entry['self_ms']:>8.2f} ms  {entry['module']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of the entry points")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive imports reported per module")
+    parser.add_argument("--output", help="File the JSON results are written to")
+    parser.add_argument("--budget", type=float, help="Median import time allowed per module (ms); exits with status 1 when exceeded")
+    args = parser.parse_args()
+    
+    results = run_suite(args.modules, args.runs, args.top)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.budget is not None:
+        failures = over_budget(results, args.budget)
+        for failure in failures:
+            print(f"Over budget: {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"Every module imports within {args.budget:.0f} ms")
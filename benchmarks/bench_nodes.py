@@ -0,0 +1,182 @@
+# Benchmark: latency of every workflow node and of the whole graph, fully offline
+# The LLM, the problem page, manim and ffmpeg are replaced by the fakes in benchmarks/fakes.py,
+# so results only move when the code under test does. Results are written as JSON and can be
+# compared against a baseline, failing when a node got slower than the tolerance allows.
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# Add the repository root to the path so we can import from workflow
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import SAMPLE_CODE, SAMPLE_STEPS, SAMPLE_URL, offline_environment
+import workflow
+from webScrapingNode import scrape_website
+from stepsGenrationNode import generate_steps, iter_steps
+from testCaseGenrationNode import generate_test_cases
+from complexityProfiler import profile_code
+from sceneGenrationNode import generate_scenes
+from videoExecutionScript import execute_video
+
+# Percentiles reported for every node, compared by the regression gate
+PERCENTILES = (50, 95, 99)
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Get a percentile with linear interpolation between the closest ranks.
+    
+    Args:
+        values (List[float]): The measurements
+        q (float): The percentile, from 0 to 100
+    
+    Returns:
+        float: The percentile, or 0.0 if there are no measurements
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict:
+    """
+    Summarize the latencies of a benchmark.
+    
+    Args:
+        latencies (List[float]): Latency of each run, in seconds
+        wall_seconds (float): Wall-clock time of all runs together
+    
+    Returns:
+        Dict: "runs", "mean_ms", "p50_ms", "p95_ms", "p99_ms" and "throughput" (runs per second)
+    """
+    summary = {"runs": len(latencies), "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0}
+    for q in PERCENTILES:
+        summary[f"p{q}_ms"] = round(percentile(latencies, q) * 1000, 3)
+    summary["throughput"] = round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else 0.0
+    return summary
+
+def measure(run: Callable, runs: int, concurrency: int = 1) -> Dict:
+    """
+    Call a function repeatedly and summarize its latency.
+    
+    Args:
+        run (Callable): The function to benchmark, called without arguments
+        runs (int): Number of calls
+        concurrency (int): Calls in flight at once
+    
+    Returns:
+        Dict: The summary, as returned by summarize
+    """
+    def timed(_):
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        latencies = list(executor.map(timed, range(runs)))
+    return summarize(latencies, time.perf_counter() - start)
+
+def run_suite(runs: int = 5, concurrency: int = 1, llm_latency: float = 0.05, llm_jitter: float = 0.2,
+              fetch_latency: float = 0.05, render_latency: float = 0.1) -> Dict:
+    """
+    Benchmark every node on its own, then the whole graph.
+    
+    Args:
+        runs (int): Runs per benchmark
+        concurrency (int): Concurrent whole-graph runs
+        llm_latency (float): Latency of every fake LLM call, in seconds
+        llm_jitter (float): Relative spread of the fake LLM latency
+        fetch_latency (float): Latency of every fake page download, in seconds
+        render_latency (float): Duration of every fake scene render, in seconds
+    
+    Returns:
+        Dict: "settings", "nodes" (summary per node), "graph" (summary of run_workflow)
+            and "llm_calls"
+    """
+    settings = {
+        "runs": runs, "concurrency": concurrency, "llm_latency": llm_latency, "llm_jitter": llm_jitter,
+        "fetch_latency": fetch_latency, "render_latency": render_latency,
+    }
+    with offline_environment(llm_latency, llm_jitter, fetch_latency, render_latency) as fakes:
+        scenes = generate_scenes(SAMPLE_STEPS)
+        benchmarks = {
+            "scrape_website": lambda: scrape_website(SAMPLE_URL),
+            "profile_code": lambda: profile_code(SAMPLE_CODE),
+            "generate_steps": lambda: generate_steps(SAMPLE_CODE),
+            "iter_steps": lambda: list(iter_steps(SAMPLE_CODE)),
+            "generate_test_cases": lambda: generate_test_cases(SAMPLE_CODE),
+            "generate_scenes": lambda: generate_scenes(SAMPLE_STEPS),
+            "execute_video": lambda: execute_video(scenes),
+        }
+        nodes = {name: measure(run, runs) for name, run in benchmarks.items()}
+        graph = workflow.create_workflow()
+        nodes_graph = measure(lambda: workflow.run_workflow(SAMPLE_URL, SAMPLE_CODE, graph=graph), runs, concurrency)
+        llm_calls = fakes["chat"].calls
+    return {"settings": settings, "nodes": nodes, "graph": nodes_graph, "llm_calls": llm_calls}
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.2, metrics: tuple = ("p50_ms", "p95_ms")) -> List[str]:
+    """
+    Find the benchmarks that got slower than the baseline allows.
+    
+    Args:
+        results (Dict): Results of run_suite
+        baseline (Dict): Earlier results of run_suite
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%
+        metrics (tuple): Latency metrics compared
+    
+    Returns:
+        List[str]: One line per regression, empty if none
+    """
+    current = dict(results["nodes"], run_workflow=results["graph"])
+    previous = dict(baseline.get("nodes", {}), run_workflow=baseline.get("graph", {}))
+    regressions = []
+    for name, summary in current.items():
+        for metric in metrics:
+            before = previous.get(name, {}).get(metric)
+            if not before:
+                continue
+            if summary[metric] > before * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {before:.1f} -> {summary[metric]:.1f} ms (+{(summary[metric] / before - 1) * 100:.0f}%)")
+    return regressions
+
+def print_results(results: Dict) -> None:
+    """Print the results as a table."""
+    print(f"{'benchmark':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'runs/s':>10}")
+    for name, summary in dict(results["nodes"], run_workflow=results["graph"]).items():
+        print(f"{name:<22}{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}{summary['throughput']:>10.2f}")
+    print(f"LLM calls: {results['llm_calls']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every workflow node and the whole graph offline")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent whole-graph runs")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM call latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="Relative spread of the fake LLM latency")
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="Fake page download latency (s)")
+    parser.add_argument("--render-latency", type=float, default=0.1, help="Fake scene render duration (s)")
+    parser.add_argument("--output", default="bench_results.json", help="File the JSON results are written to")
+    parser.add_argument("--baseline", help="Earlier results to compare against; exits with status 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+    
+    results = run_suite(args.runs, args.concurrency, args.llm_latency, args.llm_jitter, args.fetch_latency, args.render_latency)
+    print_results(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression beyond {args.tolerance:.0%} of the baseline")
@@ -0,0 +1,80 @@
+# Benchmark: critical path of the fan-out graph versus a strict chain
+# Every node function is replaced by a stub that sleeps for a fixed latency,
+# so the numbers only reflect how the graph schedules its nodes.
+import argparse
+import os
+import sys
+import time
+from unittest import mock
+
+# Add the repository root to the path so we can import from workflow
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workflow
+
+def stub(value, latency: float):
+    """
+    Build a node stub that waits for the given latency before returning.
+    
+    Args:
+        value: The value returned by the stub
+        latency (float): Simulated latency in seconds
+        
+    Returns:
+        Callable: The stub function
+    """
+    def node(*args, **kwargs):
+        time.sleep(latency)
+        return value
+    return node
+
+def run_benchmark(scrape: float, steps: float, tests: float, scenes: float, video: float, runs: int) -> dict:
+    """
+    Time run_workflow with stubbed nodes and compare it with the sequential chain.
+    
+    Returns:
+        dict: Sequential estimate, critical path and measured wall clock in seconds
+    """
+    patches = [
+        mock.patch.object(workflow, "scrape_website", stub({"question": "q", "test_cases": []}, scrape)),
+        mock.patch.object(workflow, "profile_code", stub({"complexity": "", "timings": [], "error": ""}, 0)),
+        mock.patch.object(workflow, "generate_steps", stub(["step"], steps)),
+        mock.patch.object(workflow, "generate_test_cases", stub([[[1], 1, "case"]], tests)),
+        mock.patch.object(workflow, "generate_scenes", stub(["scene"], scenes)),
+        mock.patch.object(workflow, "execute_video", stub("video.mp4", video)),
+        # Keep scene generation and video execution as separate nodes
+        mock.patch.object(workflow, "pipeline_render", False),
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            workflow.run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+            timings.append(time.perf_counter() - start)
+    finally:
+        for patch in patches:
+            patch.stop()
+    
+    return {
+        "sequential": scrape + steps + tests + scenes + video,
+        "critical_path": max(scrape, steps, tests) + scenes + video,
+        "measured": sorted(timings)[len(timings) // 2],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the critical-path reduction of the parallel workflow graph")
+    parser.add_argument("--scrape", type=float, default=1.5, help="Simulated web scraping latency (s)")
+    parser.add_argument("--steps", type=float, default=2.0, help="Simulated steps generation latency (s)")
+    parser.add_argument("--tests", type=float, default=2.5, help="Simulated test case generation latency (s)")
+    parser.add_argument("--scenes", type=float, default=0.5, help="Simulated scene generation latency (s)")
+    parser.add_argument("--video", type=float, default=0.5, help="Simulated video execution latency (s)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of runs (the median is reported)")
+    args = parser.parse_args()
+    
+    result = run_benchmark(args.scrape, args.steps, args.tests, args.scenes, args.video, args.runs)
+    print(f"Sequential chain:   {result['sequential']:.2f}s")
+    print(f"Critical path:      {result['critical_path']:.2f}s")
+    print(f"Measured (median):  {result['measured']:.2f}s")
+    print(f"Speedup:            {result['sequential'] / result['measured']:.2f}x")
@@ -0,0 +1,293 @@
+# Offline stand-ins for every external dependency of the workflow
+# A chat model replaying canned responses with a configurable latency, a problem page
+# served without network, and fake manim/ffmpeg executables, so benchmarks are deterministic.
+# The unit tests share its chat model stand-ins.
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import textwrap
+import threading
+import contextlib
+from typing import Dict, Iterator, Union
+from unittest import mock
+
+# Add the repository root to the path so we can import the workflow modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llmCache
+import llmClient
+import webScrapingNode
+import videoExecutionScript
+from assetCache import AssetCache
+from renderCache import RenderCache
+from scrapeCache import ScrapeCache
+from rateLimiter import LocalBuckets, RateLimiter
+
+# Code submitted in every benchmark run: small enough for the sandbox and profiler to stay fast
+SAMPLE_CODE = textwrap.dedent("""
+    def two_sum(nums, target):
+        for i in range(len(nums)):
+            for j in range(len(nums)):
+                if nums[i] + nums[j] == target:
+                    return [i, j]
+        return None
+""")
+
+SAMPLE_URL = "https://example.com/problems/two-sum"
+
+# Problem page without a site rule or example blocks, so scraping goes through the LLM
+SAMPLE_PAGE = """<html><head><title>Two Sum</title></head><body>
+<nav><a href="/">Home</a> <a href="/problems">Problems</a></nav>
+<article>
+<p>Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.</p>
+<p>You may assume that each input would have exactly one solution, and you may not use the same element twice.</p>
+</article>
+<footer>Copyright</footer>
+</body></html>"""
+
+# Canned steps, worded so that none of them matches a scene template
+SAMPLE_STEPS = [
+    "The outer and inner loops start at index 0, so an element can be paired with itself.",
+    "Starting the inner loop at i + 1 pairs every element only with the ones after it.",
+    "Remembering each value's index while scanning finds the complement in one pass.",
+]
+
+def json_block(value) -> str:
+    """Format a value the way StructuredOutputParser expects it."""
+    return f"```json\n{json.dumps(value)}\n```"
+
+def canned_response(prompt: str) -> str:
+    """
+    Answer a workflow prompt with a fixed, well-formed response.
+    
+    Args:
+        prompt (str): The prompt sent to the model
+    
+    Returns:
+        str: The response content
+    """
+    scene = re.search(r"Step(\d+)Scene", prompt)
+    if scene:
+        n = int(scene.group(1))
+        code = f"from manim import *\n\nclass Step{n}Scene(Scene):\n    def construct(self):\n        self.play(Write(Text(\"Step {n}\")))\n        self.wait({n})\n"
+        return json_block({"scene_code": code})
+    if "scraped website content" in prompt:
+        return json_block({
+            "question": "Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.",
+            "test_cases": ["Input: nums = [2,7,11,15], target = 9\nOutput: [0,1]"],
+        })
+    if "generate test cases" in prompt:
+        return json_block({"test_cases": [
+            {"inputs": [[2, 7, 11, 15], 9], "expected_output": [0, 1], "explanation": "Normal case"},
+            {"inputs": [[3, 3], 6], "expected_output": [0, 1], "explanation": "Duplicate values"},
+            {"inputs": [[3, 2, 4], 6], "expected_output": [1, 2], "explanation": "Element paired with itself"},
+        ]})
+    return json_block({"steps": SAMPLE_STEPS})
+
+# Characters per chunk of a streamed fake response
+STREAM_CHUNK_CHARS = 16
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeResponse:
+    def __init__(self, content: str, usage: Dict = None):
+        self.content = content
+        self.response_metadata = {"token_usage": usage} if usage else {}
+    
+    def __add__(self, other: "FakeResponse") -> "FakeResponse":
+        # Streamed chunks add up like LangChain message chunks; only the last one reports usage
+        return FakeResponse(self.content + other.content, (other.response_metadata or self.response_metadata).get("token_usage"))
+
+class ScriptedChat:
+    """
+    Chat model stand-in that answers with queued replies and records every prompt.
+    
+    The last reply is repeated once the others are used up. Streamed replies
+    arrive word by word.
+    """
+    
+    model_name = "fake-model"
+    
+    def __init__(self, *replies: Union[str, FakeResponse]):
+        self.replies = [reply if isinstance(reply, FakeResponse) else FakeResponse(reply) for reply in replies]
+        self.prompts = []
+    
+    def _reply(self, messages) -> FakeResponse:
+        self.prompts.append(messages[0].content)
+        return self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+    
+    def invoke(self, messages):
+        return self._reply(messages)
+    
+    def stream(self, messages):
+        for word in self._reply(messages).content.split():
+            yield FakeResponse(word + " ")
+
+class FakeChat:
+    """
+    Chat model stand-in that replays canned responses after a configurable latency.
+    
+    The latency of each call is latency * (1 +/- jitter), drawn from a
+    seeded generator so repeated runs see the same sequence of delays.
+    Streamed responses spread the same latency evenly over their chunks.
+    """
+    
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def _start(self) -> float:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return max(0.0, self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+    
+    def _finish(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+    
+    def invoke(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        delay = self._start()
+        try:
+            time.sleep(delay)
+        finally:
+            self._finish()
+        content = canned_response(prompt)
+        return FakeResponse(content, {"total_tokens": (len(prompt) + len(content)) // 4})
+    
+    def stream(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = canned_response(prompt)
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        delay = self._start()
+        try:
+            for piece in pieces:
+                time.sleep(delay / len(pieces))
+                yield FakeResponse(piece)
+            yield FakeResponse("", {"total_tokens": (len(prompt) + len(content)) // 4})
+        finally:
+            self._finish()
+
+class FakeHTTPResponse:
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+        self.headers = {}
+        self.apparent_encoding = "utf-8"
+        self.encoding = "utf-8"
+    
+    def raise_for_status(self):
+        pass
+
+class FakeSession:
+    """requests.Session stand-in serving the sample page after a fixed latency."""
+    
+    def __init__(self, latency: float = 0.05, page: str = SAMPLE_PAGE):
+        self.latency = latency
+        self.page = page
+    
+    def get(self, url, headers=None, timeout=None):
+        time.sleep(self.latency)
+        return FakeHTTPResponse(self.page)
+
+# Stand-in for `manim render`: sleeps for FAKE_RENDER_SECONDS and writes a placeholder video
+FAKE_MANIM = textwrap.dedent("""
+    import os, sys, time
+    args = sys.argv[1:]
+    media_dir = args[args.index("--media_dir") + 1]
+    scene_file, scene_name = args[-2], args[-1]
+    time.sleep(float(os.environ.get("FAKE_RENDER_SECONDS", "0.1")))
+    module = os.path.splitext(os.path.basename(scene_file))[0]
+    out_dir = os.path.join(media_dir, "videos", module, "480p15")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, scene_name + ".mp4"), "w") as f:
+        f.write(scene_name + "\\n")
+""")
+
+# Stand-in for `ffmpeg -f concat`: concatenates the listed files
+FAKE_FFMPEG = textwrap.dedent("""
+    import sys
+    args = sys.argv[1:]
+    list_file, output = args[args.index("-i") + 1], args[-1]
+    with open(output, "w") as out:
+        for line in open(list_file):
+            out.write(open(line.strip()[len("file '"):-1]).read())
+""")
+
+@contextlib.contextmanager
+def chat_model(chat) -> Iterator:
+    """
+    Answer every LLM call with a chat model stand-in, without the response cache or rate limits.
+    
+    Args:
+        chat: The chat model stand-in
+    
+    Yields:
+        The chat model
+    """
+    with mock.patch.object(llmClient, "get_chat", return_value=chat), \
+         mock.patch.object(llmCache, "llm_cache", llmCache.LLMCache(enabled=False)), \
+         mock.patch.object(llmClient, "rate_limiter", RateLimiter(LocalBuckets(0, 0), max_concurrency=100)):
+        yield chat
+
+@contextlib.contextmanager
+def offline_environment(llm_latency: float = 0.05, llm_jitter: float = 0.0, fetch_latency: float = 0.05,
+                        render_latency: float = 0.1, seed: int = 0) -> Iterator[Dict]:
+    """
+    Run the workflow without network, Manim or ffmpeg.
+    
+    Every cache is disabled so each run does the full work, and the working
+    directory is a temporary one so rendered output is cleaned up afterwards.
+    
+    Args:
+        llm_latency (float): Latency of every LLM call, in seconds
+        llm_jitter (float): Relative spread of the LLM latency
+        fetch_latency (float): Latency of every page download, in seconds
+        render_latency (float): Duration of every scene render, in seconds
+        seed (int): Seed of the LLM latency sequence
+    
+    Yields:
+        Dict: The fakes, as "chat" and "work_dir"
+    """
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    for name, source in (("manim_fake.py", FAKE_MANIM), ("ffmpeg_fake.py", FAKE_FFMPEG)):
+        with open(os.path.join(work_dir, name), "w") as f:
+            f.write(source)
+    chat = FakeChat(llm_latency, llm_jitter, seed)
+    patches = [
+        mock.patch.object(llmClient, "get_chat", return_value=chat),
+        mock.patch.object(llmClient, "rate_limiter", RateLimiter(LocalBuckets(0, 0), max_concurrency=1000)),
+        mock.patch.object(llmCache, "llm_cache", llmCache.LLMCache(enabled=False)),
+        mock.patch.object(webScrapingNode, "session", FakeSession(fetch_latency)),
+        mock.patch.object(webScrapingNode, "scrape_cache", ScrapeCache(os.path.join(work_dir, "scrape.sqlite"), enabled=False)),
+        mock.patch.object(videoExecutionScript, "manim_command", [sys.executable, os.path.join(work_dir, "manim_fake.py")]),
+        mock.patch.object(videoExecutionScript, "ffmpeg_command", [sys.executable, os.path.join(work_dir, "ffmpeg_fake.py")]),
+        mock.patch.object(videoExecutionScript, "render_cache", RenderCache(os.path.join(work_dir, "renders"), max_bytes=0, enabled=False)),
+        mock.patch.object(videoExecutionScript, "asset_cache", AssetCache(os.path.join(work_dir, "assets"), max_bytes=0, enabled=False)),
+        mock.patch.dict(os.environ, {"FAKE_RENDER_SECONDS": str(render_latency)}),
+    ]
+    for patch in patches:
+        patch.start()
+    os.chdir(work_dir)
+    try:
+        yield {"chat": chat, "work_dir": work_dir}
+    finally:
+        os.chdir(cwd)
+        for patch in reversed(patches):
+            patch.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
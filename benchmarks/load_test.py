@@ -0,0 +1,334 @@
+# Load test: replay a trace of job arrivals against the workflow at growing concurrency
+# The LLM, the problem page, manim and ffmpeg are the offline fakes of benchmarks/fakes.py.
+# For every concurrency level it reports job latency and queueing delay percentiles,
+# throughput, per-node completion times and errors, peak LLM concurrency, render
+# load and disk growth, then the knee point where adding workers stops paying off.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from unittest import mock
+
+# Add the repository root to the path so we can import from workflow
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import SAMPLE_CODE, SAMPLE_URL, offline_environment
+from bench_nodes import percentile
+import checkpoints
+import videoExecutionScript
+from workflow import create_workflow, stream_workflow, END
+
+# A level whose throughput grows by less than this fraction of its added concurrency is past the knee
+KNEE_EFFICIENCY = 0.25
+
+def load_trace(path: str) -> List[Dict]:
+    """
+    Read a job trace.
+    
+    Args:
+        path (str): JSONL file with one {"link", "wrong_code", "arrival"} object per line,
+            arrival being seconds since the start of the trace
+    
+    Returns:
+        List[Dict]: The jobs, sorted by arrival
+    """
+    with open(path) as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    for job in jobs:
+        job.setdefault("arrival", 0.0)
+    return sorted(jobs, key=lambda job: job["arrival"])
+
+def synthetic_trace(jobs: int, rate: float, seed: int = 0) -> List[Dict]:
+    """
+    Build a trace of Poisson arrivals, each job submitting a slightly different code.
+    
+    Args:
+        jobs (int): Number of jobs
+        rate (float): Mean arrivals per second (0 submits every job at once)
+        seed (int): Seed of the arrival times
+    
+    Returns:
+        List[Dict]: The jobs, as {"link", "wrong_code", "arrival"}
+    """
+    rng = random.Random(seed)
+    arrival = 0.0
+    trace = []
+    for i in range(jobs):
+        trace.append({"link": SAMPLE_URL, "wrong_code": f"{SAMPLE_CODE}# submission {i}\n", "arrival": round(arrival, 3)})
+        if rate > 0:
+            arrival += rng.expovariate(rate)
+    return trace
+
+def directory_size(path: str, prefix: str = "output_video_") -> int:
+    """Get the size in bytes of every directory under path whose name starts with prefix."""
+    total = 0
+    for name in os.listdir(path):
+        if not name.startswith(prefix):
+            continue
+        for root, _, files in os.walk(os.path.join(path, name)):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+    return total
+
+class RenderProbe:
+    """
+    Wraps render_scene to measure how busy the render slots are.
+    """
+    
+    def __init__(self, render):
+        self.render = render
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return self.render(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.busy_seconds += time.perf_counter() - start
+
+def job_record(arrival: float, started: float, finished: float, events: List[Dict], result: Dict) -> Dict:
+    """Build the record of one replayed job, with times in seconds since the start of the replay."""
+    return {
+        "arrival": arrival,
+        "queued": started - arrival,
+        "latency": finished - arrival,
+        "events": events,
+        "error": result.get("error", "") or ("" if result.get("video_path") else "No video generated"),
+    }
+
+def replay_workflow(trace: List[Dict], concurrency: int, speed: float) -> List[Dict]:
+    """
+    Replay a trace against run_workflow, at most `concurrency` jobs running at once.
+    
+    Args:
+        trace (List[Dict]): The jobs
+        concurrency (int): Jobs running at once
+        speed (float): Replay speed (2 replays the trace twice as fast)
+    
+    Returns:
+        List[Dict]: One record per job
+    """
+    graph = create_workflow()
+    start = time.perf_counter()
+    
+    def run(job: Dict, arrival: float) -> Dict:
+        started = time.perf_counter() - start
+        events = []
+        result = {}
+        try:
+            for node, update in stream_workflow(job["link"], job["wrong_code"], graph=graph):
+                if node == END:
+                    result = update
+                    continue
+                events.append({"node": node, "elapsed": time.perf_counter() - start - started, "error": update.get("error", "")})
+        except Exception as e:
+            result = {"error": f"Error in workflow: {str(e)}"}
+        return job_record(arrival, started, time.perf_counter() - start, events, result)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = []
+        for job in trace:
+            arrival = job["arrival"] / speed
+            delay = arrival - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(run, job, arrival))
+        return [future.result() for future in futures]
+
+def replay_service(trace: List[Dict], concurrency: int, speed: float, work_dir: str) -> List[Dict]:
+    """
+    Replay a trace against the HTTP service's job manager with `concurrency` workers.
+    
+    Args:
+        trace (List[Dict]): The jobs
+        concurrency (int): Service workers
+        speed (float): Replay speed (2 replays the trace twice as fast)
+        work_dir (str): Directory for the checkpoint database
+    
+    Returns:
+        List[Dict]: One record per job
+    """
+    import service
+    
+    async def replay() -> List[Dict]:
+        manager = service.JobManager(concurrency)
+        checkpointer = checkpoints.get_checkpointer(os.path.join(work_dir, f"checkpoints_{concurrency}.sqlite"))
+        with mock.patch.object(service, "get_checkpointer", return_value=checkpointer):
+            await manager.start()
+        start_wall, start = time.time(), time.perf_counter()
+        submitted = []
+        try:
+            for job in trace:
+                arrival = job["arrival"] / speed
+                delay = arrival - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                submitted.append((manager.submit(job["link"], job["wrong_code"])[0], arrival))
+            for job, _ in submitted:
+                while not job.done:
+                    await job.wait_for_update(len(job.events))
+        finally:
+            await manager.stop()
+        
+        records = []
+        for job, arrival in submitted:
+            events = [
+                {"node": event["node"], "elapsed": event["elapsed"], "error": event.get("error", "")}
+                for event in job.events if event["event"] == "node"
+            ]
+            records.append(job_record(arrival, job.started_at - start_wall, job.finished_at - start_wall, events, job.result))
+        return records
+    
+    return asyncio.run(replay())
+
+def summarize_level(records: List[Dict], wall_seconds: float) -> Dict:
+    """
+    Summarize the jobs of one concurrency level.
+    
+    Args:
+        records (List[Dict]): The job records
+        wall_seconds (float): Duration of the replay
+    
+    Returns:
+        Dict: Job latency and queueing percentiles in ms, throughput, error rate and per-node stats
+    """
+    def ms(values: List[float]) -> Dict:
+        return {f"p{q}_ms": round(percentile(values, q) * 1000, 3) for q in (50, 95, 99)}
+    
+    nodes = {}
+    for record in records:
+        for event in record["events"]:
+            node = nodes.setdefault(event["node"], {"elapsed": [], "errors": 0})
+            node["elapsed"].append(event["elapsed"])
+            node["errors"] += bool(event["error"])
+    
+    errors = sum(bool(record["error"]) for record in records)
+    return {
+        "jobs": len(records),
+        "latency": ms([record["latency"] for record in records]),
+        "queued": ms([record["queued"] for record in records]),
+        "throughput": round(len(records) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "error_rate": round(errors / len(records), 3) if records else 0.0,
+        # Per node: time from the job's start to the node's completion, and failed runs
+        "nodes": {
+            name: dict(ms(node["elapsed"]), runs=len(node["elapsed"]), errors=node["errors"])
+            for name, node in sorted(nodes.items())
+        },
+    }
+
+def find_knee(levels: List[Dict]) -> int:
+    """
+    Find the concurrency after which throughput stops scaling.
+    
+    Going from one level to the next, the scaling efficiency is the relative
+    throughput gain divided by the relative concurrency increase. The knee is
+    the last level before the efficiency drops below KNEE_EFFICIENCY.
+    
+    Args:
+        levels (List[Dict]): Level summaries with "concurrency" and "throughput", by increasing concurrency
+    
+    Returns:
+        int: The knee concurrency, or the highest level if throughput kept scaling
+    """
+    for previous, level in zip(levels, levels[1:]):
+        if not previous["throughput"]:
+            continue
+        gain = level["throughput"] / previous["throughput"] - 1
+        growth = level["concurrency"] / previous["concurrency"] - 1
+        if growth > 0 and gain / growth < KNEE_EFFICIENCY:
+            return previous["concurrency"]
+    return levels[-1]["concurrency"] if levels else 0
+
+def run_load_test(trace: List[Dict], levels: List[int], target: str = "workflow", speed: float = 1.0,
+                  llm_latency: float = 0.2, llm_jitter: float = 0.2, fetch_latency: float = 0.1,
+                  render_latency: float = 0.5) -> Dict:
+    """
+    Replay a trace once per concurrency level and find the knee.
+    
+    Args:
+        trace (List[Dict]): The jobs, as {"link", "wrong_code", "arrival"}
+        levels (List[int]): Concurrency levels, in increasing order
+        target (str): "workflow" for run_workflow threads, "service" for the service's job manager
+        speed (float): Replay speed (2 replays the trace twice as fast)
+        llm_latency (float): Latency of every fake LLM call, in seconds
+        llm_jitter (float): Relative spread of the fake LLM latency
+        fetch_latency (float): Latency of every fake page download, in seconds
+        render_latency (float): Duration of every fake scene render, in seconds
+    
+    Returns:
+        Dict: "settings", "levels" (one summary per level) and "knee"
+    """
+    settings = {
+        "target": target, "jobs": len(trace), "speed": speed, "llm_latency": llm_latency, "llm_jitter": llm_jitter,
+        "fetch_latency": fetch_latency, "render_latency": render_latency,
+        "render_workers": videoExecutionScript.render_workers,
+    }
+    results = []
+    with offline_environment(llm_latency, llm_jitter, fetch_latency, render_latency) as fakes:
+        for concurrency in levels:
+            chat = fakes["chat"]
+            chat.max_in_flight = 0
+            calls = chat.calls
+            probe = RenderProbe(videoExecutionScript.render_scene)
+            disk_before = directory_size(fakes["work_dir"])
+            start = time.perf_counter()
+            with mock.patch.object(videoExecutionScript, "render_scene", probe):
+                if target == "service":
+                    records = replay_service(trace, concurrency, speed, fakes["work_dir"])
+                else:
+                    records = replay_workflow(trace, concurrency, speed)
+            wall_seconds = time.perf_counter() - start
+            
+            level = dict(concurrency=concurrency, **summarize_level(records, wall_seconds))
+            level["llm_calls"] = chat.calls - calls
+            level["llm_max_in_flight"] = chat.max_in_flight
+            level["render_max_in_flight"] = probe.max_in_flight
+            # Average renders in flight per render slot: above 1, concurrent jobs oversubscribe the render cores
+            level["render_load"] = round(probe.busy_seconds / (wall_seconds * videoExecutionScript.render_workers), 3)
+            level["disk_growth_bytes"] = directory_size(fakes["work_dir"]) - disk_before
+            results.append(level)
+            print(f"concurrency {concurrency:>3}: {level['throughput']:.2f} jobs/s, p95 {level['latency']['p95_ms']:.0f} ms, "
+                  f"queued p95 {level['queued']['p95_ms']:.0f} ms, errors {level['error_rate']:.0%}, "
+                  f"LLM peak {level['llm_max_in_flight']}, render load {level['render_load']:.2f}")
+    return {"settings": settings, "levels": results, "knee": find_knee(results)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a job trace against the workflow at growing concurrency")
+    parser.add_argument("--trace", help="JSONL trace of {link, wrong_code, arrival}; a synthetic trace is used if omitted")
+    parser.add_argument("--jobs", type=int, default=16, help="Jobs in the synthetic trace")
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrivals per second of the synthetic trace (0 = all at once)")
+    parser.add_argument("--levels", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--target", choices=["workflow", "service"], default="workflow", help="Entry point the jobs are sent to")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed of the trace's arrival times")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM call latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="Relative spread of the fake LLM latency")
+    parser.add_argument("--fetch-latency", type=float, default=0.1, help="Fake page download latency (s)")
+    parser.add_argument("--render-latency", type=float, default=0.5, help="Fake scene render duration (s)")
+    parser.add_argument("--output", default="load_results.json", help="File the JSON results are written to")
+    args = parser.parse_args()
+    
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.jobs, args.rate)
+    levels = sorted(int(level) for level in args.levels.split(","))
+    results = run_load_test(trace, levels, args.target, args.speed, args.llm_latency, args.llm_jitter,
+                            args.fetch_latency, args.render_latency)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Knee: {results['knee']} concurrent jobs")
+    print(f"Results written to {args.output}")
@@ -0,0 +1,60 @@
+# Persistent checkpointer for workflow runs
+# Every node's output is saved under the run's thread_id, so a failed or
+# interrupted run can resume from the last completed node.
+import os
+import sqlite3
+from typing import List
+
+# Location of the checkpoint database; set CHECKPOINTS=0 to run without checkpoints
+checkpoint_db = os.path.expanduser(os.getenv("CHECKPOINT_DB", "~/.cache/langgraph-workflow/checkpoints.sqlite"))
+checkpoints_enabled = os.getenv("CHECKPOINTS", "1") != "0"
+
+_checkpointers = {}
+
+def get_checkpointer(db_path: str = None):
+    """
+    Get the SQLite checkpointer for a database, creating it on first use.
+    
+    Args:
+        db_path (str): Path to the checkpoint database (defaults to CHECKPOINT_DB)
+        
+    Returns:
+        SqliteSaver: The checkpointer, or None if checkpoints are disabled or
+            langgraph-checkpoint-sqlite is not installed
+    """
+    if not checkpoints_enabled:
+        return None
+    db_path = db_path or checkpoint_db
+    if db_path in _checkpointers:
+        return _checkpointers[db_path]
+    
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        print("langgraph-checkpoint-sqlite is not installed, running without checkpoints")
+        return None
+    
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # The saver serializes access with its own lock, so one connection is shared by all threads
+    checkpointer = SqliteSaver(sqlite3.connect(db_path, check_same_thread=False))
+    _checkpointers[db_path] = checkpointer
+    return checkpointer
+
+def thread_ids(checkpointer) -> List[str]:
+    """
+    List the thread IDs that have checkpoints, most recently updated first.
+    
+    Args:
+        checkpointer: The checkpointer
+        
+    Returns:
+        List[str]: The thread IDs
+    """
+    seen = []
+    for checkpoint in checkpointer.list(None):
+        thread_id = checkpoint.config["configurable"]["thread_id"]
+        if thread_id not in seen:
+            seen.append(thread_id)
+    return seen
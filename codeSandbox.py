@@ -0,0 +1,221 @@
+# Sandboxed execution of the submitted code
+# code + test inputs -> actual outputs and runtimes, each case in its own resource-limited subprocess
+import os
+import ast
+import sys
+import json
+import time
+import signal
+import tempfile
+import textwrap
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Wall-clock limit for one test case, in seconds
+sandbox_timeout = float(os.getenv("SANDBOX_TIMEOUT", "5"))
+# CPU-time limit for one test case, in seconds
+sandbox_cpu_seconds = int(os.getenv("SANDBOX_CPU_SECONDS", "2"))
+# Address-space limit for one test case, in MB
+sandbox_memory_mb = int(os.getenv("SANDBOX_MEMORY_MB", "512"))
+# Number of test cases running at once
+sandbox_workers = int(os.getenv("SANDBOX_WORKERS", str(os.cpu_count() or 4)))
+
+# Modules a judge normally makes available without imports
+PRELUDE = "from typing import *\nimport collections, math, heapq, bisect, itertools, functools\nfrom collections import *\n"
+
+def parse_signature(code: str) -> Dict:
+    """
+    Find the function to test in the submitted code.
+    
+    A LeetCode-style `class Solution` wins, then the first top-level
+    function, then the first public method of any class.
+    
+    Args:
+        code (str): The submitted code
+    
+    Returns:
+        Dict: "function" name, "params" (without self/cls), "annotations" (source of each
+            annotated parameter's type) and "class_name" (None for a plain function)
+    
+    Raises:
+        ValueError: If the code does not parse or defines no function
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(code))
+    except SyntaxError as e:
+        raise ValueError(f"Could not parse the provided code: {str(e)}")
+    
+    def describe(function, is_method, class_name):
+        args = function.args.posonlyargs + function.args.args
+        if is_method and args:
+            args = args[1:]
+        return {
+            "function": function.name,
+            "params": [arg.arg for arg in args],
+            "annotations": {arg.arg: ast.unparse(arg.annotation) for arg in args if arg.annotation is not None},
+            "class_name": class_name,
+        }
+    
+    def public_method(node):
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not item.name.startswith("_"):
+                return item
+        return None
+    
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+    for node in classes:
+        method = public_method(node)
+        if node.name == "Solution" and method:
+            return describe(method, True, node.name)
+    if functions:
+        return describe(functions[0], False, None)
+    for node in classes:
+        method = public_method(node)
+        if method:
+            return describe(method, True, node.name)
+    raise ValueError("Could not identify function in the provided code")
+
+def normalize_inputs(inputs: Any, param_names: List[str]) -> List[Any]:
+    """
+    Turn the inputs proposed for a test case into positional arguments.
+    
+    Args:
+        inputs (Any): A list of values, a dict keyed by parameter name, or a single value
+        param_names (List[str]): The function's parameters
+    
+    Returns:
+        List[Any]: The arguments in parameter order
+    """
+    if isinstance(inputs, dict):
+        return [inputs.get(name) for name in param_names]
+    if isinstance(inputs, (list, tuple)) and (len(param_names) != 1 or len(inputs) == 1):
+        return list(inputs)
+    return [inputs]
+
+def run_case(code: str, signature: Dict, inputs: List[Any], timeout: float = None) -> Dict:
+    """
+    Run the submitted function on one set of inputs in a resource-limited subprocess.
+    
+    Args:
+        code (str): The submitted code
+        signature (Dict): The function to call, as returned by parse_signature
+        inputs (List[Any]): The positional arguments
+        timeout (float): Wall-clock limit in seconds (defaults to SANDBOX_TIMEOUT)
+    
+    Returns:
+        Dict: "output" (JSON value, or repr for other values), "runtime_ms" and "error" ("" on success)
+    """
+    timeout = sandbox_timeout if timeout is None else timeout
+    request = {
+        "code": textwrap.dedent(code),
+        "function": signature["function"],
+        "class_name": signature["class_name"],
+        "inputs": inputs,
+        "cpu_seconds": sandbox_cpu_seconds,
+        "memory_mb": sandbox_memory_mb,
+    }
+    start = time.perf_counter()
+    # The result comes back through an unnamed file of its own rather than stdout, so the
+    # submission cannot forge it by printing a result line and exiting
+    with tempfile.TemporaryDirectory(prefix="sandbox_") as work_dir, tempfile.TemporaryFile("w+") as result_file:
+        request["result_fd"] = result_file.fileno()
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-I", os.path.abspath(__file__)],
+                input=json.dumps(request),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=work_dir,
+                env={"PATH": os.environ.get("PATH", ""), "PYTHONHASHSEED": "0"},
+                pass_fds=(result_file.fileno(),),
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {"output": None, "runtime_ms": round(timeout * 1000, 3), "error": f"Timed out after {timeout}s"}
+        result_file.seek(0)
+        payload = result_file.read()
+    
+    if completed.returncode < 0:
+        name = signal.Signals(-completed.returncode).name
+        reason = "CPU time limit exceeded" if name == "SIGXCPU" else f"Killed by {name}"
+        return {"output": None, "runtime_ms": round((time.perf_counter() - start) * 1000, 3), "error": reason}
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"Exited with code {completed.returncode}"
+        return {"output": None, "runtime_ms": round((time.perf_counter() - start) * 1000, 3), "error": error}
+
+def run_cases(code: str, signature: Dict, inputs_list: List[List[Any]], max_workers: Optional[int] = None) -> List[Dict]:
+    """
+    Run the submitted function on every test case in parallel.
+    
+    Each case gets its own subprocess, so a crash, a runaway loop or a
+    memory blow-up only fails that case.
+    
+    Args:
+        code (str): The submitted code
+        signature (Dict): The function to call, as returned by parse_signature
+        inputs_list (List[List[Any]]): Positional arguments of each case
+        max_workers (Optional[int]): Cases running at once (defaults to SANDBOX_WORKERS)
+    
+    Returns:
+        List[Dict]: The result of each case, in input order
+    """
+    if not inputs_list:
+        return []
+    workers = max(1, min(max_workers or sandbox_workers, len(inputs_list)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sandbox") as executor:
+        return list(executor.map(lambda inputs: run_case(code, signature, inputs), inputs_list))
+
+def limit_resources(cpu_seconds: int, memory_mb: int) -> None:
+    """Apply CPU and memory limits to the current (child) process where the platform supports them."""
+    try:
+        import resource
+    except ImportError:
+        return
+    memory = memory_mb * 1024 * 1024
+    for limit, value in ((resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1)), (resource.RLIMIT_AS, (memory, memory))):
+        try:
+            resource.setrlimit(limit, value)
+        except (ValueError, OSError):
+            # Some platforms (e.g. macOS for RLIMIT_AS) refuse the limit; the wall-clock timeout still applies
+            pass
+
+def jsonable(value: Any) -> Any:
+    """Keep JSON-serializable values as they are and fall back to repr for the rest."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+def child_main() -> None:
+    """Entry point of the sandbox subprocess: read one request from stdin, write one JSON result to its result_fd."""
+    request = json.loads(sys.stdin.read())
+    limit_resources(request["cpu_seconds"], request["memory_mb"])
+    
+    result = {"output": None, "runtime_ms": 0.0, "error": ""}
+    start = None
+    try:
+        namespace = {"__name__": "__sandbox__"}
+        exec(PRELUDE, namespace)
+        exec(compile(request["code"], "<submission>", "exec"), namespace)
+        target = namespace[request["class_name"]]() if request["class_name"] else namespace
+        function = getattr(target, request["function"]) if request["class_name"] else target[request["function"]]
+        start = time.perf_counter()
+        output = function(*request["inputs"])
+        result["output"] = jsonable(output)
+    except MemoryError:
+        result["error"] = "Memory limit exceeded"
+    except BaseException as e:
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+    if start is not None:
+        result["runtime_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    with os.fdopen(request["result_fd"], "w") as result_file:
+        result_file.write(json.dumps(result))
+
+if __name__ == "__main__":
+    child_main()
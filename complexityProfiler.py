@@ -0,0 +1,172 @@
+# Empirical complexity profiling of the submitted code
+# code -> timings on inputs of growing size -> best-fitting growth curve (O(1) ... O(n^3))
+import os
+import math
+import random
+import time
+from typing import Any, Dict, List
+from codeSandbox import parse_signature, run_case
+from telemetry import traced
+
+# Total wall-clock budget for profiling one submission, in seconds. The workflow waits this
+# long (see workflow.profile_wait) for the profile before the steps LLM call.
+profile_budget = float(os.getenv("PROFILE_BUDGET", "10"))
+# Stop growing the input once a single run takes this long, in seconds
+profile_max_case_seconds = float(os.getenv("PROFILE_MAX_CASE_SECONDS", "0.5"))
+# Input sizes tried, doubling from the first to the last
+profile_min_size = int(os.getenv("PROFILE_MIN_SIZE", "64"))
+profile_max_size = int(os.getenv("PROFILE_MAX_SIZE", "65536"))
+
+# Runs faster than this are dominated by timer noise and are left out of the fit, in ms
+NOISE_FLOOR_MS = 0.1
+
+# Candidate growth curves, from slowest to fastest growing
+COMPLEXITY_MODELS = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: float(n),
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n^2)": lambda n: float(n) ** 2,
+    "O(n^3)": lambda n: float(n) ** 3,
+}
+
+# Parameter names that usually hold the input size or a small scalar
+SIZE_NAMES = {"n", "size", "length", "count", "num", "m"}
+STRING_NAMES = {"s", "t", "string", "text", "word", "str", "pattern", "p"}
+MATRIX_NAMES = {"matrix", "grid", "board", "mat"}
+
+def generate_argument(name: str, annotation: str, n: int, rng: random.Random) -> Any:
+    """
+    Build one argument of size n for a parameter, from its annotation or, failing that, its name.
+    
+    Scalars that are not sizes are set to 0 while list values are positive,
+    so search-style functions (targets, sums) find no early answer and run
+    their worst case.
+    
+    Args:
+        name (str): The parameter name
+        annotation (str): Source of the parameter's type annotation, or ""
+        n (int): The input size
+        rng (random.Random): Seeded random generator
+    
+    Returns:
+        Any: The argument
+    """
+    annotation = annotation.replace(" ", "").lower()
+    lowered = name.lower()
+    if "list[list" in annotation or lowered in MATRIX_NAMES:
+        side = max(1, int(math.isqrt(n)))
+        return [[rng.randint(1, 10 * n) for _ in range(side)] for _ in range(side)]
+    if "list[str" in annotation or lowered in ("words", "strs", "strings"):
+        return ["".join(rng.choice("abcde") for _ in range(5)) for _ in range(n)]
+    if annotation.startswith("str") or lowered in STRING_NAMES:
+        return "".join(rng.choice("abcdefghij") for _ in range(n))
+    if annotation.startswith("int") or annotation.startswith("float") or lowered in SIZE_NAMES or lowered in ("target", "k", "x"):
+        return n if lowered in SIZE_NAMES else 0
+    # Lists are the most common input of judge problems
+    return [rng.randint(1, 10 * n) for _ in range(n)]
+
+def generate_inputs(signature: Dict, n: int, seed: int = 0) -> List[Any]:
+    """
+    Build the arguments of one profiling run.
+    
+    Args:
+        signature (Dict): The function to call, as returned by codeSandbox.parse_signature
+        n (int): The input size
+        seed (int): Seed for reproducible inputs
+    
+    Returns:
+        List[Any]: The positional arguments
+    """
+    rng = random.Random(seed + n)
+    annotations = signature.get("annotations", {})
+    return [generate_argument(name, annotations.get(name, ""), n, rng) for name in signature["params"]]
+
+def fit_complexity(timings: List[Dict]) -> str:
+    """
+    Pick the growth curve that best fits the measured timings.
+    
+    Each model t = c * f(n) is fitted by least squares on the relative
+    error, so small and large inputs weigh the same, and the model with
+    the smallest residual wins.
+    
+    Args:
+        timings (List[Dict]): Measurements as {"n", "ms"}
+    
+    Returns:
+        str: The complexity, e.g. "O(n^2)", or "" if there are too few usable measurements
+    """
+    points = [(t["n"], t["ms"]) for t in timings if t["ms"] >= NOISE_FLOOR_MS]
+    if len(points) < 3:
+        # The runtime never rose above the noise floor: constant (or logarithmic) time
+        # is as precise as the measurements allow
+        return "O(1)" if len(timings) >= 3 and not points else ""
+    
+    best, best_residual = "", float("inf")
+    for name, model in COMPLEXITY_MODELS.items():
+        ratios = [model(n) / ms for n, ms in points]
+        scale = sum(ratios) / sum(r * r for r in ratios)
+        residual = sum((1 - scale * r) ** 2 for r in ratios)
+        if residual < best_residual:
+            best, best_residual = name, residual
+    return best
+
+@traced("sandbox.profile")
+def profile_code(code: str, budget: float = None) -> Dict:
+    """
+    Measure how the submitted function's runtime grows with its input size.
+    
+    Sizes double from PROFILE_MIN_SIZE to PROFILE_MAX_SIZE. Each size runs in
+    an isolated sandbox subprocess, and profiling stops early once a run
+    takes PROFILE_MAX_CASE_SECONDS, fails, or the total budget is spent.
+    
+    Args:
+        code (str): The submitted code
+        budget (float): Total wall-clock budget in seconds (defaults to PROFILE_BUDGET)
+    
+    Returns:
+        Dict: "complexity" (e.g. "O(n^2)", "" if unknown), "timings" as [{"n", "ms"}]
+            and "error" ("" unless profiling could not run at all)
+    """
+    if budget is None:
+        budget = profile_budget
+    try:
+        signature = parse_signature(code)
+    except ValueError as e:
+        return {"complexity": "", "timings": [], "error": str(e)}
+    if not signature["params"]:
+        return {"complexity": "", "timings": [], "error": "The function takes no input to scale"}
+    
+    timings = []
+    deadline = time.monotonic() + budget
+    n = profile_min_size
+    while n <= profile_max_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        result = run_case(code, signature, generate_inputs(signature, n), timeout=min(remaining, profile_max_case_seconds * 4))
+        if result["error"]:
+            # Keep what was measured below the size that failed or timed out
+            break
+        timings.append({"n": n, "ms": result["runtime_ms"]})
+        if result["runtime_ms"] >= profile_max_case_seconds * 1000:
+            break
+        n *= 2
+    
+    return {"complexity": fit_complexity(timings), "timings": timings, "error": ""}
+
+def format_profile(complexity: str, timings: List[Dict]) -> str:
+    """
+    Describe a profile for an LLM prompt.
+    
+    Args:
+        complexity (str): The measured complexity
+        timings (List[Dict]): Measurements as {"n", "ms"}
+    
+    Returns:
+        str: One line with the complexity and the timing table, or "" if nothing was measured
+    """
+    if not complexity or not timings:
+        return ""
+    table = ", ".join(f"n={t['n']}: {t['ms']} ms" for t in timings)
+    return f"Measured runtime of the submitted code grows as {complexity} ({table})."
@@ -0,0 +1,7 @@
+# Process-wide configuration loading
+# Modules read their settings with os.getenv when they are imported. Importing this module
+# first loads .env exactly once, before any of them, so every setting sees the same values.
+from dotenv import load_dotenv
+
+# Variables already set in the environment win over .env
+load_dotenv()
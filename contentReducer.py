@@ -0,0 +1,215 @@
+# Content reduction for scraped problem pages
+# Keeps the main problem body (site rules for common judges, then a generic
+# readability-style fallback) and splits it into chunks that fit a token budget.
+import os
+import re
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from urllib.parse import urlparse
+
+# BeautifulSoup is imported on first use, so importing this module stays fast
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# Maximum tokens of page content sent in one extraction prompt
+scrape_token_budget = int(os.getenv("SCRAPE_TOKEN_BUDGET", "3000"))
+
+# CSS selectors for the problem body on common judge sites, tried in order
+SITE_RULES = {
+    "leetcode.com": [
+        "div[data-track-load=description_content]",
+        "meta[name=description]",
+        "meta[property='og:description']",
+    ],
+    "codeforces.com": ["div.problem-statement"],
+    "atcoder.jp": ["#task-statement span.lang-en", "#task-statement"],
+    "hackerrank.com": ["div.challenge-body-html", "div.problem-statement"],
+    "geeksforgeeks.org": ["div[class*=problem_content]", "div.problem-statement", "article"],
+    "spoj.com": ["#problem-body"],
+    "codechef.com": ["div[class*=problem-statement]", "#problem-statement"],
+}
+
+# Elements that never contain the problem body
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg", "button"]
+
+# Blocks scored by the generic fallback
+CANDIDATE_TAGS = ["article", "main", "section", "div", "td"]
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+    
+    Args:
+        text (str): The text
+        
+    Returns:
+        int: Roughly one token per 4 characters, the same estimate used by the rate limiter
+    """
+    return len(text) // 4
+
+def element_text(element) -> str:
+    """
+    Convert an element (or a meta tag's content) into plain text.
+    
+    Args:
+        element: A BeautifulSoup element
+        
+    Returns:
+        str: The text with whitespace collapsed
+    """
+    if element.name == "meta":
+        text = element.get("content", "")
+    else:
+        text = element.get_text(" ")
+    text = re.sub("[ \t]+", " ", text)
+    return re.sub("\\s+\n\\s+", "\n", text).strip()
+
+def site_rule_text(url: str, soup: "BeautifulSoup") -> Tuple[str, str]:
+    """
+    Extract the problem body with the rules of a known judge site.
+    
+    Args:
+        url (str): The page URL
+        soup (BeautifulSoup): The parsed page
+        
+    Returns:
+        Tuple[str, str]: The text and the selector that matched, or ("", "") if no rule applies
+    """
+    host = urlparse(url).netloc.lower()
+    for domain, selectors in SITE_RULES.items():
+        if host == domain or host.endswith("." + domain):
+            for selector in selectors:
+                element = soup.select_one(selector)
+                if element is not None:
+                    text = element_text(element)
+                    if len(text) > 40:
+                        return text, selector
+    return "", ""
+
+def readability_text(soup: "BeautifulSoup") -> str:
+    """
+    Find the main content block of an unknown page.
+    
+    Each block is scored by the text in its paragraphs and code blocks,
+    penalized by the share of its text that sits inside links.
+    
+    Args:
+        soup (BeautifulSoup): The parsed page, with noise elements removed
+        
+    Returns:
+        str: The text of the best block, or of the whole body if none stands out
+    """
+    best, best_score = None, 0.0
+    for block in soup.find_all(CANDIDATE_TAGS):
+        content = " ".join(p.get_text(" ") for p in block.find_all(["p", "pre", "li"], recursive=True))
+        if len(content) < 80:
+            continue
+        text_length = len(block.get_text(" "))
+        link_length = sum(len(a.get_text(" ")) for a in block.find_all("a"))
+        link_density = link_length / max(1, text_length)
+        # Prefer the block whose text is mostly content, not the whole page around it
+        score = len(content) * (1 - link_density) * (len(content) / max(1, text_length))
+        if score > best_score:
+            best, best_score = block, score
+    
+    root = best or soup.body or soup
+    return element_text(root)
+
+def main_text(url: str, soup: "BeautifulSoup") -> Tuple[str, str]:
+    """
+    Extract the problem body of a page, with the site rules first and the generic fallback otherwise.
+    
+    Noise elements are removed from the soup when the fallback runs.
+    
+    Args:
+        url (str): The page URL
+        soup (BeautifulSoup): The parsed page
+        
+    Returns:
+        Tuple[str, str]: The text and the rule that produced it
+    """
+    text, rule = site_rule_text(url, soup)
+    if not text:
+        for element in soup(NOISE_TAGS):
+            element.decompose()
+        text, rule = readability_text(soup), "readability"
+    return text, rule
+
+def split_chunks(text: str, budget: int) -> List[str]:
+    """
+    Split text into chunks of at most budget tokens, on paragraph boundaries when possible.
+    
+    Args:
+        text (str): The text
+        budget (int): Maximum tokens per chunk
+        
+    Returns:
+        List[str]: The chunks
+    """
+    max_chars = max(1, budget * 4)
+    chunks, current = [], ""
+    for paragraph in text.split("\n"):
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def reduce_content(url: str, html: str, budget: int = None) -> Dict:
+    """
+    Reduce a raw page to its problem body, split to fit the token budget.
+    
+    Args:
+        url (str): The page URL
+        html (str): The raw page
+        budget (int): Maximum tokens per extraction prompt (defaults to SCRAPE_TOKEN_BUDGET)
+        
+    Returns:
+        Dict: "chunks" (List[str]) to extract from, "rule" that produced them and
+            "stats" with the bytes and tokens before and after reduction
+    """
+    from bs4 import BeautifulSoup
+    
+    if budget is None:
+        budget = scrape_token_budget
+    
+    text, rule = main_text(url, BeautifulSoup(html, "html.parser"))
+    raw_text = element_text(BeautifulSoup(html, "html.parser"))
+    chunks = split_chunks(text, budget)
+    stats = {
+        "raw_bytes": len(html.encode("utf-8")),
+        "reduced_bytes": len(text.encode("utf-8")),
+        "raw_tokens": count_tokens(raw_text),
+        "reduced_tokens": count_tokens(text),
+        "chunks": len(chunks),
+    }
+    stats["bytes_saved"] = stats["raw_bytes"] - stats["reduced_bytes"]
+    stats["tokens_saved"] = stats["raw_tokens"] - stats["reduced_tokens"]
+    return {"chunks": chunks, "rule": rule, "stats": stats}
+
+def merge_extractions(results: List[Dict]) -> Dict:
+    """
+    Combine the extractions of several chunks of the same page.
+    
+    Args:
+        results (List[Dict]): {question, test_cases} extracted from each chunk, in page order
+        
+    Returns:
+        Dict: The distinct question parts joined in order and the distinct test cases
+    """
+    questions, test_cases = [], []
+    for result in results:
+        question = (result.get("question") or "").strip()
+        if question and question not in questions:
+            questions.append(question)
+        for test_case in result.get("test_cases") or []:
+            if test_case not in test_cases:
+                test_cases.append(test_case)
+    return {"question": "\n\n".join(questions), "test_cases": test_cases}
@@ -0,0 +1,366 @@
+# Response cache for LLM calls
+# key: hash(model name, prompt without trailing whitespace) -> response content
+# An in-memory LRU sits in front of a persistent backend (SQLite by default).
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from telemetry import cache_requests
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so that trailing whitespace does not change its cache entry.
+    
+    Indentation and inner whitespace are kept: prompts embed user code,
+    where they are significant.
+    
+    Args:
+        prompt (str): The prompt text
+        
+    Returns:
+        str: The prompt with trailing whitespace removed from every line
+    """
+    return "\n".join(line.rstrip() for line in prompt.splitlines()).strip("\n")
+
+class SQLiteBackend:
+    """
+    Persistent cache backend storing entries in a SQLite database.
+    
+    Any object with the same get/set/delete/evict methods can be used as a
+    backend instead. The database is opened on first use, so importing the
+    cache does not touch the disk; if it cannot be opened the backend
+    stays empty and the cache works from memory only.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.disabled = False
+        self._lock = threading.Lock()
+        self._conn = None
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Called with the lock held
+        if self._conn is None and not self.disabled:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache ("
+                        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                        "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                self._conn = conn
+            except (sqlite3.Error, OSError) as e:
+                print(f"Error opening LLM cache database, using memory only: {str(e)}")
+                self.disabled = True
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                    )
+        return row
+    
+    def set(self, key: str, value: str, created_at: float) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, created_at, created_at)
+                )
+    
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            with conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+    
+    def evict(self, max_entries: int, expired_before: float) -> int:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return 0
+            with conn:
+                removed = conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (expired_before,)
+                ).rowcount
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)
+                ).rowcount
+        return removed
+
+class LLMCache:
+    """
+    Two-level response cache with TTL, size-based eviction and hit/miss counters.
+    """
+    
+    def __init__(self, backend=None, memory_size: int = 256, ttl: float = 7 * 24 * 3600, max_entries: int = 10000, enabled: bool = True):
+        self.backend = backend
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {"hits": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0, "evictions": 0}
+    
+    def key(self, model: str, prompt: str) -> str:
+        """
+        Build the cache key for a model and prompt.
+        
+        Args:
+            model (str): The model name
+            prompt (str): The prompt text
+            
+        Returns:
+            str: Hex digest of the model name and normalized prompt
+        """
+        return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+    
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self.counters[name] += 1
+    
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self.counters["evictions"] += 1
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key (str): The cache key
+            
+        Returns:
+            Optional[str]: The cached response, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] > self.ttl:
+                del self._memory[key]
+                entry = None
+            if entry:
+                self._memory.move_to_end(key)
+        if entry:
+            self._count("hits", "memory_hits")
+            return entry[0]
+        
+        if self.backend is not None:
+            try:
+                entry = self.backend.get(key)
+            except Exception as e:
+                print(f"Error reading LLM cache: {str(e)}")
+                entry = None
+            if entry and now - entry[1] > self.ttl:
+                self._delete_from_backend(key)
+                entry = None
+            if entry:
+                self._remember(key, entry[0], entry[1])
+                self._count("hits", "backend_hits")
+                return entry[0]
+        
+        self._count("misses")
+        return None
+    
+    def _delete_from_backend(self, key: str) -> None:
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f"Error deleting from LLM cache: {str(e)}")
+    
+    def delete(self, key: str) -> None:
+        """
+        Remove a response from both cache levels.
+        
+        Args:
+            key (str): The cache key
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.backend is not None:
+            self._delete_from_backend(key)
+    
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in both cache levels.
+        
+        Args:
+            key (str): The cache key
+            value (str): The response content
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        self._remember(key, value, now)
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value, now)
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % 100 == 0
+            if should_evict:
+                evicted = self.backend.evict(self.max_entries, now - self.ttl)
+                with self._lock:
+                    self.counters["evictions"] += evicted
+        except Exception as e:
+            print(f"Error writing LLM cache: {str(e)}")
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+        
+        Returns:
+            Dict[str, int]: Hit, miss and eviction counters
+        """
+        with self._lock:
+            return dict(self.counters, memory_entries=len(self._memory))
+
+def build_cache() -> LLMCache:
+    """
+    Build the shared cache from the environment.
+    
+    Returns:
+        LLMCache: The configured cache
+    """
+    enabled = os.getenv("LLM_CACHE", "1") != "0"
+    db_path = os.path.expanduser(os.getenv("LLM_CACHE_PATH", "~/.cache/langgraph-workflow/llm_cache.sqlite"))
+    return LLMCache(
+        # The database is opened on the first lookup, not at import
+        backend=SQLiteBackend(db_path) if enabled and db_path else None,
+        memory_size=int(os.getenv("LLM_CACHE_MEMORY_SIZE", "256")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        enabled=enabled,
+    )
+
+# Shared cache used by every generation node
+llm_cache = build_cache()
+
+def cached_invoke(chat, messages: List, invoke: Callable = None, validate: Callable = None) -> str:
+    """
+    Invoke a chat model through the shared response cache.
+    
+    Nodes call the model with temperature=0, so the same model and prompt
+    always give the same answer. Only successful responses are cached, and
+    with a validator only responses the caller can use: a rejected response
+    is not stored, so a retry asks the model again instead of replaying it.
+    
+    Args:
+        chat: The chat model
+        messages (List): The messages to send
+        invoke (Callable): Called as invoke(chat, messages) on a miss (defaults to chat.invoke)
+        validate (Callable): Called with the response content, returns False for responses
+            that must not be cached (cached entries it rejects are dropped)
+        
+    Returns:
+        str: The response content
+    """
+    model = getattr(chat, "model_name", None) or getattr(chat, "model", "") or ""
+    prompt = "\n".join(str(message.content) for message in messages)
+    key = llm_cache.key(model, prompt)
+    
+    content = cached_content(key, validate)
+    if content is not None:
+        return content
+    
+    if invoke is None:
+        response = chat.invoke(messages)
+    else:
+        response = invoke(chat, messages)
+    content = response.content
+    if validate is None or validate(content):
+        llm_cache.set(key, content)
+    return content
+
+def cached_content(key: str, validate: Callable = None) -> Optional[str]:
+    """
+    Look up a response and count the lookup, dropping cached responses the validator rejects.
+    
+    Args:
+        key (str): The cache key
+        validate (Callable): Called with the cached content, returns False for unusable responses
+        
+    Returns:
+        Optional[str]: The cached response, or None
+    """
+    content = llm_cache.get(key)
+    if content is not None and validate is not None and not validate(content):
+        llm_cache.delete(key)
+        content = None
+    cache_requests.inc(cache="llm", result="miss" if content is None else "hit")
+    return content
+
+def cached_stream(chat, messages: List, stream: Callable = None, validate: Callable = None) -> Iterator[str]:
+    """
+    Stream a chat model's reply through the shared response cache.
+    
+    A cached reply is yielded as a single chunk. A streamed reply is only
+    cached once the stream completed, so an abandoned stream is not stored,
+    and only if the validator accepts it.
+    
+    Args:
+        chat: The chat model
+        messages (List): The messages to send
+        stream (Callable): Called as stream(chat, messages) on a miss and yielding
+            text chunks (defaults to the text of chat.stream)
+        validate (Callable): Called with the complete response, returns False for
+            responses that must not be cached
+    
+    Yields:
+        str: The response content, chunk by chunk
+    """
+    model = getattr(chat, "model_name", None) or getattr(chat, "model", "") or ""
+    prompt = "\n".join(str(message.content) for message in messages)
+    key = llm_cache.key(model, prompt)
+    
+    content = cached_content(key, validate)
+    if content is not None:
+        yield content
+        return
+    
+    if stream is None:
+        chunks = (chunk.content for chunk in chat.stream(messages))
+    else:
+        chunks = stream(chat, messages)
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    content = "".join(parts)
+    if validate is None or validate(content):
+        llm_cache.set(key, content)
@@ -0,0 +1,311 @@
+# Shared LLM client layer used by every generation node
+# One pooled ChatGroq client per model, retries with backoff and jitter,
+# and the response cache in front of every call.
+import os
+import time
+import random
+import threading
+import functools
+from typing import TYPE_CHECKING, Callable, Iterator, List, Union
+import config
+from llmCache import cached_invoke, cached_stream
+from rateLimiter import rate_limiter
+from telemetry import span, llm_tokens
+
+# The Groq client, LangChain and httpx are imported on first use, so importing this module stays fast
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+
+# Configure the Groq API
+groq_api_key = os.getenv("GROQ_API_KEY")
+groq_api_base = os.getenv("GROQ_API_BASE") or None
+
+# The single place where the model is chosen
+model_name = os.getenv("LLM_MODEL", "mistral-saba-24B")
+
+# Connection pool, timeout and retry settings
+llm_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+llm_pool_size = int(os.getenv("LLM_POOL_SIZE", "20"))
+llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+llm_backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+llm_backoff_max = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+
+# Completion tokens reserved per call before the real usage is known
+llm_completion_tokens = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "1000"))
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_chat(model: str = None) -> "ChatGroq":
+    """
+    Get the shared chat client for a model.
+    
+    Clients are built once and reused, so HTTP connections and TLS sessions
+    are kept alive across calls and across nodes.
+    
+    Args:
+        model (str): The model name (defaults to LLM_MODEL)
+        
+    Returns:
+        ChatGroq: The shared client
+    """
+    model = model or model_name
+    with _clients_lock:
+        chat = _clients.get(model)
+        if chat is None:
+            import httpx
+            from langchain_groq import ChatGroq
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(llm_timeout),
+                limits=httpx.Limits(max_connections=llm_pool_size, max_keepalive_connections=llm_pool_size),
+            )
+            chat = ChatGroq(
+                temperature=0,
+                groq_api_key=groq_api_key,
+                groq_api_base=groq_api_base,
+                model_name=model,
+                request_timeout=llm_timeout,
+                # Retries are handled by invoke_with_retry
+                max_retries=0,
+                http_client=http_client,
+            )
+            _clients[model] = chat
+        return chat
+
+def reset_clients() -> None:
+    """
+    Close and drop the shared clients, e.g. after changing the API base or key.
+    """
+    with _clients_lock:
+        for chat in _clients.values():
+            if chat.http_client is not None:
+                chat.http_client.close()
+        _clients.clear()
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed LLM call is worth retrying.
+    
+    Args:
+        error (Exception): The error raised by the client
+        
+    Returns:
+        bool: True for rate limits, server errors, timeouts and connection errors
+    """
+    import httpx
+    
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)) or \
+        type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """
+    Compute the wait before the next attempt, using exponential backoff with full jitter.
+    
+    A Retry-After header sent by the server takes precedence.
+    
+    Args:
+        attempt (int): The 0-based number of the attempt that failed
+        error (Exception): The error raised by the client
+        
+    Returns:
+        float: Seconds to wait
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), llm_backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(llm_backoff_max, llm_backoff_base * (2 ** attempt)))
+
+def estimate_tokens(messages: List) -> int:
+    """
+    Estimate the tokens a call will use, reserved in the rate limiter before the call.
+    
+    Args:
+        messages (List): The messages to send
+        
+    Returns:
+        int: Roughly 4 characters per prompt token plus the completion estimate
+    """
+    return sum(len(str(message.content)) for message in messages) // 4 + llm_completion_tokens
+
+def tokens_used(response) -> int:
+    """
+    Read the total token usage reported with a response.
+    
+    Args:
+        response: The model response
+        
+    Returns:
+        int: Total tokens, or None if the provider did not report usage
+    """
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    return usage.get("total_tokens")
+
+def record_tokens(model: str, messages: List, response) -> None:
+    """
+    Add a response's prompt and completion tokens to llm_tokens_total.
+    
+    Args:
+        model (str): The model name
+        messages (List): The messages sent
+        response: The model response
+    """
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    # Providers that do not report usage are counted with the same estimate as the rate limiter
+    prompt_tokens = usage.get("prompt_tokens")
+    if prompt_tokens is None:
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+    completion_tokens = usage.get("completion_tokens")
+    if completion_tokens is None:
+        completion_tokens = len(str(response.content)) // 4
+    llm_tokens.inc(prompt_tokens, model=model, kind="prompt")
+    llm_tokens.inc(completion_tokens, model=model, kind="completion")
+
+def invoke_with_retry(chat: "ChatGroq", messages: List, max_retries: int = None):
+    """
+    Invoke a chat client, retrying transient failures.
+    
+    Every attempt is admitted by the shared rate limiter, which also backs
+    off its concurrency when the provider answers with a 429.
+    
+    Args:
+        chat (ChatGroq): The chat client
+        messages (List): The messages to send
+        max_retries (int): Extra attempts after the first failure (defaults to LLM_MAX_RETRIES)
+        
+    Returns:
+        The model response
+    """
+    if max_retries is None:
+        max_retries = llm_max_retries
+    tokens = estimate_tokens(messages)
+    model = getattr(chat, "model_name", None) or getattr(chat, "model", "") or ""
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire(tokens)
+        try:
+            with span("llm.call", model=model, attempt=attempt):
+                response = chat.invoke(messages)
+        except Exception as e:
+            rate_limiter.release(rate_limited=getattr(e, "status_code", None) == 429)
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"LLM call failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            rate_limiter.release(tokens_reserved=tokens, tokens_used=tokens_used(response))
+            record_tokens(model, messages, response)
+            return response
+
+def parses_with(output_parser) -> Callable:
+    """
+    Build a cache validator that accepts the responses an output parser can parse.
+    
+    Args:
+        output_parser: A LangChain output parser
+        
+    Returns:
+        Callable: Called with the response content, True if it parses
+    """
+    def validate(content: str) -> bool:
+        try:
+            output_parser.parse(content)
+            return True
+        except Exception:
+            return False
+    return validate
+
+def stream_with_retry(chat: "ChatGroq", messages: List) -> Iterator[str]:
+    """
+    Stream a chat client's reply, retrying transient failures until the first chunk arrives.
+    
+    A failure after text was handed to the caller is raised instead of
+    retried, since a new attempt would repeat text the caller already used.
+    The rate limiter slot is held until the stream ends or is closed.
+    
+    Args:
+        chat (ChatGroq): The chat client
+        messages (List): The messages to send
+    
+    Yields:
+        str: The response content, chunk by chunk
+    """
+    tokens = estimate_tokens(messages)
+    model = getattr(chat, "model_name", None) or getattr(chat, "model", "") or ""
+    for attempt in range(llm_max_retries + 1):
+        rate_limiter.acquire(tokens)
+        response = None
+        try:
+            with span("llm.stream", model=model, attempt=attempt):
+                for chunk in chat.stream(messages):
+                    # Chunks add up to the full message, usage metadata included
+                    response = chunk if response is None else response + chunk
+                    if chunk.content:
+                        yield chunk.content
+        except GeneratorExit:
+            # The caller stopped reading
+            rate_limiter.release()
+            raise
+        except Exception as e:
+            rate_limiter.release(rate_limited=getattr(e, "status_code", None) == 429)
+            if response is not None or attempt == llm_max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"LLM stream failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            if response is None:
+                rate_limiter.release()
+            else:
+                rate_limiter.release(tokens_reserved=tokens, tokens_used=tokens_used(response))
+                record_tokens(model, messages, response)
+            return
+
+def stream_llm(messages: Union[str, List], model: str = None, validate: Callable = None) -> Iterator[str]:
+    """
+    Stream a reply through the shared client, response cache and retry policy.
+    
+    Args:
+        messages (Union[str, List]): A prompt string or a list of messages
+        model (str): The model name (defaults to LLM_MODEL)
+        validate (Callable): Called with the complete response, returns False if the
+            caller cannot use it, which keeps it out of the cache
+    
+    Yields:
+        str: The response content, chunk by chunk (a cached response arrives as one chunk)
+    """
+    if isinstance(messages, str):
+        from langchain_core.messages import HumanMessage
+        messages = [HumanMessage(content=messages)]
+    yield from cached_stream(get_chat(model), messages, stream=stream_with_retry, validate=validate)
+
+def invoke_llm(messages: Union[str, List], model: str = None, validate: Callable = None, max_retries: int = None) -> str:
+    """
+    Send a prompt through the shared client, response cache and retry policy.
+    
+    Args:
+        messages (Union[str, List]): A prompt string or a list of messages
+        model (str): The model name (defaults to LLM_MODEL)
+        validate (Callable): Called with the response content, returns False if the
+            caller cannot use it (e.g. it does not parse), which keeps it out of the cache
+        max_retries (int): Extra attempts after a transient failure (defaults to LLM_MAX_RETRIES)
+        
+    Returns:
+        str: The response content
+    """
+    if isinstance(messages, str):
+        from langchain_core.messages import HumanMessage
+        messages = [HumanMessage(content=messages)]
+    invoke = invoke_with_retry if max_retries is None else functools.partial(invoke_with_retry, max_retries=max_retries)
+    return cached_invoke(get_chat(model), messages, invoke=invoke, validate=validate)
@@ -1,28 +1,225 @@
 import argparse
+import hashlib
+import json
 import sys
 import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Set
 sys.path.append(os.path.join(os.getcwd(), "langgraph-wrokflow"))
-from  workflow import run_workflow
-from fastapi import FastAPI
+import config
+from  workflow import run_workflow, create_workflow, stream_workflow, resume_workflow, list_jobs, run_config, END
+from checkpoints import get_checkpointer
+from rateLimiter import BATCH
+from sceneTemplates import prewarm_templates
+
+def job_id(job: Dict) -> str:
+    """
+    Get the ID of a batch job.
+    
+    Args:
+        job (Dict): The job, with "link", "wrong_code" and an optional "id"
+    
+    Returns:
+        str: The job's own ID, or a hash of its link and code
+    """
+    if job.get("id"):
+        return str(job["id"])
+    return hashlib.sha256(f"{job['link']}\0{job['wrong_code']}".encode("utf-8")).hexdigest()[:16]
+
+def load_jobs(jobs_path: str) -> Iterator[Dict]:
+    """
+    Read batch jobs from a JSONL file.
+    
+    Args:
+        jobs_path (str): Path to the jobs file, one {"id", "link", "wrong_code"} object per line
+    
+    Yields:
+        Dict: Each job, with its "id" filled in
+    """
+    with open(jobs_path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+                job["id"] = job_id(job)
+            except (json.JSONDecodeError, KeyError) as e:
+                print(f"Skipping invalid job on line {line_number}: {str(e)}")
+                continue
+            yield job
+
+def completed_job_ids(output_path: str) -> Set[str]:
+    """
+    Find the jobs that already finished successfully in an earlier run.
+    
+    Args:
+        output_path (str): Path to the results file
+    
+    Returns:
+        Set[str]: IDs of the jobs with status "ok"
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+def run_job(job: Dict, graph) -> Dict:
+    """
+    Run one batch job and time each node.
+    
+    Args:
+        job (Dict): The job
+        graph: The compiled workflow shared by every job
+    
+    Returns:
+        Dict: The result record written to the output file
+    """
+    start = time.perf_counter()
+    record = {"id": job["id"], "link": job["link"]}
+    node_timings = {}
+    try:
+        if graph.checkpointer is not None and graph.get_state(run_config(job["id"])).values:
+            # The job ran before: continue from its checkpoints instead of starting over
+            record["resumed"] = True
+            result = resume_workflow(job["id"], priority_level=BATCH, graph=graph)
+        else:
+            for node, update in stream_workflow(job["link"], job["wrong_code"], priority_level=BATCH, graph=graph, thread_id=job["id"]):
+                if node == END:
+                    result = update
+                else:
+                    # Seconds from the start of the job until the node finished
+                    node_timings[node] = round(time.perf_counter() - start, 3)
+        record["error"] = result.get("error", "")
+        # A failed run may still carry the video of an earlier attempt in its checkpoints
+        record["video_path"] = "" if record["error"] else result.get("video_path", "")
+    except Exception as e:
+        record["video_path"] = ""
+        record["error"] = f"Error in workflow: {str(e)}"
+    record["status"] = "error" if record["error"] or not record["video_path"] else "ok"
+    record["node_timings"] = node_timings
+    record["total_seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+def run_batch(jobs_path: str, output_path: str, workers: int = 4) -> List[Dict]:
+    """
+    Run every job of a JSONL file through one compiled workflow.
+    
+    Jobs run on a bounded thread pool, since each job mostly waits on LLM
+    calls and on render subprocesses. Each result is appended to the
+    output file as soon as it is ready. Jobs already completed in that file
+    are skipped, so an interrupted batch can be resumed by running it again.
+    Every job is checkpointed under its ID, so a job that failed or was
+    interrupted continues from its last completed node.
+    
+    Args:
+        jobs_path (str): Path to the jobs file
+        output_path (str): Path to the results file
+        workers (int): Number of jobs running at once
+    
+    Returns:
+        List[Dict]: The result records of the jobs run now
+    """
+    completed = completed_job_ids(output_path)
+    jobs = [job for job in load_jobs(jobs_path) if job["id"] not in completed]
+    print(f"Running {len(jobs)} jobs ({len(completed)} already completed)")
+    
+    # Build the graph once for every job
+    graph = create_workflow(checkpointer=get_checkpointer())
+    records = []
+    
+    with open(output_path, "a+") as out, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Terminate a line cut short by an interrupted run before appending
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        futures = [executor.submit(run_job, job, graph) for job in jobs]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            print(f"Job {record['id']}: {record['status']} in {record['total_seconds']}s")
+    
+    return records
+
+def print_jobs(jobs: List[Dict]) -> None:
+    """
+    Print checkpointed jobs for the operator.
+    
+    Args:
+        jobs (List[Dict]): Jobs as returned by workflow.list_jobs
+    """
+    for job in jobs:
+        detail = job["error"] or (f"next: {', '.join(job['next'])}" if job["next"] else "")
+        print(f"{job['thread_id']}  {job['status']:<11}  {job['updated_at']}  {job['link']}  {detail}")
 
 def main():
     """
     Main function to run the explanatory video generation workflow.
     """
     parser = argparse.ArgumentParser(description="Generate an explanatory video for a coding problem")
-    parser.add_argument("--link", type=str, required=True, help="URL of the coding problem")
-    parser.add_argument("--wrong-code", type=str, required=True, help="Incorrect code solution to analyze")
+    parser.add_argument("--link", type=str, help="URL of the coding problem")
+    parser.add_argument("--wrong-code", type=str, help="Incorrect code solution to analyze")
+    parser.add_argument("--batch", type=str, help="JSONL file of jobs with id, link and wrong_code")
+    parser.add_argument("--output", type=str, default="batch_results.jsonl", help="JSONL file for batch results")
+    parser.add_argument("--workers", type=int, default=4, help="Number of batch jobs running at once")
+    parser.add_argument("--thread-id", type=str, help="Checkpoint ID for this run (a new one is generated if not given)")
+    parser.add_argument("--list-jobs", action="store_true", help="List failed and interrupted jobs (--all for every job)")
+    parser.add_argument("--all", action="store_true", help="With --list-jobs, include completed jobs")
+    parser.add_argument("--resume", type=str, metavar="THREAD_ID", help="Resume a failed or interrupted job")
+    parser.add_argument("--resume-stuck", action="store_true", help="Resume every failed or interrupted job")
+    parser.add_argument("--prewarm-templates", action="store_true", help="Render the scene templates into the render cache")
     
     args = parser.parse_args()
     
+    if args.batch:
+        return run_batch(args.batch, args.output, args.workers)
+    
+    if args.prewarm_templates:
+        return prewarm_templates()
+    
+    if args.list_jobs:
+        jobs = [job for job in list_jobs() if args.all or job["status"] != "completed"]
+        print_jobs(jobs)
+        return jobs
+    
+    if args.resume or args.resume_stuck:
+        thread_ids = [args.resume] if args.resume else [job["thread_id"] for job in list_jobs() if job["status"] != "completed"]
+        results = []
+        for thread_id in thread_ids:
+            print(f"Resuming job {thread_id}...")
+            result = resume_workflow(thread_id)
+            print(f"Job {thread_id}: {result.get('error') or result.get('video_path')}")
+            results.append(result)
+        return results
+    
+    if not args.link or not args.wrong_code:
+        parser.error("--link and --wrong-code are required unless --batch is given")
+    
     print(f"Generating explanatory video for problem at: {args.link}")
     print("Analyzing provided code...")
     
-    # Run the workflow
-    result = run_workflow(args.link, args.wrong_code)
+    # Run the workflow under a checkpoint ID so it can be resumed if it fails
+    thread_id = args.thread_id or uuid.uuid4().hex
+    print(f"Job ID: {thread_id}")
+    result = run_workflow(args.link, args.wrong_code, thread_id=thread_id)
     
     if result.get("error"):
         print(f"Error in workflow: {result['error']}")
+        print(f"Resume with: python main.py --resume {thread_id}")
     elif result.get("video_path"):
         print(f"Video successfully generated at: {result['video_path']}")
     else:
@@ -0,0 +1,221 @@
+# Deterministic problem extraction for well-structured judge pages
+# html -> {question, test_cases} without an LLM call, when the page layout is recognised
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from contentReducer import main_text
+from telemetry import parser_requests
+
+# BeautifulSoup is imported on first use, so importing this module stays fast
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# Start of the examples section, where the problem statement ends
+EXAMPLES_START = re.compile(r"Example\s*\d*\s*:|Examples?\s*\n|Sample\s+Input|Sample\s+Test", re.IGNORECASE)
+
+# Whatever follows an expected output and must not leak into it
+OUTPUT_END = r"(?=Input:|Example\s*\d+\s*:|Explanation\s*:|Constraints\s*:?|Follow[- ]up|Note\s*:|$)"
+
+# Labels of the <pre> blocks that hold sample input and output
+SAMPLE_INPUT_LABEL = re.compile(r"^(Sample\s+)?Input(\s+\d+|\s*#?\d+)?\s*:?$", re.IGNORECASE)
+SAMPLE_OUTPUT_LABEL = re.compile(r"^(Sample\s+)?Output(\s+\d+|\s*#?\d+)?\s*:?$", re.IGNORECASE)
+
+# Shortest statement accepted without the LLM
+MIN_QUESTION_LENGTH = 40
+
+def format_test_case(input_text: str, output_text: str) -> str:
+    """
+    Format a test case the way the extraction prompt returns them.
+    
+    Args:
+        input_text (str): The test input
+        output_text (str): The expected output
+    
+    Returns:
+        str: "Input: ...\\nOutput: ..."
+    """
+    return f"Input: {input_text.strip()}\nOutput: {output_text.strip()}"
+
+def split_question(text: str) -> str:
+    """
+    Get the problem statement, the text before the first example.
+    
+    Args:
+        text (str): The problem text
+    
+    Returns:
+        str: The statement, or the whole text if it has no examples section
+    """
+    match = EXAMPLES_START.search(text)
+    return (text[:match.start()] if match else text).strip()
+
+def text_examples(text: str) -> List[str]:
+    """
+    Find "Example N: Input: ... Output: ..." blocks in plain text.
+    
+    Args:
+        text (str): The problem text
+    
+    Returns:
+        List[str]: The test cases, in page order
+    """
+    test_cases = []
+    examples = re.findall(r"Example \d+:(.*?)(?=Example \d+:|$)", text, re.DOTALL)
+    if not examples:
+        examples = [text]
+    for example in examples:
+        for input_text, output_text in re.findall(r"Input:(.*?)Output:(.*?)" + OUTPUT_END, example, re.DOTALL):
+            if input_text.strip() and output_text.strip():
+                test_cases.append(format_test_case(input_text, output_text))
+    return test_cases
+
+def pre_text(pre) -> str:
+    """
+    Get the text of a <pre> block, keeping one line per <br> or line element.
+    
+    Args:
+        pre: A BeautifulSoup <pre> element
+    
+    Returns:
+        str: The block's lines
+    """
+    for br in pre.find_all("br"):
+        br.replace_with("\n")
+    lines = [line.get_text("") for line in pre.find_all("div")] if pre.find("div") else pre.get_text("").split("\n")
+    return "\n".join(line.rstrip() for line in lines if line.strip())
+
+def pre_label(pre) -> str:
+    """
+    Get the nearest non-empty text before a <pre> block, usually its heading.
+    
+    Args:
+        pre: A BeautifulSoup <pre> element
+    
+    Returns:
+        str: The label, or "" if there is none
+    """
+    for string in pre.find_all_previous(string=True):
+        if string.strip():
+            return string.strip()
+    return ""
+
+def dom_examples(soup: "BeautifulSoup") -> Tuple[List[str], str]:
+    """
+    Find sample tests in the page structure.
+    
+    Handles Codeforces-style sample blocks, <pre> blocks labelled
+    "Sample Input"/"Sample Output" (AtCoder, HackerRank, SPOJ) and <pre>
+    blocks that each hold a whole "Input: ... Output: ..." example
+    (LeetCode, GeeksforGeeks).
+    
+    Args:
+        soup (BeautifulSoup): The parsed page
+    
+    Returns:
+        Tuple[List[str], str]: The test cases and the rule that found them
+    """
+    test_cases = []
+    for sample in soup.select("div.sample-test"):
+        inputs = sample.select("div.input pre")
+        outputs = sample.select("div.output pre")
+        test_cases += [format_test_case(pre_text(i), pre_text(o)) for i, o in zip(inputs, outputs)]
+    if test_cases:
+        return test_cases, "sample-test"
+    
+    inputs, outputs = [], []
+    for pre in soup.find_all("pre"):
+        label = pre_label(pre)
+        if SAMPLE_INPUT_LABEL.match(label):
+            inputs.append(pre_text(pre))
+        elif SAMPLE_OUTPUT_LABEL.match(label):
+            outputs.append(pre_text(pre))
+    if inputs and len(inputs) == len(outputs):
+        return [format_test_case(i, o) for i, o in zip(inputs, outputs)], "labelled-pre"
+    
+    for pre in soup.find_all("pre"):
+        test_cases += text_examples(pre.get_text(""))
+    return test_cases, "example-pre" if test_cases else ""
+
+def is_confident(result: Dict) -> bool:
+    """
+    Check that a deterministic extraction is complete enough to skip the LLM.
+    
+    Args:
+        result (Dict): The extracted {question, test_cases}
+    
+    Returns:
+        bool: True if the statement looks whole and every test case has an input and an output
+    """
+    question = result["question"]
+    if len(question) < MIN_QUESTION_LENGTH or re.search(r"Input:.*Output:", question, re.DOTALL):
+        return False
+    if not result["test_cases"]:
+        return False
+    for test_case in result["test_cases"]:
+        input_text, _, output_text = test_case.partition("\nOutput:")
+        if not input_text[len("Input:"):].strip() or not output_text.strip():
+            return False
+    return True
+
+class ProblemParser:
+    """
+    Rule-based extractor that runs before the LLM and counts how often it is enough.
+    
+    Every parse is also counted in parser_requests_total, as "parsed" when
+    the page was extracted without the LLM and "fallback" otherwise.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counters = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+    
+    def parse(self, url: str, html: str) -> Optional[Dict]:
+        """
+        Extract the problem and its test cases from a page without the LLM.
+        
+        Args:
+            url (str): The page URL
+            html (str): The raw page
+        
+        Returns:
+            Optional[Dict]: {question, test_cases} if the confidence check passes, None otherwise
+        """
+        if not self.enabled:
+            return None
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")
+        # Before main_text, which may remove noise elements that hold the samples from the soup
+        test_cases, rule = dom_examples(soup)
+        text, _ = main_text(url, soup)
+        if not test_cases:
+            test_cases, rule = text_examples(text), "example-text"
+        result = {"question": split_question(text), "test_cases": test_cases}
+        
+        confident = is_confident(result)
+        self.count("hits" if confident else "misses")
+        parser_requests.inc(result="parsed" if confident else "fallback")
+        if not confident:
+            return None
+        print(f"Extracted {url} without the LLM ({rule}, {len(test_cases)} test cases)")
+        return result
+    
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+    
+    def stats(self) -> Dict:
+        """
+        Get the fast-path counters.
+        
+        Returns:
+            Dict: hits, misses and hit_rate (the share of pages extracted without the LLM)
+        """
+        with self._lock:
+            stats = dict(self.counters)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+problem_parser = ProblemParser(enabled=os.getenv("FAST_EXTRACT", "1") != "0")
@@ -0,0 +1,303 @@
+# Global rate limiter and priority scheduler for LLM calls
+# Token buckets for requests/min and tokens/min, a priority queue of waiting
+# callers and an adaptive concurrency limit that backs off on 429s.
+import os
+import time
+import heapq
+import sqlite3
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Priority levels: lower values are served first
+INTERACTIVE = 0
+BATCH = 10
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+def current_priority() -> int:
+    """
+    Get the priority of LLM calls made from the current context.
+    
+    Returns:
+        int: The priority level
+    """
+    return _priority.get()
+
+@contextmanager
+def priority(level: int):
+    """
+    Run LLM calls in the block at the given priority.
+    
+    Args:
+        level (int): The priority level (INTERACTIVE, BATCH or any int)
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class LocalBuckets:
+    """
+    Request and token buckets shared by the threads of one process.
+    
+    A rate of 0 disables the corresponding bucket.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.rates = {"requests": requests_per_minute / 60.0, "tokens": tokens_per_minute / 60.0}
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        now = time.monotonic()
+        self.state = {name: (self.capacity[name], now) for name in self.rates}
+        self._lock = threading.Lock()
+    
+    def _levels(self, state: Dict, now: float) -> Dict[str, float]:
+        return {
+            name: min(self.capacity[name], level + (now - updated) * self.rates[name])
+            for name, (level, updated) in state.items()
+        }
+    
+    def _take(self, levels: Dict[str, float], amounts: Dict[str, float]) -> float:
+        """Return 0 and deduct the amounts if they fit, otherwise the seconds to wait."""
+        wait = 0.0
+        for name, amount in amounts.items():
+            if self.rates[name] <= 0:
+                continue
+            amount = min(amount, self.capacity[name])
+            if levels[name] < amount:
+                wait = max(wait, (amount - levels[name]) / self.rates[name])
+        if wait == 0:
+            for name, amount in amounts.items():
+                if self.rates[name] > 0:
+                    levels[name] -= min(amount, self.capacity[name])
+        return wait
+    
+    def try_take(self, requests: float, tokens: float) -> float:
+        """
+        Take capacity for one call from both buckets.
+        
+        Args:
+            requests (float): Number of requests
+            tokens (float): Estimated number of tokens
+            
+        Returns:
+            float: 0 if the capacity was taken, otherwise seconds until it is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            levels = self._levels(self.state, now)
+            wait = self._take(levels, {"requests": requests, "tokens": tokens})
+            if wait == 0:
+                self.state = {name: (level, now) for name, level in levels.items()}
+            return wait
+    
+    def adjust_tokens(self, delta: float) -> None:
+        """
+        Return (positive) or charge (negative) tokens once the real usage is known.
+        
+        Args:
+            delta (float): Reserved tokens minus tokens actually used
+        """
+        with self._lock:
+            level, updated = self.state["tokens"]
+            self.state["tokens"] = (min(self.capacity["tokens"], level + delta), updated)
+
+class SQLiteBuckets(LocalBuckets):
+    """
+    Request and token buckets shared by every process using the same SQLite file.
+    
+    The bucket levels live in the database and are updated inside an
+    immediate transaction, which acts as a cross-process lock.
+    """
+    
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, db_path: str):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+    
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def _load(self, now: float) -> Dict:
+        rows = dict(
+            (name, (level, updated))
+            for name, level, updated in self._conn.execute("SELECT name, level, updated_at FROM rate_buckets")
+        )
+        return {name: rows.get(name, (self.capacity[name], now)) for name in self.rates}
+    
+    def _save(self, levels: Dict[str, float], now: float) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO rate_buckets (name, level, updated_at) VALUES (?, ?, ?)",
+            [(name, level, now) for name, level in levels.items()]
+        )
+    
+    def try_take(self, requests: float, tokens: float) -> float:
+        with self._transaction():
+            # Wall-clock time, since the state is shared between processes
+            now = time.time()
+            levels = self._levels(self._load(now), now)
+            wait = self._take(levels, {"requests": requests, "tokens": tokens})
+            if wait == 0:
+                self._save(levels, now)
+            return wait
+    
+    def adjust_tokens(self, delta: float) -> None:
+        with self._transaction():
+            now = time.time()
+            levels = self._levels(self._load(now), now)
+            levels["tokens"] = min(self.capacity["tokens"], levels["tokens"] + delta)
+            self._save(levels, now)
+
+class RateLimiter:
+    """
+    Admission control for LLM calls.
+    
+    Callers wait in a priority queue until the request/token buckets have
+    capacity and the number of calls in flight is under the concurrency
+    limit. The limit is halved on every 429 and grows back by one call per
+    limit's worth of successful calls.
+    """
+    
+    def __init__(self, buckets: LocalBuckets, max_concurrency: int):
+        self.buckets = buckets
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.counters = {"acquired": 0, "rate_limited": 0, "waited_seconds": 0.0}
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        # Set while the head of the queue is taking from the buckets, outside the condition
+        self._taking = False
+    
+    def acquire(self, tokens: float = 0, priority_level: int = None) -> None:
+        """
+        Block until the caller may start an LLM call.
+        
+        Args:
+            tokens (float): Estimated number of tokens for the call
+            priority_level (int): Priority of the caller (defaults to the context priority)
+        """
+        if priority_level is None:
+            priority_level = current_priority()
+        start = time.monotonic()
+        entry = (priority_level, next(self._sequence))
+        
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == entry and not self._taking and self.in_flight < int(self.concurrency_limit):
+                        wait = self._try_take(tokens)
+                        if wait == 0:
+                            break
+                        timeout = wait
+                    self._condition.wait(timeout)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                # The next waiter may be able to go now
+                self._condition.notify_all()
+            
+            self.in_flight += 1
+            self.counters["acquired"] += 1
+            self.counters["waited_seconds"] += time.monotonic() - start
+    
+    def _try_take(self, tokens: float) -> float:
+        """
+        Take one request and the tokens from the buckets with the condition released.
+        
+        SQLiteBuckets may wait for another process's transaction, which must not
+        block release() and stats() in this one. Must be called with the condition
+        held; _taking keeps the other waiters from taking meanwhile.
+        
+        Args:
+            tokens (float): Estimated number of tokens for the call
+        
+        Returns:
+            float: Seconds to wait before retrying, 0 if taken
+        """
+        self._taking = True
+        self._condition.release()
+        try:
+            return self.buckets.try_take(1, tokens)
+        finally:
+            self._condition.acquire()
+            self._taking = False
+            self._condition.notify_all()
+    
+    def release(self, rate_limited: bool = False, tokens_reserved: float = 0, tokens_used: Optional[float] = None) -> None:
+        """
+        Finish an LLM call started with acquire.
+        
+        Args:
+            rate_limited (bool): True if the provider answered with a 429
+            tokens_reserved (float): Tokens passed to acquire
+            tokens_used (Optional[float]): Tokens the call actually used, if known
+        """
+        if tokens_used is not None and tokens_used != tokens_reserved:
+            self.buckets.adjust_tokens(tokens_reserved - tokens_used)
+        
+        with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.counters["rate_limited"] += 1
+                self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+            else:
+                self.concurrency_limit = min(
+                    float(self.max_concurrency), self.concurrency_limit + 1.0 / self.concurrency_limit
+                )
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict:
+        """
+        Get the limiter state and counters.
+        
+        Returns:
+            Dict: In-flight calls, current concurrency limit, queue length and counters
+        """
+        with self._condition:
+            return dict(
+                self.counters,
+                in_flight=self.in_flight,
+                concurrency_limit=int(self.concurrency_limit),
+                queued=len(self._waiters),
+            )
+
+def build_rate_limiter() -> RateLimiter:
+    """
+    Build the process-wide limiter from the environment.
+    
+    Set LLM_RATE_LIMIT_DB to share the buckets between processes.
+    
+    Returns:
+        RateLimiter: The configured limiter
+    """
+    requests_per_minute = float(os.getenv("LLM_RPM", "30"))
+    tokens_per_minute = float(os.getenv("LLM_TPM", "0"))
+    db_path = os.getenv("LLM_RATE_LIMIT_DB")
+    if db_path:
+        buckets = SQLiteBuckets(requests_per_minute, tokens_per_minute, os.path.expanduser(db_path))
+    else:
+        buckets = LocalBuckets(requests_per_minute, tokens_per_minute)
+    return RateLimiter(buckets, max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+# Shared limiter used by the LLM client layer
+rate_limiter = build_rate_limiter()
@@ -0,0 +1,164 @@
+# Content-addressed cache for rendered Manim scenes
+# key: hash(scene code, quality, fps, manim version) -> cached mp4
+import os
+import re
+import hashlib
+import shutil
+import tempfile
+import threading
+from typing import Optional
+from importlib import metadata
+
+# Frame rate used by each Manim quality flag
+QUALITY_FPS = {"l": 15, "m": 30, "h": 60, "p": 60, "k": 60}
+
+def manim_version() -> str:
+    """
+    Get the installed Manim version, part of every cache key.
+    
+    Returns:
+        str: The Manim version, or "unknown" if Manim is not installed
+    """
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+class RenderCache:
+    """
+    Persistent cache of rendered scene videos, evicted by LRU under a size cap.
+    
+    Entries are plain files named after their key. Reads refresh the file's
+    modification time, which is the LRU order used by eviction. Writes go
+    through a temporary file and an atomic rename, so concurrent renders of
+    the same scene never expose a partial video.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def key(self, scene_code: str, scene_name: str, quality: str, fps: int = None) -> str:
+        """
+        Build the cache key for a scene and its render settings.
+        
+        The scene's class name is left out of the key, so the same scene
+        rendered as a different step (e.g. a shared template) is a hit.
+        
+        Args:
+            scene_code (str): Manim scene code
+            scene_name (str): Name of the Scene class to render
+            quality (str): Manim quality flag
+            fps (int): Frame rate (defaults to the frame rate of the quality flag)
+            
+        Returns:
+            str: Hex digest identifying the rendered video
+        """
+        if fps is None:
+            fps = QUALITY_FPS.get(quality, 0)
+        scene_code = re.sub(rf"\b{re.escape(scene_name)}\b", "{scene}", scene_code)
+        digest = hashlib.sha256()
+        for part in (scene_code, quality, str(fps), manim_version()):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a rendered video.
+        
+        Args:
+            key (str): The cache key
+            
+        Returns:
+            Optional[str]: Path to the cached video, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            # Refresh the LRU position
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+    
+    def put(self, key: str, video_path: str) -> Optional[str]:
+        """
+        Store a rendered video and evict old entries if the cache is over its size cap.
+        
+        Args:
+            key (str): The cache key
+            video_path (str): Path to the rendered video
+            
+        Returns:
+            Optional[str]: Path to the cached video, or None if caching is disabled or failed
+        """
+        if not self.enabled:
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(video_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Error storing rendered scene in cache: {str(e)}")
+            return None
+        self.evict()
+        return self._path(key)
+    
+    def evict(self) -> int:
+        """
+        Remove least recently used videos until the cache fits in max_bytes.
+        
+        Returns:
+            int: Number of evicted videos
+        """
+        entries = []
+        total = 0
+        with self._lock:
+            try:
+                names = os.listdir(self.cache_dir)
+            except OSError:
+                return 0
+            for name in names:
+                if not name.endswith(".mp4"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            return evicted
+
+# Shared cache used by the video execution node
+render_cache = RenderCache(
+    cache_dir=os.path.expanduser(os.getenv("RENDER_CACHE_DIR", "~/.cache/langgraph-workflow/renders")),
+    max_bytes=int(os.getenv("RENDER_CACHE_MAX_MB", "2048")) * 1024 * 1024,
+    enabled=os.getenv("RENDER_CACHE", "1") != "0",
+)
@@ -0,0 +1,297 @@
+# Pool of long-lived renderer processes with Manim already imported
+# scene file -> idle worker (over a Pipe) -> rendered video path; workers are recycled after N jobs or on memory growth
+import os
+import queue
+import atexit
+import importlib
+import threading
+import multiprocessing
+from typing import Callable, Dict, List, Optional
+
+# Render scenes in the warm pool instead of spawning a Manim process per scene
+render_pool_enabled = os.getenv("RENDER_POOL", "0") != "0"
+# Number of worker processes (defaults to RENDER_WORKERS or the CPU count)
+render_pool_size = int(os.getenv("RENDER_POOL_SIZE", os.getenv("RENDER_WORKERS", "0"))) or os.cpu_count() or 1
+# Renderer called by the workers, as "module:function"
+render_pool_renderer = os.getenv("RENDER_POOL_RENDERER", "rendererPool:manim_render")
+# Modules imported once when a worker starts, before its first job
+render_pool_preload = [name for name in os.getenv("RENDER_POOL_PRELOAD", "manim").split(",") if name]
+# A worker is replaced after this many jobs
+render_pool_max_jobs = int(os.getenv("RENDER_POOL_MAX_JOBS", "50"))
+# A worker is replaced once its resident memory grew this much since it started, in MB
+render_pool_max_rss_growth_mb = int(os.getenv("RENDER_POOL_MAX_RSS_GROWTH_MB", "512"))
+# Wall-clock limit for one render, in seconds
+render_pool_timeout = float(os.getenv("RENDER_POOL_TIMEOUT", "600"))
+
+# Manim quality names of the quality flags used on the command line
+MANIM_QUALITIES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+def manim_render(scene_file: str, scene_name: str, media_dir: str, quality: str) -> str:
+    """
+    Render one scene with the Manim library already loaded in this process.
+    
+    The scene file is loaded as a fresh module for every job, and the
+    configuration is scoped to the job with tempconfig, so nothing leaks
+    from one scene to the next.
+    
+    Args:
+        scene_file (str): Path to the file containing the scene
+        scene_name (str): Name of the Scene class to render
+        media_dir (str): Media directory used by this render only
+        quality (str): Manim quality flag (l, m, h, p, k)
+    
+    Returns:
+        str: Path to the rendered video file
+    """
+    import importlib.util
+    from manim import tempconfig
+    from assetCache import asset_cache
+    
+    module_name = f"scene_{os.getpid()}_{abs(hash((scene_file, media_dir)))}"
+    spec = importlib.util.spec_from_file_location(module_name, scene_file)
+    module = importlib.util.module_from_spec(spec)
+    settings = {"media_dir": media_dir, "quality": MANIM_QUALITIES.get(quality, "low_quality"), "progress_bar": "none"}
+    # Tex/Text SVGs are read from and written to the shared asset cache
+    settings.update(asset_cache.directories())
+    with tempconfig(settings):
+        spec.loader.exec_module(module)
+        scene = getattr(module, scene_name)()
+        scene.render()
+        return str(scene.renderer.file_writer.movie_file_path)
+
+def resolve_renderer(spec: str) -> Callable:
+    """
+    Import a renderer given as "module:function".
+    
+    Args:
+        spec (str): The renderer
+    
+    Returns:
+        Callable: The render function, called as (scene_file, scene_name, media_dir, quality)
+    """
+    module_name, _, function_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def rss_mb() -> float:
+    """Get the resident memory of the current process in MB (peak memory where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+def worker_main(conn, renderer: str, preload: List[str], max_jobs: int, max_rss_growth_mb: int) -> None:
+    """
+    Entry point of a worker process: render jobs from the pipe until recycled.
+    
+    Every reply carries "recycle": True once the worker has done max_jobs
+    jobs or grown past max_rss_growth_mb, after which the worker exits.
+    
+    Args:
+        conn: The worker's end of the pipe
+        renderer (str): The renderer, as "module:function"
+        preload (List[str]): Modules to import before the first job
+        max_jobs (int): Jobs before the worker is replaced
+        max_rss_growth_mb (int): Memory growth before the worker is replaced
+    """
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"Renderer worker could not preload {module}: {str(e)}")
+    render = resolve_renderer(renderer)
+    baseline = rss_mb()
+    
+    jobs = 0
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        try:
+            reply = {"video_path": render(job["scene_file"], job["scene_name"], job["media_dir"], job["quality"]), "error": ""}
+        except BaseException as e:
+            reply = {"video_path": "", "error": f"{type(e).__name__}: {str(e)}"}
+        jobs += 1
+        reply["recycle"] = jobs >= max_jobs or rss_mb() - baseline > max_rss_growth_mb
+        conn.send(reply)
+        if reply["recycle"]:
+            break
+    conn.close()
+
+class RendererPool:
+    """
+    Long-lived renderer processes that pay the Manim import once.
+    
+    Workers are started on first use (or by start()) from a clean
+    interpreter, preload the renderer's modules, and then take scenes
+    over a pipe one at a time. A worker that crashes or times out is
+    killed and replaced, and workers that reach max_jobs or grow past
+    max_rss_growth_mb exit on their own and are replaced on the next job.
+    """
+    
+    def __init__(self, size: int, renderer: str, preload: Optional[List[str]] = None, max_jobs: int = 50,
+                 max_rss_growth_mb: int = 512, timeout: float = 600.0):
+        self.size = max(1, size)
+        self.renderer = renderer
+        self.preload = list(preload or [])
+        self.max_jobs = max_jobs
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.timeout = timeout
+        self.counters = {"jobs": 0, "errors": 0, "started": 0, "recycled": 0, "crashed": 0}
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._workers = 0
+        self._lock = threading.Lock()
+    
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(child_conn, self.renderer, self.preload, self.max_jobs, self.max_rss_growth_mb),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            self.counters["started"] += 1
+        return process, parent_conn
+    
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                grow = self._workers < self.size
+                if grow:
+                    self._workers += 1
+            if grow:
+                try:
+                    return self._spawn()
+                except Exception:
+                    with self._lock:
+                        self._workers -= 1
+                    raise
+            # Poll, since a retired worker frees a slot without returning to the idle queue
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+    
+    def _retire(self, worker, counter: str) -> None:
+        process, conn = worker
+        conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+        with self._lock:
+            self._workers -= 1
+            self.counters[counter] += 1
+    
+    def start(self) -> None:
+        """Start every worker now, so the first scenes do not wait for Manim to import."""
+        workers = []
+        while len(workers) < self.size:
+            with self._lock:
+                if self._workers >= self.size:
+                    break
+                self._workers += 1
+            workers.append(self._spawn())
+        for worker in workers:
+            self._idle.put(worker)
+    
+    def render(self, scene_file: str, scene_name: str, media_dir: str, quality: str) -> str:
+        """
+        Render one scene in an idle worker.
+        
+        Args:
+            scene_file (str): Path to the file containing the scene
+            scene_name (str): Name of the Scene class to render
+            media_dir (str): Media directory used by this render only
+            quality (str): Manim quality flag (l, m, h, p, k)
+        
+        Returns:
+            str: Path to the rendered video file
+        
+        Raises:
+            Exception: If the render fails, times out or its worker dies
+        """
+        worker = self._acquire()
+        process, conn = worker
+        with self._lock:
+            self.counters["jobs"] += 1
+        try:
+            conn.send({"scene_file": scene_file, "scene_name": scene_name, "media_dir": media_dir, "quality": quality})
+            if not conn.poll(self.timeout):
+                self._retire(worker, "crashed")
+                raise Exception(f"Rendering timed out after {self.timeout}s")
+            reply = conn.recv()
+        except (EOFError, OSError):
+            self._retire(worker, "crashed")
+            raise Exception(f"Renderer worker exited with code {process.exitcode}")
+        
+        if reply["recycle"]:
+            self._retire(worker, "recycled")
+        else:
+            self._idle.put(worker)
+        if reply["error"]:
+            with self._lock:
+                self.counters["errors"] += 1
+            raise Exception(f"Manim rendering failed: {reply['error']}")
+        return reply["video_path"]
+    
+    def close(self) -> None:
+        """Stop the idle workers."""
+        while True:
+            try:
+                process, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+            conn.close()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+            with self._lock:
+                self._workers -= 1
+    
+    def stats(self) -> Dict:
+        """
+        Get the pool counters.
+        
+        Returns:
+            Dict: jobs, errors, started, recycled and crashed counts, plus the live workers
+        """
+        with self._lock:
+            return dict(self.counters, workers=self._workers)
+
+# Shared pool used by every scene render when RENDER_POOL is set
+renderer_pool = RendererPool(
+    size=render_pool_size,
+    renderer=render_pool_renderer,
+    preload=render_pool_preload,
+    max_jobs=render_pool_max_jobs,
+    max_rss_growth_mb=render_pool_max_rss_growth_mb,
+    timeout=render_pool_timeout,
+)
+atexit.register(renderer_pool.close)
@@ -1,49 +1,33 @@
 # input: steps: [str]
 # output: scenes: [[scene1: code], [scene2: code], [scene3: code], ....]
-from typing import List
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Tuple
 import os
-from dotenv import load_dotenv
 import re
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
-from typing import List
+import queue
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+import config
+from llmClient import invoke_llm
+from sceneValidator import check_scene, validate_scene
+from sceneTemplates import template_scene
 
-# Load environment variables
-load_dotenv()
+# LangChain is imported on first use, so importing this module stays fast
+if TYPE_CHECKING:
+    from langchain.output_parsers import StructuredOutputParser
+    from langchain.prompts import PromptTemplate
+    from langchain_core.messages import HumanMessage
 
-# Configure the Groq API
-groq_api_key = os.getenv("GROQ_API_KEY")
+# Maximum number of scene prompts in flight at once
+scene_concurrency = int(os.getenv("SCENE_CONCURRENCY", "4"))
 
-def generate_scenes(steps: List[str]) -> List[str]:
-    """
-    Generate Manim animation scenes for each explanation step.
-    
-    Args:
-        steps (List[str]): List of explanation steps
-        
-    Returns:
-        List[str]: List of Manim scene code for each step
-    """
-    try:
-        # Define the response schema for structured output
-        response_schemas = [
-            ResponseSchema(name="scene_code", description="Python code for a Manim animation scene", type="str")
-        ]
-        output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-        format_instructions = output_parser.get_format_instructions()
-        
-        # Create a ChatGroq instance
-        chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name="mistral-saba-24B")
-        
-        # Generate a scene for each step
-        scenes = []
-        
-        for i, step in enumerate(steps):
-            # Prompt for the model to generate a Manim scene
-            prompt = PromptTemplate(
-                template="""
+# Number of extra attempts (with llmClient's backoff) for a single step whose LLM call fails
+scene_max_retries = int(os.getenv("SCENE_MAX_RETRIES", "2"))
+
+# Number of LLM repair attempts for a scene that fails validation
+scene_repair_retries = int(os.getenv("SCENE_REPAIR_RETRIES", "2"))
+
+SCENE_PROMPT_TEMPLATE = """
                 Create a Manim animation scene that visualizes the following explanation step:
                 
                 "{step}"
@@ -58,40 +42,258 @@ def generate_scenes(steps: List[str]) -> List[str]:
                 The class should be named Step{step_number}Scene and should extend Scene from manim.
                 
                 Use manim-dsa for data structure visualizations if appropriate.
+                {benchmark}
                 Make sure the code is complete, properly indented, and ready to be executed.
                 
                 Return the information in the following format:
                 {format_instructions}
-                """,
-                input_variables=["step"],
-                partial_variables={"format_instructions": format_instructions, "step_number": i+1}
-            )
-            
-            # Format the prompt with the step
-            formatted_prompt = prompt.format(step=step)
-            
-            # Generate the response
-            messages = [HumanMessage(content=formatted_prompt)]
-            response = chat.invoke(messages)
-            content = response.content
-            
-            # Parse the response
-            try:
-                structured_output = output_parser.parse(content)
-                scene_code = structured_output["scene_code"]
-            except Exception as e:
-                print(f"Error parsing structured output for scene {i+1}: {str(e)}")
-                # Fallback to manual extraction if parsing fails
-                code_match = re.search(r'```(?:python)?\s*([\s\S]*?)\s*```', content)
-                if code_match:
-                    scene_code = code_match.group(1)
-                else:
-                    scene_code = content
+                """
+
+SCENE_REPAIR_TEMPLATE = """
+                The following Manim scene code for step {step_number} cannot be rendered:
+                
+                ```python
+                {scene_code}
+                ```
+                
+                Problems found:
+                {problems}
                 
-                scene_code = scene_code.strip()
-            
-            # Add the scene to the list
-            scenes.append(scene_code)
+                Fix these problems and return the complete corrected code, with proper imports.
+                The class must be named Step{step_number}Scene and extend Scene from manim.
+                
+                Return the information in the following format:
+                {format_instructions}
+                """
+
+def fallback_scene(step_number: int) -> str:
+    """
+    Build a placeholder scene for a step whose generation failed.
+    
+    Args:
+        step_number (int): The 1-based step number
+        
+    Returns:
+        str: Manim scene code with the expected Step{n}Scene class name
+    """
+    return f"""
+from manim import *
+
+class Step{step_number}Scene(Scene):
+    def construct(self):
+        text = Text("Error generating animation for step {step_number}")
+        self.play(Write(text))
+        self.wait(2)
+        """
+
+def generate_scene(prompt: "PromptTemplate", output_parser: "StructuredOutputParser", step: str, step_number: int, max_retries: int = None) -> str:
+    """
+    Generate the Manim scene code for a single explanation step.
+    
+    Only this step is retried when the LLM call fails, so one flaky request
+    does not cost the scenes that already succeeded. A scene that fails
+    validation is sent back to the LLM with the problems found, at most
+    SCENE_REPAIR_RETRIES times, and replaced by a placeholder if it still fails.
+    
+    Args:
+        prompt (PromptTemplate): The shared scene prompt
+        output_parser (StructuredOutputParser): Parser for the scene_code field
+        step (str): The explanation step to visualize
+        step_number (int): The 1-based step number
+        max_retries (int): Extra attempts after the first failure
+        
+    Returns:
+        str: Manim scene code for the step
+    """
+    from langchain_core.messages import HumanMessage
+    
+    if max_retries is None:
+        max_retries = scene_max_retries
+    
+    # Only replies that pass the static checks are cached, so a bad scene is not replayed to later attempts
+    def usable(content: str) -> bool:
+        return not validate_scene(parse_scene_code(content, output_parser, step_number, log=False), step_number)
+    
+    # Format the prompt with the step
+    formatted_prompt = prompt.format(step=step, step_number=step_number)
+    content = invoke_with_retries([HumanMessage(content=formatted_prompt)], step_number, max_retries, usable)
+    if content is None:
+        return fallback_scene(step_number)
+    scene_code = parse_scene_code(content, output_parser, step_number)
+    
+    # Send the scene back for repair until it validates, so one bad scene
+    # is fixed in milliseconds instead of failing its render
+    for attempt in range(scene_repair_retries + 1):
+        problems = check_scene(scene_code, step_number)
+        if not problems:
+            return scene_code
+        print(f"Scene {step_number} failed validation (attempt {attempt + 1}): {'; '.join(problems)}")
+        if attempt == scene_repair_retries:
+            break
+        repair_prompt = SCENE_REPAIR_TEMPLATE.format(
+            step_number=step_number,
+            scene_code=scene_code,
+            problems="\n".join(f"- {problem}" for problem in problems),
+            format_instructions=output_parser.get_format_instructions()
+        )
+        content = invoke_with_retries([HumanMessage(content=repair_prompt)], step_number, max_retries, usable)
+        if content is None:
+            break
+        scene_code = parse_scene_code(content, output_parser, step_number)
+    
+    return fallback_scene(step_number)
+
+def invoke_with_retries(messages: List["HumanMessage"], step_number: int, max_retries: int, validate: Callable = None) -> str:
+    """
+    Call the LLM for one scene, giving up on only this scene on failure.
+    
+    The retries with backoff are llmClient's, limited to max_retries.
+    
+    Args:
+        messages (List[HumanMessage]): The prompt
+        step_number (int): The 1-based step number, for logging
+        max_retries (int): Extra attempts after the first failure
+        validate (Callable): Cache validator for the reply (see llmClient.invoke_llm)
+        
+    Returns:
+        str: The response, or None if every attempt failed
+    """
+    try:
+        return invoke_llm(messages, validate=validate, max_retries=max_retries)
+    except Exception as e:
+        print(f"Error generating scene {step_number}: {str(e)}")
+        return None
+
+def parse_scene_code(content: str, output_parser: "StructuredOutputParser", step_number: int, log: bool = True) -> str:
+    """
+    Extract the scene code from an LLM response.
+    
+    Args:
+        content (str): The response
+        output_parser (StructuredOutputParser): Parser for the scene_code field
+        step_number (int): The 1-based step number, for logging
+        log (bool): Report a response that needs the fallback extraction
+        
+    Returns:
+        str: The scene code
+    """
+    try:
+        structured_output = output_parser.parse(content)
+        return structured_output["scene_code"]
+    except Exception as e:
+        if log:
+            print(f"Error parsing structured output for scene {step_number}: {str(e)}")
+        # Fallback to manual extraction if parsing fails
+        code_match = re.search(r'```(?:python)?\s*([\s\S]*?)\s*```', content)
+        if code_match:
+            scene_code = code_match.group(1)
+        else:
+            scene_code = content
+        
+        return scene_code.strip()
+
+def iter_scenes(steps: Iterable[str], max_concurrency: int = None, benchmark: str = "", problem: str = "") -> Iterator[Tuple[int, str]]:
+    """
+    Generate Manim scenes concurrently and yield each one as soon as it is ready.
+    
+    Steps that match a scene template are served from the template library;
+    the others are generated by the LLM. Steps may come from a stream such as
+    stepsGenrationNode.iter_steps: each step is submitted as soon as the
+    iterator yields it, so scene generation starts while the remaining steps
+    are still being written. Scenes are yielded in completion order, so a
+    consumer such as the renderer can start on a scene while the others are
+    still being generated.
+    
+    Args:
+        steps (Iterable[str]): Explanation steps, as a list or as they are generated
+        max_concurrency (int): Maximum number of concurrent LLM calls (defaults to SCENE_CONCURRENCY)
+        benchmark (str): Measured complexity and timings of the code, shown by scenes about performance
+        problem (str): The problem statement, if known, where templates find example data the step does not quote
+        
+    Yields:
+        Tuple[int, str]: The 0-based step index and the scene code for that step
+    """
+    if max_concurrency is None:
+        max_concurrency = scene_concurrency
+    
+    from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+    from langchain.prompts import PromptTemplate
+    
+    # Define the response schema for structured output
+    response_schemas = [
+        ResponseSchema(name="scene_code", description="Python code for a Manim animation scene", type="str")
+    ]
+    output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+    format_instructions = output_parser.get_format_instructions()
+    
+    # The prompt is the same for every step, build it once
+    prompt = PromptTemplate(
+        template=SCENE_PROMPT_TEMPLATE,
+        input_variables=["step", "step_number"],
+        partial_variables={
+            "format_instructions": format_instructions,
+            "benchmark": f"If the step discusses performance, show these measured numbers: {benchmark}" if benchmark else ""
+        }
+    )
+    
+    # Scenes (or futures of scenes) as they become ready, then (None, number of steps or error)
+    ready = queue.Queue()
+    
+    def submit_steps(executor: ThreadPoolExecutor) -> None:
+        count = 0
+        try:
+            for i, step in enumerate(steps):
+                count += 1
+                # Steps that match a template need no LLM call and are ready right away
+                scene_code = template_scene(step, i + 1, problem)
+                if scene_code is not None:
+                    ready.put((i, scene_code))
+                    continue
+                # Copy the context so the LLM call priority carries over to the worker threads
+                future = executor.submit(contextvars.copy_context().run, generate_scene, prompt, output_parser, step, i + 1)
+                future.add_done_callback(lambda done, i=i: ready.put((i, done)))
+        except Exception as e:
+            ready.put((None, e))
+        else:
+            ready.put((None, count))
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        # Steps are read on their own thread, so scenes are yielded while a streamed step is still being written
+        feeder = threading.Thread(target=contextvars.copy_context().run, args=(submit_steps, executor), daemon=True)
+        feeder.start()
+        total, done = None, 0
+        while total is None or done < total:
+            i, item = ready.get()
+            if i is None:
+                if isinstance(item, Exception):
+                    raise item
+                total = item
+                continue
+            done += 1
+            yield i, item.result() if isinstance(item, Future) else item
+        feeder.join()
+
+def generate_scenes(steps: List[str], max_concurrency: int = None, benchmark: str = "", problem: str = "") -> List[str]:
+    """
+    Generate Manim animation scenes for each explanation step.
+    
+    The per-step prompts are issued concurrently, at most max_concurrency at a
+    time, and the scenes are returned in the order of the steps.
+    
+    Args:
+        steps (List[str]): List of explanation steps
+        max_concurrency (int): Maximum number of concurrent LLM calls (defaults to SCENE_CONCURRENCY)
+        benchmark (str): Measured complexity and timings of the code, shown by scenes about performance
+        problem (str): The problem statement, if known, where templates find example data the step does not quote
+        
+    Returns:
+        List[str]: List of Manim scene code for each step
+    """
+    try:
+        # Collect the scenes back into step order
+        scenes = [None] * len(steps)
+        for i, scene_code in iter_scenes(steps, max_concurrency, benchmark, problem):
+            scenes[i] = scene_code
         
         return scenes
     
@@ -0,0 +1,381 @@
+# Parametrized Manim scene templates for the visuals most steps need
+# step text -> (template, parameters) -> known-good scene code, without an LLM call
+import os
+import re
+import tempfile
+from string import Template
+from typing import Dict, List, Optional, Tuple
+
+# Use templates for matching steps instead of generating the scene with the LLM
+scene_templates_enabled = os.getenv("SCENE_TEMPLATES", "1") != "0"
+
+# Longest array drawn by a template, so every scene fits the frame
+MAX_ARRAY_LENGTH = 8
+
+# Parameters the templates are prewarmed with
+PREWARM_PARAMS = {
+    "array_pointers": {"values": [1, 3, 4, 6, 8, 11], "target": 14},
+    "complement_lookup": {"values": [2, 7, 11, 15], "target": 9},
+    "nested_loops": {"values": [3, 1, 4, 1]},
+    "complexity_chart": {"complexities": ["O(n)", "O(n^2)"]},
+}
+
+ARRAY_POINTERS = Template('''from manim import *
+
+class $scene_name(Scene):
+    def construct(self):
+        values = $values
+        target = $target
+        title = Text(f"Two pointers: pair sum {target}", font_size=36).to_edge(UP)
+        cells = VGroup(*[Square(side_length=0.9) for _ in values]).arrange(RIGHT, buff=0.05)
+        labels = VGroup(*[Text(str(v), font_size=28).move_to(cell) for v, cell in zip(values, cells)])
+        indices = VGroup(*[Text(str(i), font_size=20, color=GRAY).next_to(cell, UP, buff=0.15) for i, cell in enumerate(cells)])
+        self.play(Write(title))
+        self.play(Create(cells), Write(labels), FadeIn(indices))
+        
+        left = Arrow(DOWN, UP, color=BLUE).next_to(cells[0], DOWN)
+        right = Arrow(DOWN, UP, color=ORANGE).next_to(cells[-1], DOWN)
+        left_label = Text("left", font_size=24, color=BLUE).next_to(left, DOWN)
+        right_label = Text("right", font_size=24, color=ORANGE).next_to(right, DOWN)
+        self.play(GrowArrow(left), GrowArrow(right), Write(left_label), Write(right_label))
+        
+        # The sorted input lets each comparison move one pointer: a small sum needs a bigger left value
+        i, j = 0, len(values) - 1
+        total = Text("", font_size=28).to_edge(DOWN)
+        while i < j:
+            self.play(Indicate(cells[i], color=BLUE), Indicate(cells[j], color=ORANGE))
+            pair_sum = values[i] + values[j]
+            relation = "=" if pair_sum == target else "<" if pair_sum < target else ">"
+            self.play(Transform(total, Text(f"{values[i]} + {values[j]} = {pair_sum} {relation} {target}", font_size=28).to_edge(DOWN)))
+            if pair_sum == target:
+                self.play(Circumscribe(VGroup(cells[i], cells[j]), color=GREEN))
+                break
+            if pair_sum < target:
+                i += 1
+                self.play(VGroup(left, left_label).animate.next_to(cells[i], DOWN))
+            else:
+                j -= 1
+                self.play(VGroup(right, right_label).animate.next_to(cells[j], DOWN))
+        else:
+            self.play(Transform(total, Text(f"no pair sums to {target}", font_size=28, color=RED).to_edge(DOWN)))
+        self.wait(1)
+''')
+
+COMPLEMENT_LOOKUP = Template('''from manim import *
+
+class $scene_name(Scene):
+    def construct(self):
+        values = $values
+        target = $target
+        title = Text("Hash map: complement lookup", font_size=36).to_edge(UP)
+        cells = VGroup(*[Square(side_length=0.8) for _ in values]).arrange(RIGHT, buff=0.05).shift(UP * 1.5)
+        labels = VGroup(*[Text(str(v), font_size=26).move_to(cell) for v, cell in zip(values, cells)])
+        goal = Text(f"target = {target}", font_size=28).next_to(cells, DOWN, buff=0.4)
+        table_title = Text("seen: value -> index", font_size=24, color=GRAY).shift(DOWN * 0.6 + LEFT * 3)
+        self.play(Write(title))
+        self.play(Create(cells), Write(labels), Write(goal), FadeIn(table_title))
+        
+        seen = {}
+        rows = VGroup()
+        for i, value in enumerate(values):
+            self.play(cells[i].animate.set_fill(YELLOW, opacity=0.4), run_time=0.5)
+            need = target - value
+            query = Text(f"need {need}?", font_size=26).shift(DOWN * 0.6 + RIGHT * 3)
+            self.play(FadeIn(query), run_time=0.5)
+            if need in seen:
+                found = Text(f"found: indices {seen[need]} and {i}", font_size=28, color=GREEN).to_edge(DOWN)
+                self.play(Indicate(rows[list(seen).index(need)], color=GREEN), cells[seen[need]].animate.set_fill(GREEN, opacity=0.5), cells[i].animate.set_fill(GREEN, opacity=0.5))
+                self.play(Write(found))
+                break
+            seen[value] = i
+            row = Text(f"{value} -> {i}", font_size=24)
+            row.next_to(rows if len(rows) else table_title, DOWN, aligned_edge=LEFT)
+            rows.add(row)
+            self.play(FadeOut(query), Write(row), cells[i].animate.set_fill(BLUE, opacity=0.2), run_time=0.5)
+        self.wait(1)
+''')
+
+NESTED_LOOPS = Template('''from manim import *
+
+class $scene_name(Scene):
+    def construct(self):
+        values = $values
+        n = len(values)
+        title = Text("Nested loops: every pair", font_size=36).to_edge(UP)
+        cells = VGroup(*[Square(side_length=0.9) for _ in values]).arrange(RIGHT, buff=0.05)
+        labels = VGroup(*[Text(str(v), font_size=28).move_to(cell) for v, cell in zip(values, cells)])
+        self.play(Write(title))
+        self.play(Create(cells), Write(labels))
+        
+        outer = Arrow(DOWN, UP, color=BLUE).next_to(cells[0], DOWN)
+        inner = Arrow(UP, DOWN, color=ORANGE).next_to(cells[0], UP)
+        outer_label = Text("i", font_size=24, color=BLUE).next_to(outer, DOWN)
+        inner_label = Text("j", font_size=24, color=ORANGE).next_to(inner, UP)
+        counter = Text("comparisons: 0", font_size=28).to_edge(DOWN)
+        self.play(GrowArrow(outer), GrowArrow(inner), Write(outer_label), Write(inner_label), Write(counter))
+        
+        comparisons = 0
+        shown = min(n, 3)
+        for i in range(shown):
+            self.play(VGroup(outer, outer_label).animate.next_to(cells[i], DOWN), run_time=0.4)
+            for j in range(n):
+                comparisons += 1
+                self.play(
+                    VGroup(inner, inner_label).animate.next_to(cells[j], UP),
+                    Transform(counter, Text(f"comparisons: {comparisons}", font_size=28).to_edge(DOWN)),
+                    run_time=0.25
+                )
+        total = Text(f"{n} x {n} = {n * n} comparisons: O(n^2)", font_size=30, color=RED).to_edge(DOWN)
+        self.play(Transform(counter, total))
+        self.wait(1)
+''')
+
+COMPLEXITY_CHART = Template('''from manim import *
+
+class $scene_name(Scene):
+    def construct(self):
+        complexities = $complexities
+        curves = {
+            "O(1)": lambda x: 1,
+            "O(log n)": lambda x: np.log2(x + 1),
+            "O(n)": lambda x: x,
+            "O(n log n)": lambda x: x * np.log2(x + 1),
+            "O(n^2)": lambda x: x ** 2,
+            "O(n^3)": lambda x: x ** 3,
+            "O(2^n)": lambda x: 2 ** x,
+        }
+        colors = [RED, GREEN, BLUE, ORANGE, PURPLE, TEAL, YELLOW]
+        title = Text("Time complexity", font_size=36).to_edge(UP)
+        axes = Axes(x_range=[0, 10, 1], y_range=[0, 100, 10], x_length=8, y_length=4, tips=False).shift(UP * 0.1)
+        x_label = Text("input size n", font_size=22).next_to(axes.x_axis, DOWN)
+        y_label = Text("operations", font_size=22).next_to(axes.y_axis, UP)
+        self.play(Write(title), Create(axes), Write(x_label), Write(y_label))
+        
+        for complexity, color in zip(complexities, colors):
+            f = curves[complexity]
+            graph = axes.plot(lambda x: min(f(x), 100), x_range=[0, 10], color=color)
+            label = Text(complexity, font_size=24, color=color).next_to(graph.get_end(), RIGHT, buff=0.1)
+            self.play(Create(graph), Write(label))
+        self.wait(1)
+''')
+
+TEMPLATES = {
+    "array_pointers": ARRAY_POINTERS,
+    "complement_lookup": COMPLEMENT_LOOKUP,
+    "nested_loops": NESTED_LOOPS,
+    "complexity_chart": COMPLEXITY_CHART,
+}
+
+# Keyword patterns and weights of each template, checked in this order on ties
+TEMPLATE_KEYWORDS = {
+    "nested_loops": [
+        (r"nested loops?", 2), (r"\b(every|all|each) pairs?\b", 2), (r"brute[- ]force", 1),
+        (r"\b(inner|outer) loop", 1), (r"O\(n(\^2|²|\*n| \* n)\)", 1),
+    ],
+    "complement_lookup": [
+        (r"hash ?(map|table)|dictionary|\bdict\b", 2), (r"complement", 1), (r"\bseen\b", 1), (r"look ?up", 1),
+        (r"\btarget\b", 1),
+    ],
+    "array_pointers": [
+        (r"two[- ]pointers?|\bpointers?\b", 2), (r"\b(left|right) (pointer|index|end)\b", 1), (r"\bsorted\b", 1),
+    ],
+    "complexity_chart": [
+        (r"(time|space) complexity", 1), (r"\b(compar\w+|versus|vs\.?)\b", 1), (r"\b(chart|graph|plot|grows?|growth)\b", 1),
+    ],
+}
+
+# Minimum keyword score for a step to use a template
+MATCH_THRESHOLD = 2
+
+# Minimum number of distinct patterns a step must match, so one keyword alone is never enough
+MIN_SIGNALS = 2
+
+# Spellings of the complexities the chart can draw
+COMPLEXITY_SPELLINGS = {
+    "1": "O(1)", "logn": "O(log n)", "n": "O(n)", "nlogn": "O(n log n)",
+    "n^2": "O(n^2)", "n²": "O(n^2)", "n*n": "O(n^2)", "n^3": "O(n^3)", "n³": "O(n^3)", "2^n": "O(2^n)",
+}
+
+def extract_values(text: str) -> List[int]:
+    """
+    Get the example array quoted in a step or a problem statement.
+    
+    Args:
+        text (str): The explanation step or the problem statement
+    
+    Returns:
+        List[int]: The first list of integers in the text, or [] if it quotes none
+    """
+    match = re.search(r"\[\s*(-?\d+(?:\s*,\s*-?\d+)+)\s*\]", text)
+    if not match:
+        return []
+    return [int(v) for v in match.group(1).split(",")][:MAX_ARRAY_LENGTH]
+
+def extract_target(text: str) -> Optional[int]:
+    """
+    Get the target value quoted in a step or a problem statement.
+    
+    Args:
+        text (str): The explanation step or the problem statement
+    
+    Returns:
+        Optional[int]: The target, or None if the text quotes none
+    """
+    match = re.search(r"target\s*(?:=|of|is)?\s*(-?\d+)", text)
+    return int(match.group(1)) if match else None
+
+def extract_complexities(step: str) -> List[str]:
+    """
+    Get the complexities mentioned in a step, in the order the chart draws them.
+    
+    Args:
+        step (str): The explanation step
+    
+    Returns:
+        List[str]: The distinct known complexities, slowest-growing first
+    """
+    found = []
+    for raw in re.findall(r"O\(([^)]*)\)", step):
+        complexity = COMPLEXITY_SPELLINGS.get(re.sub(r"\s|\\cdot|\\", "", raw).replace("log(n)", "logn"))
+        if complexity and complexity not in found:
+            found.append(complexity)
+    order = list(dict.fromkeys(COMPLEXITY_SPELLINGS.values()))
+    return sorted(found, key=order.index)
+
+def template_params(name: str, step: str, problem: str = "") -> Optional[Dict]:
+    """
+    Fill in the parameters of a template from the step, or failing that from the problem.
+    
+    Args:
+        name (str): The template name
+        step (str): The explanation step
+        problem (str): The problem statement, if known
+    
+    Returns:
+        Optional[Dict]: The template parameters, or None if the texts do not quote the data the template draws
+    """
+    if name == "complexity_chart":
+        complexities = extract_complexities(step)
+        return {"complexities": complexities} if len(complexities) >= 2 else None
+    values = extract_values(step) or extract_values(problem)
+    if not values:
+        return None
+    if name == "nested_loops":
+        return {"values": values}
+    # The pair-sum templates draw the search for two values adding up to the target
+    target = extract_target(step)
+    if target is None:
+        target = extract_target(problem)
+    if target is None:
+        return None
+    if name == "array_pointers":
+        # Two pointers walk a sorted array
+        values = sorted(values)
+    return {"values": values, "target": target}
+
+def match_template(step: str, problem: str = "") -> Optional[Tuple[str, Dict]]:
+    """
+    Classify a step by the visual it needs.
+    
+    A template is used only when the step matches at least MIN_SIGNALS of its
+    patterns and the step or the problem quotes the data it draws.
+    
+    Args:
+        step (str): The explanation step
+        problem (str): The problem statement, if known
+    
+    Returns:
+        Optional[Tuple[str, Dict]]: The template name and its parameters, or None to generate the scene with the LLM
+    """
+    scores = {}
+    signals = {}
+    for name, keywords in TEMPLATE_KEYWORDS.items():
+        weights = [weight for pattern, weight in keywords if re.search(pattern, step, re.IGNORECASE)]
+        scores[name] = sum(weights)
+        signals[name] = len(weights)
+    # A chart needs at least two complexities to compare
+    if len(extract_complexities(step)) >= 2:
+        scores["complexity_chart"] += 2
+        signals["complexity_chart"] += 1
+    
+    name = max(scores, key=lambda n: scores[n])
+    if scores[name] < MATCH_THRESHOLD or signals[name] < MIN_SIGNALS:
+        return None
+    params = template_params(name, step, problem)
+    if params is None:
+        return None
+    return name, params
+
+def render_template(name: str, params: Dict, step_number: int) -> str:
+    """
+    Build the scene code of a template.
+    
+    The code depends only on the template and its parameters (apart from the
+    scene class name, which the render cache ignores), so every step drawing
+    the same data shares one render.
+    
+    Args:
+        name (str): The template name
+        params (Dict): The template parameters
+        step_number (int): The 1-based step number, which names the scene class
+    
+    Returns:
+        str: Manim scene code with a Step{n}Scene class
+    """
+    values = {key: repr(value) for key, value in params.items()}
+    return TEMPLATES[name].substitute(values, scene_name=f"Step{step_number}Scene")
+
+def template_scene(step: str, step_number: int, problem: str = "") -> Optional[str]:
+    """
+    Get the template scene for a step, if one matches.
+    
+    Args:
+        step (str): The explanation step
+        step_number (int): The 1-based step number
+        problem (str): The problem statement, if known
+    
+    Returns:
+        Optional[str]: The scene code, or None if the step needs a free-form scene
+    """
+    if not scene_templates_enabled:
+        return None
+    match = match_template(step, problem)
+    if match is None:
+        return None
+    name, params = match
+    return render_template(name, params, step_number)
+
+def default_params() -> List[Tuple[str, Dict]]:
+    """
+    Get the parameters each template is prewarmed with.
+    
+    Returns:
+        List[Tuple[str, Dict]]: (template name, parameters) pairs
+    """
+    return [(name, dict(PREWARM_PARAMS[name])) for name in TEMPLATES]
+
+def prewarm_templates(param_sets: List[Tuple[str, Dict]] = None) -> List[Dict]:
+    """
+    Render templates ahead of time, which typesets their fixed labels into the asset cache.
+    
+    Steps matching a template with the same parameters are then served from the
+    render cache, at any step number.
+    
+    Args:
+        param_sets (List[Tuple[str, Dict]]): (template name, parameters) pairs (defaults to default_params())
+    
+    Returns:
+        List[Dict]: One render result per template, as returned by render_scene_job
+    """
+    from videoExecutionScript import render_scene_job
+    
+    if param_sets is None:
+        param_sets = default_params()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="prewarm_") as output_dir:
+        os.makedirs(os.path.join(output_dir, "scenes"))
+        for i, (name, params) in enumerate(param_sets):
+            result = render_scene_job(i, render_template(name, params, i + 1), output_dir)
+            print(f"Template {name}: {'cached' if result['cached'] else result['error'] or 'rendered'}")
+            results.append(dict(result, template=name))
+    return results
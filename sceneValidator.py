@@ -0,0 +1,212 @@
+# Pre-render validation of generated scene code
+# scene code -> list of problems (syntax, class name, Scene base, imports, optional dry run)
+import os
+import ast
+import sys
+import json
+import builtins
+import functools
+import tempfile
+import subprocess
+import importlib.util
+from typing import FrozenSet, List, Set
+import videoExecutionScript
+from telemetry import traced
+
+# Also construct each scene with a Manim dry run (slower, needs Manim installed)
+scene_dry_run = os.getenv("SCENE_DRY_RUN", "0") != "0"
+# Wall-clock limit for one dry run, in seconds
+scene_dry_run_timeout = float(os.getenv("SCENE_DRY_RUN_TIMEOUT", "60"))
+
+# Prints the names `from <argv[1]> import *` brings in, as a JSON list
+STAR_NAMES_SCRIPT = """
+import json, sys
+module = __import__(sys.argv[1], fromlist=["*"])
+print(json.dumps(sorted(getattr(module, "__all__", [name for name in dir(module) if not name.startswith("_")]))))
+"""
+
+def bound_names(tree: ast.AST) -> Set[str]:
+    """
+    Collect every name the code defines or imports, in any scope.
+    
+    Args:
+        tree (ast.AST): The parsed code
+    
+    Returns:
+        Set[str]: The names, plus the builtins
+    """
+    names = set(dir(builtins))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+    return names
+
+@functools.lru_cache(maxsize=None)
+def star_import_names(module: str) -> FrozenSet[str]:
+    """
+    Get the names a `from module import *` brings in, if the module is installed here.
+    
+    The module is imported once in a subprocess, so e.g. Manim is never
+    loaded into the workflow process.
+    
+    Args:
+        module (str): The module name
+    
+    Returns:
+        FrozenSet[str]: The public names, or an empty set if the module cannot be imported
+    """
+    try:
+        result = subprocess.run([sys.executable, "-c", STAR_NAMES_SCRIPT, module], capture_output=True, text=True, timeout=scene_dry_run_timeout)
+        return frozenset(json.loads(result.stdout)) if result.returncode == 0 else frozenset()
+    except (subprocess.TimeoutExpired, OSError, ValueError):
+        return frozenset()
+
+def check_imports(tree: ast.AST) -> List[str]:
+    """
+    Find missing modules and names used without being defined or imported.
+    
+    Imported modules are only looked up when Manim itself is importable in
+    this interpreter, since the renderer may run in another environment.
+    Undefined names are only reported when every star import can be
+    resolved, otherwise any name may come from one of them.
+    
+    Args:
+        tree (ast.AST): The parsed scene code
+    
+    Returns:
+        List[str]: The problems found
+    """
+    problems = []
+    manim_here = importlib.util.find_spec("manim") is not None
+    star_modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+            if any(alias.name == "*" for alias in node.names):
+                star_modules.append(node.module)
+        else:
+            continue
+        for module in modules:
+            if manim_here and importlib.util.find_spec(module.split(".")[0]) is None:
+                problems.append(f"Module '{module}' is not installed")
+    
+    names = bound_names(tree)
+    for module in star_modules:
+        star_names = star_import_names(module)
+        if not star_names:
+            return problems
+        names |= star_names
+    
+    undefined = sorted({
+        node.id for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in names
+    })
+    for name in undefined:
+        problems.append(f"Name '{name}' is used but never defined or imported")
+    return problems
+
+def base_names(node: ast.ClassDef) -> List[str]:
+    """Get the names of a class's bases, e.g. "Scene" for both `Scene` and `manim.Scene`."""
+    names = []
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            names.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            names.append(base.attr)
+    return names
+
+def validate_scene(scene_code: str, step_number: int) -> List[str]:
+    """
+    Check scene code statically before it is rendered.
+    
+    Args:
+        scene_code (str): Manim scene code
+        step_number (int): The 1-based step number of the scene
+    
+    Returns:
+        List[str]: The problems found, empty if the scene looks renderable
+    """
+    try:
+        tree = ast.parse(scene_code)
+    except SyntaxError as e:
+        return [f"Syntax error on line {e.lineno}: {e.msg}"]
+    
+    problems = []
+    expected = f"Step{step_number}Scene"
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    if expected not in classes:
+        found = ", ".join(classes) or "none"
+        problems.append(f"The scene class must be named {expected} (classes found: {found})")
+    elif not any(name.endswith("Scene") for name in base_names(classes[expected])):
+        problems.append(f"{expected} must extend Scene from manim")
+    elif not any(isinstance(node, ast.FunctionDef) and node.name == "construct" for node in classes[expected].body):
+        problems.append(f"{expected} must define a construct(self) method")
+    
+    problems += check_imports(tree)
+    return problems
+
+@traced("scene.dry_run")
+def dry_run_scene(scene_code: str, step_number: int, timeout: float = None) -> List[str]:
+    """
+    Construct the scene with a Manim dry run, which skips writing frames and video.
+    
+    Args:
+        scene_code (str): Manim scene code that passed validate_scene
+        step_number (int): The 1-based step number of the scene
+        timeout (float): Wall-clock limit in seconds (defaults to SCENE_DRY_RUN_TIMEOUT)
+    
+    Returns:
+        List[str]: The error the dry run failed with, or an empty list
+    """
+    timeout = scene_dry_run_timeout if timeout is None else timeout
+    with tempfile.TemporaryDirectory(prefix="dry_run_") as work_dir:
+        scene_file = os.path.join(work_dir, f"step_{step_number}_scene.py")
+        with open(scene_file, "w") as f:
+            f.write(scene_code)
+        command = videoExecutionScript.manim_command + [
+            "render", "--dry_run", "-s", "--media_dir", os.path.join(work_dir, "media"), scene_file, f"Step{step_number}Scene"
+        ]
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return [f"Dry run timed out after {timeout}s"]
+        except OSError as e:
+            # No Manim to dry-run with: leave the check to the real render
+            print(f"Skipping scene dry run: {str(e)}")
+            return []
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.strip().splitlines() if line.strip()]
+        return [f"Dry run failed: {lines[-1] if lines else f'exit code {result.returncode}'}"]
+    return []
+
+def check_scene(scene_code: str, step_number: int, dry_run: bool = None) -> List[str]:
+    """
+    Validate a scene statically and, if enabled, with a dry run.
+    
+    Args:
+        scene_code (str): Manim scene code
+        step_number (int): The 1-based step number of the scene
+        dry_run (bool): Also dry-run the scene (defaults to SCENE_DRY_RUN)
+    
+    Returns:
+        List[str]: The problems found, empty if the scene looks renderable
+    """
+    if dry_run is None:
+        dry_run = scene_dry_run
+    problems = validate_scene(scene_code, step_number)
+    if not problems and dry_run:
+        problems = dry_run_scene(scene_code, step_number)
+    return problems
@@ -0,0 +1,180 @@
+# URL-keyed cache for scraped problem pages
+# url -> raw page, validators (ETag / Last-Modified) and the extracted {question, test_cases}
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+class _Call:
+    """An in-flight computation shared by every caller asking for the same key."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ScrapeCache:
+    """
+    SQLite-backed page cache with TTL, conditional revalidation and single-flight.
+    
+    Entries younger than ttl are served directly. Older entries keep their
+    ETag/Last-Modified validators so the page can be revalidated with a
+    conditional request instead of being downloaded and extracted again.
+    The database is opened on first use, so importing the cache does not
+    touch the disk; if it cannot be opened the cache is disabled.
+    """
+    
+    def __init__(self, db_path: str, ttl: float = 24 * 3600, enabled: bool = True):
+        self.ttl = ttl
+        self.enabled = enabled
+        self.counters = {"hits": 0, "revalidated": 0, "fetches": 0, "collapsed": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.db_path = db_path
+        self._conn = None
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Called with the lock held
+        if self._conn is None and self.enabled:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                        "url TEXT PRIMARY KEY, html TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                        "fetched_at REAL NOT NULL, result TEXT)"
+                    )
+                self._conn = conn
+            except (sqlite3.Error, OSError) as e:
+                print(f"Error opening scrape cache database, caching disabled: {str(e)}")
+                self.enabled = False
+        return self._conn
+    
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        Get the cached entry for a URL, fresh or stale.
+        
+        Args:
+            url (str): The page URL
+            
+        Returns:
+            Optional[Dict]: The entry with html, etag, last_modified, fetched_at and result keys
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT html, etag, last_modified, fetched_at, result FROM scrape_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "html": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+        }
+    
+    def store(self, url: str, entry: Dict) -> None:
+        """
+        Store the entry for a URL.
+        
+        Args:
+            url (str): The page URL
+            entry (Dict): The entry, as returned by lookup
+        """
+        if not self.enabled:
+            return
+        result = json.dumps(entry["result"]) if entry.get("result") else None
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO scrape_cache (url, html, etag, last_modified, fetched_at, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, entry["html"], entry.get("etag"), entry.get("last_modified"), entry["fetched_at"], result)
+                )
+    
+    def is_fresh(self, entry: Dict) -> bool:
+        """
+        Check whether an entry can be served without revalidation.
+        
+        Args:
+            entry (Dict): The cached entry
+            
+        Returns:
+            bool: True if the entry is younger than the TTL
+        """
+        return time.time() - entry["fetched_at"] < self.ttl
+    
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+    
+    def single_flight(self, key: str, fn: Callable):
+        """
+        Run fn once for concurrent callers asking for the same key.
+        
+        The first caller runs fn, the others wait for it and get the same
+        result (or exception).
+        
+        Args:
+            key (str): The key identifying the computation
+            fn (Callable): The computation
+            
+        Returns:
+            The result of fn
+        """
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.counters["collapsed"] += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+        
+        Returns:
+            Dict[str, int]: Hit, revalidation, fetch and collapsed-request counters
+        """
+        with self._lock:
+            return dict(self.counters)
+
+# Shared cache used by the web scraping node
+scrape_cache = ScrapeCache(
+    db_path=os.path.expanduser(os.getenv("SCRAPE_CACHE_PATH", "~/.cache/langgraph-workflow/scrape_cache.sqlite")),
+    ttl=float(os.getenv("SCRAPE_CACHE_TTL", str(24 * 3600))),
+    enabled=os.getenv("SCRAPE_CACHE", "1") != "0",
+)
@@ -0,0 +1,317 @@
+# HTTP job service for the explanatory video workflow
+# POST /jobs enqueues a run, GET /jobs/{id} polls it, GET /jobs/{id}/events
+# streams per-node progress over SSE, GET /jobs/{id}/video returns the video
+# and GET /metrics exposes the Prometheus metrics.
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+import config
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from workflow import create_workflow, stream_workflow, END
+from checkpoints import get_checkpointer
+from telemetry import metrics, jobs_total
+
+# Number of workflow runs executing at once
+service_workers = int(os.getenv("SERVICE_WORKERS", "4"))
+
+# Number of jobs waiting for a worker, beyond which new submissions are rejected with a 503
+service_queue_size = int(os.getenv("SERVICE_QUEUE_SIZE", "100"))
+
+# Finished jobs are forgotten after this many seconds, or sooner once more than
+# SERVICE_MAX_FINISHED_JOBS of them are kept
+service_job_ttl = float(os.getenv("SERVICE_JOB_TTL", "3600"))
+service_max_finished_jobs = int(os.getenv("SERVICE_MAX_FINISHED_JOBS", "1000"))
+
+# Seconds a finished job keeps its full event log for late SSE subscribers, after which
+# only its final event is kept
+service_event_ttl = float(os.getenv("SERVICE_EVENT_TTL", "60"))
+
+class JobRequest(BaseModel):
+    link: str
+    wrong_code: str
+
+class Job:
+    """
+    A queued or running workflow run and the progress events it produced.
+    """
+    
+    def __init__(self, link: str, wrong_code: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.link = link
+        self.wrong_code = wrong_code
+        self.key = key
+        self.status = "queued"
+        self.result = {}
+        self.events = []
+        # Number of events trimmed from the start of the log
+        self.first_event = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._updated = asyncio.Event()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+    
+    @property
+    def event_count(self) -> int:
+        return self.first_event + len(self.events)
+    
+    def add_event(self, event: Dict) -> None:
+        """
+        Record a progress event and wake up the SSE subscribers. Must run on the event loop.
+        
+        Args:
+            event (Dict): The event payload
+        """
+        self.events.append(event)
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+    
+    def trim_events(self) -> None:
+        """
+        Drop every event but the last one, keeping the event numbering of the subscribers.
+        """
+        if len(self.events) > 1:
+            self.first_event += len(self.events) - 1
+            self.events = self.events[-1:]
+    
+    async def wait_for_update(self, seen: int) -> None:
+        """
+        Wait until the job has more than `seen` events or has finished.
+        
+        Args:
+            seen (int): Number of events the caller has already seen
+        """
+        updated = self._updated
+        if self.event_count > seen or self.done:
+            return
+        await updated.wait()
+    
+    def summary(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "link": self.link,
+            "video_path": self.result.get("video_path", ""),
+            "error": self.result.get("error", ""),
+            "events": self.event_count,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+def job_key(link: str, wrong_code: str) -> str:
+    """
+    Build the key used to deduplicate identical in-flight submissions.
+    
+    Args:
+        link (str): The URL of the coding problem
+        wrong_code (str): The incorrect code solution
+    
+    Returns:
+        str: The link plus a hash of the code
+    """
+    return f"{link}\0{hashlib.sha256(wrong_code.encode('utf-8')).hexdigest()}"
+
+class JobManager:
+    """
+    Queue of workflow jobs served by a fixed number of async workers.
+    
+    Each worker runs one job at a time on a dedicated thread pool of the
+    same size, so the number of threads is bounded by the number of workers
+    rather than by the number of requests. The queue holds at most
+    queue_size jobs, and finished jobs are evicted after SERVICE_JOB_TTL.
+    """
+    
+    def __init__(self, workers: int, queue_size: int = None):
+        self.workers = workers
+        self.queue_size = service_queue_size if queue_size is None else queue_size
+        self.jobs = {}
+        self.in_flight = {}
+        # Finished jobs, oldest first
+        self.finished = deque()
+        self.graph = None
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+    
+    async def start(self) -> None:
+        # Compile the graph once for every job
+        self.graph = create_workflow(checkpointer=get_checkpointer())
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="workflow")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def submit(self, link: str, wrong_code: str) -> Tuple[Job, bool]:
+        """
+        Enqueue a job, or return the in-flight job with the same link and code.
+        
+        Args:
+            link (str): The URL of the coding problem
+            wrong_code (str): The incorrect code solution
+        
+        Returns:
+            Tuple[Job, bool]: The job and whether it was deduplicated
+        
+        Raises:
+            asyncio.QueueFull: If queue_size jobs are already waiting
+        """
+        key = job_key(link, wrong_code)
+        existing = self.in_flight.get(key)
+        if existing is not None:
+            return existing, True
+        if self._queue.full():
+            raise asyncio.QueueFull()
+        
+        self.evict()
+        job = Job(link, wrong_code, key)
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        job.add_event({"event": "queued", "job_id": job.id})
+        self._queue.put_nowait(job)
+        return job, False
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    def evict(self) -> None:
+        """
+        Forget the finished jobs past SERVICE_JOB_TTL or SERVICE_MAX_FINISHED_JOBS, and
+        trim the event logs of those finished more than SERVICE_EVENT_TTL ago.
+        """
+        now = time.time()
+        while self.finished and (len(self.finished) > service_max_finished_jobs or self.finished[0].finished_at <= now - service_job_ttl):
+            self.jobs.pop(self.finished.popleft().id, None)
+        for job in self.finished:
+            if job.finished_at > now - service_event_ttl:
+                break
+            job.trim_events()
+    
+    def _run(self, job: Job, loop: asyncio.AbstractEventLoop) -> Dict:
+        """Run the workflow on a worker thread, forwarding node events to the loop."""
+        result = {}
+        for node, update in stream_workflow(job.link, job.wrong_code, graph=self.graph, thread_id=job.id):
+            if node == END:
+                result = update
+                continue
+            event = {
+                "event": "node",
+                "node": node,
+                "elapsed": round(time.time() - job.started_at, 3),
+                "updated": sorted(update),
+            }
+            if update.get("error"):
+                event["error"] = update["error"]
+            loop.call_soon_threadsafe(job.add_event, event)
+        return result
+    
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            job.add_event({"event": "started", "job_id": job.id})
+            try:
+                result = await loop.run_in_executor(self._executor, self._run, job, loop)
+                job.result = {"video_path": result.get("video_path", ""), "error": result.get("error", "")}
+            except Exception as e:
+                job.result = {"video_path": "", "error": f"Error in workflow: {str(e)}"}
+            finally:
+                job.finished_at = time.time()
+                job.status = "failed" if job.result.get("error") or not job.result.get("video_path") else "completed"
+                jobs_total.inc(status=job.status)
+                self.in_flight.pop(job.key, None)
+                job.add_event(dict({"event": job.status, "job_id": job.id}, **job.result))
+                self.finished.append(job)
+                self.evict()
+                self._queue.task_done()
+
+manager = JobManager(service_workers)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start()
+    try:
+        yield
+    finally:
+        await manager.stop()
+
+app = FastAPI(title="Explanatory video workflow", lifespan=lifespan)
+
+def get_job(job_id: str) -> Job:
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest) -> Dict:
+    """Enqueue a workflow run. Identical in-flight submissions share one job."""
+    try:
+        job, deduplicated = manager.submit(request.link, request.wrong_code)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "30"})
+    return dict(job.summary(), deduplicated=deduplicated)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict:
+    """Poll the status of a job."""
+    return get_job(job_id).summary()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Stream the job's progress events over SSE until it finishes."""
+    job = get_job(job_id)
+    
+    async def event_stream():
+        seen = 0
+        while True:
+            # Events trimmed from a finished job are skipped
+            seen = max(seen, job.first_event)
+            while seen < job.event_count:
+                event = job.events[seen - job.first_event]
+                seen += 1
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            if job.done and seen >= job.event_count:
+                break
+            await job.wait_for_update(seen)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.get("/jobs/{job_id}/video")
+async def job_video(job_id: str) -> FileResponse:
+    """Download the final video of a completed job."""
+    job = get_job(job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    video_path = job.result.get("video_path")
+    if not video_path or not os.path.exists(video_path):
+        raise HTTPException(status_code=404, detail="Video file not found")
+    return FileResponse(video_path, media_type="video/mp4", filename=os.path.basename(video_path))
+
+@app.get("/metrics")
+async def prometheus_metrics() -> PlainTextResponse:
+    """Expose node, LLM, cache, render and job metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("SERVICE_HOST", "127.0.0.1"), port=int(os.getenv("SERVICE_PORT", "8000")))
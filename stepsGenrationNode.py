@@ -1,73 +1,199 @@
 # input: code: str 
 # output: steps : [str]
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Tuple
 import os
-from dotenv import load_dotenv
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
-from typing import List
+import re
+import json
+import config
+from llmClient import invoke_llm, parses_with, stream_llm
 
-# Load environment variables
-load_dotenv()
+# LangChain is imported on first use, so importing this module stays fast
+if TYPE_CHECKING:
+    from langchain.output_parsers import StructuredOutputParser
+    from langchain_core.messages import HumanMessage
 
-# Configure the Groq API
-groq_api_key = os.getenv("GROQ_API_KEY")
+def profile_note(profile: str) -> str:
+    """
+    Introduce the measured profile to the model.
+    
+    Args:
+        profile (str): Measured complexity and timings, or ""
+        
+    Returns:
+        str: Instructions to quote the measurements, or "" if the code was not profiled
+    """
+    if not profile:
+        return ""
+    return f"{profile} When discussing efficiency, use these measured numbers instead of estimating them."
+
+# Start of the steps array in the structured response
+STEPS_ARRAY = re.compile(r'"steps"\s*:\s*\[')
+
+# Returned in place of the steps when the code could not be analyzed
+ERROR_STEP = "Error analyzing the code. Please check if the code is valid and try again."
+
+class StepStreamParser:
+    """
+    Incremental parser for the steps array of a streamed response.
+    
+    Text is fed as it arrives, and each step is returned as soon as its
+    closing quote is read, without waiting for the rest of the response.
+    Only the "steps" array is scanned; the full response is still parsed
+    by the output parser once the stream ends.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.steps = []
+        self.done = False
+        self._in_array = False
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+        
+        Args:
+            text (str): The next chunk of the response
+        
+        Returns:
+            List[str]: The steps completed by this chunk
+        """
+        self.buffer += text
+        completed = []
+        if not self._in_array and not self.done:
+            match = STEPS_ARRAY.search(self.buffer)
+            if match is None:
+                return completed
+            self._in_array = True
+            self.position = match.end()
+        
+        while self._in_array and self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            self.position += 1
+            if self._start is None:
+                # Between elements
+                if char == "]":
+                    self._close()
+                elif not char.isspace() and char != ",":
+                    self._start = self.position - 1
+                    self._depth = 1 if char in "[{" else 0
+                    self._in_string = char == '"'
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._emit(self.position, completed)
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                if self._depth == 0:
+                    # A bare value followed by the end of the array
+                    self._emit(self.position - 1, completed)
+                    self._close()
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(self.position, completed)
+            elif char == "," and self._depth == 0:
+                self._emit(self.position - 1, completed)
+        return completed
+    
+    def _close(self) -> None:
+        self._in_array = False
+        self.done = True
+    
+    def _emit(self, end: int, completed: List[str]) -> None:
+        raw = self.buffer[self._start:end].strip()
+        self._start = None
+        try:
+            value = json.loads(raw, strict=False)
+        except ValueError:
+            value = raw
+        step = value if isinstance(value, str) else json.dumps(value)
+        if step:
+            self.steps.append(step)
+            completed.append(step)
 
-def generate_steps(code: str) -> List[str]:
+def build_steps_prompt(code: str, profile: str = "") -> Tuple[List["HumanMessage"], "StructuredOutputParser"]:
+    """
+    Build the steps prompt and the parser for its response.
+    
+    Args:
+        code (str): The code to analyze
+        profile (str): Measured complexity and timings of the code, if it was profiled
+    
+    Returns:
+        Tuple[List[HumanMessage], StructuredOutputParser]: The messages to send and the output parser
+    """
+    from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+    from langchain.prompts import PromptTemplate
+    from langchain_core.messages import HumanMessage
+    
+    # Define the response schema for structured output
+    response_schemas = [
+        ResponseSchema(name="steps", description="List of explanation steps for code analysis", type="List[str]")
+    ]
+    output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+    format_instructions = output_parser.get_format_instructions()
+    
+    # Prompt for the model to analyze the code and generate steps
+    prompt = PromptTemplate(
+        template="""
+        Analyze the following code which may contain errors or inefficiencies:
+        
+        ```
+        {code}
+        ```
+        
+        {profile}
+        
+        Generate a detailed step-by-step explanation that:
+        1. Identifies any issues or bugs in the code
+        2. Explains why these issues are problematic
+        3. Provides a clear solution for each issue
+        4. Explains the correct approach
+        
+        Format your response as a list of distinct steps, with each step focusing on a specific aspect of the code.
+        Each step should be comprehensive but concise.
+        
+        Return the information in the following format:
+        {format_instructions}
+        """,
+        input_variables=["code"],
+        partial_variables={"format_instructions": format_instructions, "profile": profile_note(profile)}
+    )
+    
+    # Format the prompt with the code
+    formatted_prompt = prompt.format(code=code)
+    return [HumanMessage(content=formatted_prompt)], output_parser
+
+def generate_steps(code: str, profile: str = "") -> List[str]:
     """
     Generate explanation steps for the given code, identifying issues and how to fix them.
     
     Args:
         code (str): The code to analyze (potentially incorrect)
+        profile (str): Measured complexity and timings of the code, if it was profiled
         
     Returns:
         List[str]: A list of explanation steps
     """
     try:
-        # Define the response schema for structured output
-        response_schemas = [
-            ResponseSchema(name="steps", description="List of explanation steps for code analysis", type="List[str]")
-        ]
-        output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-        format_instructions = output_parser.get_format_instructions()
-        
-         # Create a ChatGroq instance
-        chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name="mistral-saba-24B")
-        
-        # Prompt for the model to analyze the code and generate steps
-        prompt = PromptTemplate(
-            template="""
-            Analyze the following code which may contain errors or inefficiencies:
-            
-            ```
-            {code}
-            ```
-            
-            Generate a detailed step-by-step explanation that:
-            1. Identifies any issues or bugs in the code
-            2. Explains why these issues are problematic
-            3. Provides a clear solution for each issue
-            4. Explains the correct approach
-            
-            Format your response as a list of distinct steps, with each step focusing on a specific aspect of the code.
-            Each step should be comprehensive but concise.
-            
-            Return the information in the following format:
-            {format_instructions}
-            """,
-            input_variables=["code"],
-            partial_variables={"format_instructions": format_instructions}
-        )
+        messages, output_parser = build_steps_prompt(code, profile)
         
-        # Format the prompt with the code
-        formatted_prompt = prompt.format(code=code)
-        
-        # Generate the response
-        messages = [HumanMessage(content=formatted_prompt)]
-        response = chat.invoke(messages)
-        content = response.content
+        # Generate the response; replies that do not parse are not cached
+        content = invoke_llm(messages, validate=parses_with(output_parser))
         
         # Parse the response
         structured_output = output_parser.parse(content)
@@ -76,7 +202,63 @@ def generate_steps(code: str) -> List[str]:
     except Exception as e:
         print(f"Error generating steps: {str(e)}")
         # Return a basic step in case of error
-        return ["Error analyzing the code. Please check if the code is valid and try again."]
+        return [ERROR_STEP]
+
+def iter_steps(code: str, profile: str = "") -> Iterator[str]:
+    """
+    Generate explanation steps from the model's token stream, yielding each step as soon as it is written.
+    
+    Steps are parsed incrementally while the model is still writing the
+    next ones, so a consumer such as scene generation can start on step 1
+    before the response is complete. Once the stream ends, the full
+    response is parsed and any step the incremental parser missed is
+    yielded after the others. A stream that fails partway is finished with
+    a regular request, whose steps are used only if it starts with the
+    steps already yielded; otherwise the error is raised.
+    
+    Args:
+        code (str): The code to analyze (potentially incorrect)
+        profile (str): Measured complexity and timings of the code, if it was profiled
+    
+    Yields:
+        str: The explanation steps, in order
+    """
+    parser = StepStreamParser()
+    # Set when the retried reply does not continue the streamed steps, which fails the caller
+    diverged = False
+    try:
+        messages, output_parser = build_steps_prompt(code, profile)
+        
+        content = ""
+        retried = False
+        try:
+            for chunk in stream_llm(messages, validate=parses_with(output_parser)):
+                content += chunk
+                for step in parser.feed(chunk):
+                    yield step
+        except Exception as e:
+            if not content:
+                raise
+            print(f"Steps stream failed after {len(parser.steps)} step(s), finishing with a full request: {str(e)}")
+            content = invoke_llm(messages, validate=parses_with(output_parser))
+            retried = True
+        
+        # Steps the incremental parser could not read, e.g. a response without the "steps" key
+        steps = output_parser.parse(content)["steps"]
+        if retried and [step if isinstance(step, str) else json.dumps(step) for step in steps[:len(parser.steps)]] != parser.steps:
+            # A different answer: continuing it would repeat or skip steps
+            diverged = True
+            raise Exception(f"the retried reply does not start with the {len(parser.steps)} step(s) already streamed")
+        for step in steps[len(parser.steps):]:
+            yield step
+    
+    except Exception as e:
+        print(f"Error generating steps: {str(e)}")
+        if diverged:
+            raise
+        # Steps already handed out stand on their own, otherwise return a basic step
+        if not parser.steps:
+            yield ERROR_STEP
 
 # Example usage
 if __name__ == "__main__":
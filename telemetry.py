@@ -0,0 +1,301 @@
+# Tracing and metrics for the workflow
+# Spans (OpenTelemetry field names, exported as JSON lines) around nodes, LLM calls and subprocesses,
+# correlated by job ID, plus a minimal Prometheus registry served by the service on /metrics.
+import os
+import re
+import json
+import time
+import uuid
+import bisect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# JSONL file the finished spans are appended to ("" keeps spans in metrics only)
+trace_file = os.path.expanduser(os.getenv("TRACE_FILE", ""))
+# Reported as the service.name resource attribute of every span
+service_name = os.getenv("SERVICE_NAME", "langgraph-workflow")
+
+# Histogram buckets for durations, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_job_id = contextvars.ContextVar("job_id", default="")
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Format labels as {name="value",...}, escaped for the Prometheus text format."""
+    if not labels:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")) for name, value in labels]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class Counter:
+    """
+    A monotonically increasing value per label set.
+    """
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(sorted(labels.items())), 0)
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{label_text(labels)} {value}")
+        return "\n".join(lines)
+
+class Histogram:
+    """
+    Observations counted into cumulative buckets per label set.
+    """
+    
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            self.values[key] = (counts, total + value, count + 1)
+    
+    def count(self, **labels) -> int:
+        entry = self.values.get(tuple(sorted(labels.items())))
+        return entry[2] if entry else 0
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{label_text(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{label_text(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{label_text(labels)} {round(total, 6)}")
+                lines.append(f"{self.name}_count{label_text(labels)} {count}")
+        return "\n".join(lines)
+
+class MetricsRegistry:
+    """
+    The metrics exposed on /metrics, rendered in the Prometheus text format.
+    """
+    
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+    
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+    
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+# Shared registry and the metrics recorded by every module
+metrics = MetricsRegistry()
+span_duration = metrics.histogram("workflow_span_duration_seconds", "Duration of traced operations (nodes, LLM calls, renders, concats)")
+span_errors = metrics.counter("workflow_span_errors_total", "Traced operations that failed")
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens by model and kind (prompt or completion)")
+cache_requests = metrics.counter("cache_requests_total", "Cache lookups by cache and result (hit or miss)")
+parser_requests = metrics.counter("parser_requests_total", "Pages by extraction result (parsed without the LLM, or fallback to the LLM)")
+jobs_total = metrics.counter("workflow_jobs_total", "Finished service jobs by status")
+
+class FileSpanExporter:
+    """
+    Appends finished spans to a JSONL file, one span per line.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def export(self, span: Dict) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+# Exporter of finished spans, None to only record metrics
+exporter = FileSpanExporter(trace_file) if trace_file else None
+
+class Span:
+    """
+    One timed operation, with OpenTelemetry's trace and span IDs.
+    """
+    
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else trace_id_for(_job_id.get())
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent.span_id if parent else ""
+        self.attributes = dict(attributes)
+        job_id = _job_id.get()
+        if job_id:
+            self.attributes["job.id"] = job_id
+        self.status = {"code": "OK", "message": ""}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+    
+    def set_attribute(self, name: str, value) -> None:
+        self.attributes[name] = value
+    
+    def set_error(self, message: str) -> None:
+        self.status = {"code": "ERROR", "message": message}
+    
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": "INTERNAL",
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+            "resource": {"service.name": service_name},
+        }
+
+def trace_id_for(job_id: str) -> str:
+    """
+    Get the trace ID of a job, so every span of a job lands in the same trace.
+    
+    Args:
+        job_id (str): The job ID, or "" outside of a job
+    
+    Returns:
+        str: The job ID itself if it is already a 32-digit hex ID, otherwise a new random ID
+    """
+    if re.fullmatch(r"[0-9a-f]{32}", job_id or ""):
+        return job_id
+    return uuid.uuid4().hex
+
+def current_span() -> Optional[Span]:
+    """Get the innermost open span of the current context, if any."""
+    return _current_span.get()
+
+@contextmanager
+def job_context(job_id: str = None) -> Iterator[str]:
+    """
+    Correlate every span opened in the block with a job.
+    
+    Args:
+        job_id (str): The job ID (a new one is generated if not given)
+    
+    Yields:
+        str: The job ID
+    """
+    job_id = job_id or uuid.uuid4().hex
+    token = _job_id.set(job_id)
+    try:
+        yield job_id
+    finally:
+        _job_id.reset(token)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time an operation as a span, child of the current span.
+    
+    The duration is recorded in workflow_span_duration_seconds, and an
+    exception or set_error() marks the span as failed. A span left open in a
+    generator that its consumer closes early ends normally.
+    
+    Args:
+        name (str): The operation, e.g. "node.web_scraping" or "llm.call"
+        **attributes: Span attributes
+    
+    Yields:
+        Span: The open span
+    """
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except GeneratorExit:
+        # The consumer of a streaming generator stopped reading, which is not a failure
+        raise
+    except BaseException as e:
+        current.set_error(f"{type(e).__name__}: {str(e)}")
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        span_duration.observe(time.perf_counter() - start, span=name)
+        if current.status["code"] == "ERROR":
+            span_errors.inc(span=name)
+        if exporter is not None:
+            try:
+                exporter.export(current.to_dict())
+            except OSError as e:
+                print(f"Error exporting span: {str(e)}")
+
+def traced(name: str) -> Callable:
+    """
+    Decorate a function so every call is timed as a span.
+    
+    Args:
+        name (str): The span name
+    
+    Returns:
+        Callable: The decorator
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_node(name: str, node: Callable) -> Callable:
+    """
+    Wrap a workflow node in a span. Nodes report failures in the state's error field, which marks the span as failed.
+    
+    Args:
+        name (str): The node name
+        node (Callable): The node function
+    
+    Returns:
+        Callable: The wrapped node
+    """
+    @functools.wraps(node)
+    def run(state):
+        with span(f"node.{name}", node=name) as current:
+            update = node(state)
+            if isinstance(update, dict) and update.get("error"):
+                current.set_error(update["error"])
+            return update
+    return run
@@ -1,21 +1,34 @@
 # Input: code: str 
 # output: testCases: [[],[],[]...]
-from typing import List, Any
+from typing import Dict, List, Any
 import os
-from dotenv import load_dotenv
 import json
 import re
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
-from typing import List, Any
+import config
+from llmClient import invoke_llm, parses_with
+from codeSandbox import parse_signature, normalize_inputs, run_cases
+from telemetry import traced
 
-# Load environment variables
-load_dotenv()
-
-# Configure the Groq API
-groq_api_key = os.getenv("GROQ_API_KEY")
+@traced("sandbox.test_cases")
+def add_actual_outputs(code: str, signature: Dict, test_cases: List[List[Any]]) -> List[List[Any]]:
+    """
+    Run the code on each test case's inputs and append what it actually returns.
+    
+    Args:
+        code (str): The code under test
+        signature (Dict): The function to call, as returned by parse_signature
+        test_cases (List[List[Any]]): Test cases as [inputs, expected output, explanation]
+        
+    Returns:
+        List[List[Any]]: Test cases as [inputs, expected output, explanation, actual output, runtime in ms],
+            where the actual output is "Error: ..." if the code raised, timed out or hit a resource limit
+    """
+    inputs_list = [normalize_inputs(test_case[0], signature["params"]) for test_case in test_cases]
+    results = run_cases(code, signature, inputs_list)
+    for test_case, result in zip(test_cases, results):
+        actual_output = f"Error: {result['error']}" if result["error"] else result["output"]
+        test_case.extend([actual_output, result["runtime_ms"]])
+    return test_cases
 
 def generate_test_cases(code: str) -> List[List[Any]]:
     """
@@ -25,28 +38,26 @@ def generate_test_cases(code: str) -> List[List[Any]]:
         code (str): The code to generate test cases for
         
     Returns:
-        List[List[Any]]: A list of test cases, where each test case is a list of inputs and expected outputs
+        List[List[Any]]: A list of test cases, where each test case is a list of inputs, expected output,
+            explanation and, when the code could be run, its actual output and runtime
     """
     try:
-        # Extract function name and parameters from the code
-        function_match = re.search(r'def\s+(\w+)\s*\((.*?)\):', code)
-        if not function_match:
-            raise ValueError("Could not identify function in the provided code")
+        from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+        from langchain.prompts import PromptTemplate
+        from langchain_core.messages import HumanMessage
         
-        function_name = function_match.group(1)
-        parameters = function_match.group(2).split(',')
-        param_names = [p.strip().split(':')[0].split('=')[0].strip() for p in parameters]
+        # Extract function name and parameters from the code
+        signature = parse_signature(code)
+        function_name = signature["function"]
+        param_names = signature["params"]
         
         # Define the response schema for structured output
         response_schemas = [
-            ResponseSchema(name="test_cases", description="List of test cases with inputs, expected output, actual output, and explanation", type="List[Dict]")
+            ResponseSchema(name="test_cases", description="List of test cases with inputs, expected output, and explanation", type="List[Dict]")
         ]
         output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
         format_instructions = output_parser.get_format_instructions()
         
-        # Create a ChatGroq instance
-        chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name="mistral-saba-24B")
-        
         # Prompt for the model to generate test cases
         prompt = PromptTemplate(
             template="""
@@ -66,13 +77,11 @@ def generate_test_cases(code: str) -> List[List[Any]]:
             For each test case, provide:
             1. The input values for each parameter
             2. The expected output if the code was correct
-            3. The actual output with the current code (if different)
-            4. A brief explanation of what the test case demonstrates
+            3. A brief explanation of what the test case demonstrates
             
             Format your response as a JSON array where each test case is an object with these fields:
             - inputs: an array of input values in the order of the function parameters
             - expected_output: the correct output
-            - actual_output: what the buggy code would return
             - explanation: brief explanation of the test case
             
             Return the information in the following format:
@@ -87,8 +96,8 @@ def generate_test_cases(code: str) -> List[List[Any]]:
         
         # Generate the response
         messages = [HumanMessage(content=formatted_prompt)]
-        response = chat.invoke(messages)
-        content = response.content
+        # Replies that do not parse are not cached, so a retry asks the model again
+        content = invoke_llm(messages, validate=parses_with(output_parser))
         
         # Parse the response
         try:
@@ -121,8 +130,6 @@ def generate_test_cases(code: str) -> List[List[Any]]:
                         test_case.append("No explanation provided")
                     
                     formatted_test_cases.append(test_case)
-            
-            return formatted_test_cases
         except Exception as e:
             print(f"Error parsing structured output: {str(e)}")
             # Fallback to manual parsing if structured parsing fails
@@ -169,14 +176,15 @@ def generate_test_cases(code: str) -> List[List[Any]]:
                             test_case.append("No explanation provided")
                         
                         formatted_test_cases.append(test_case)
-                
-                return formatted_test_cases
             except json.JSONDecodeError:
                 print("Could not parse JSON response. Using simplified test cases.")
                 return [
                     [["Sample input 1"], "Expected output 1", "This is a basic test case"],
                     [["Sample input 2"], "Expected output 2", "This is an edge case"]
                 ]
+        
+        # Run the code once, outside the parsing, so a sandbox failure is not taken for a parse error
+        return add_actual_outputs(code, signature, formatted_test_cases)
     
     except Exception as e:
         print(f"Error generating test cases: {str(e)}")
@@ -204,4 +212,6 @@ if __name__ == "__main__":
         print(f"Inputs: {test_case[0]}")
         print(f"Expected Output: {test_case[1]}")
         print(f"Explanation: {test_case[2]}")
+        if len(test_case) > 3:
+            print(f"Actual Output: {test_case[3]} ({test_case[4]} ms)")
         print()
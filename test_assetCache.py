@@ -0,0 +1,167 @@
+import unittest
+import os
+import configparser
+import sys
+import shutil
+import tempfile
+import textwrap
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import from assetCache
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import videoExecutionScript
+from assetCache import AssetCache
+
+# Stand-in for manim that typesets each Text("...") of the scene into <text_dir>/<hash>.svg,
+# reusing the SVG if it already exists, and records what it typeset. Like Manim, it
+# reads text_dir from --config_file and defaults to <media_dir>/texts.
+FAKE_MANIM = textwrap.dedent("""
+    import configparser, os, re, sys, hashlib
+    args = sys.argv[1:]
+    media_dir = args[args.index("--media_dir") + 1]
+    scene_file, scene_name = args[-2], args[-1]
+    text_dir = os.path.join(media_dir, "texts")
+    if "--config_file" in args:
+        parser = configparser.ConfigParser()
+        parser.read(args[args.index("--config_file") + 1])
+        text_dir = parser["CLI"].get("text_dir", text_dir)
+    os.makedirs(text_dir, exist_ok=True)
+    for text in re.findall(r'Text\\("([^"]*)"\\)', open(scene_file).read()):
+        svg = os.path.join(text_dir, hashlib.sha256(text.encode()).hexdigest()[:16] + ".svg")
+        if os.path.exists(svg):
+            open(svg).read()
+        else:
+            with open(svg, "w") as f:
+                f.write("<svg>" + text + "</svg>")
+            with open(os.path.join(os.path.dirname(scene_file), "typeset.log"), "a") as log:
+                log.write(text + "\\n")
+    out_dir = os.path.join(media_dir, "videos", "scene", "480p15")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, scene_name + ".mp4"), "w") as f:
+        f.write(scene_name)
+""")
+
+class TestAssetCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = AssetCache(os.path.join(self.tmp_dir, "assets"), max_bytes=1024)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def add_asset(self, cache, path, content, age=0):
+        path = os.path.join(cache.cache_dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        written = time.time() - age
+        os.utime(path, (written, written))
+    
+    def test_manim_is_pointed_at_the_cache(self):
+        settings = self.cache.directories()
+        self.assertEqual(settings, {
+            "tex_dir": os.path.join(os.path.abspath(self.cache.cache_dir), "Tex"),
+            "text_dir": os.path.join(os.path.abspath(self.cache.cache_dir), "texts"),
+        })
+        self.assertTrue(all(os.path.isdir(directory) for directory in settings.values()))
+        
+        parser = configparser.ConfigParser()
+        parser.read(self.cache.config_file())
+        self.assertEqual(dict(parser["CLI"]), settings)
+        
+    def test_eviction_removes_the_oldest_assets_whatever_their_access_time(self):
+        cache = AssetCache(os.path.join(self.tmp_dir, "small"), max_bytes=20, grace_seconds=5)
+        self.add_asset(cache, "texts/a.svg", "x" * 8, age=30)
+        self.add_asset(cache, "Tex/b.svg", "x" * 8, age=20)
+        self.add_asset(cache, "texts/c.svg", "x" * 8, age=10)
+        # Read recently, but never rewritten
+        stat = os.stat(os.path.join(cache.cache_dir, "texts", "a.svg"))
+        os.utime(os.path.join(cache.cache_dir, "texts", "a.svg"), (time.time(), stat.st_mtime))
+    
+        self.assertEqual(cache.rendered(), 1)
+        self.assertFalse(os.path.exists(os.path.join(cache.cache_dir, "texts", "a.svg")))
+        stats = cache.stats()
+        self.assertEqual((stats["renders"], stats["evicted"], stats["files"], stats["bytes"]), (1, 1, 2, 16))
+    
+    def test_recent_assets_are_kept(self):
+        cache = AssetCache(os.path.join(self.tmp_dir, "small"), max_bytes=10, grace_seconds=60)
+        self.add_asset(cache, "texts/old.svg", "x" * 8, age=120)
+        self.add_asset(cache, "texts/new.svg", "x" * 8, age=5)
+        self.add_asset(cache, "Tex/newer.svg", "x" * 8)
+        
+        self.assertEqual(cache.evict(), 1)
+        self.assertEqual(sorted(os.listdir(os.path.join(cache.cache_dir, "texts"))), ["new.svg"])
+    
+    def test_eviction_waits_for_renders_using_the_cache(self):
+        cache = AssetCache(os.path.join(self.tmp_dir, "small"), max_bytes=10, grace_seconds=0)
+        self.add_asset(cache, "texts/a.svg", "x" * 8, age=20)
+        self.add_asset(cache, "texts/b.svg", "x" * 8, age=10)
+        with cache.in_use():
+            self.assertIsNone(cache.evict(wait=False))
+            self.assertEqual(cache.rendered(), 0)
+        
+        self.assertEqual(cache.rendered(), 1)
+        self.assertEqual(os.listdir(os.path.join(cache.cache_dir, "texts")), ["b.svg"])
+    
+    def test_cache_is_only_scanned_when_a_render_added_assets(self):
+        self.cache.directories()
+        with mock.patch.object(self.cache, "evict", return_value=0) as evict:
+            self.cache.rendered()
+            self.cache.rendered()
+            self.assertEqual(evict.call_count, 1)
+        
+            # Directory times can be coarse, so the new file is dated explicitly
+            self.add_asset(self.cache, "texts/new.svg", "new")
+            texts = os.path.join(self.cache.cache_dir, "texts")
+            os.utime(texts, ns=(os.stat(texts).st_atime_ns, os.stat(texts).st_mtime_ns + 1))
+            self.cache.rendered()
+            self.assertEqual(evict.call_count, 2)
+    
+    def test_disabled_cache_does_nothing(self):
+        cache = AssetCache(os.path.join(self.tmp_dir, "off"), max_bytes=1024, enabled=False)
+        self.assertEqual(cache.directories(), {})
+        self.assertEqual(cache.config_file(), "")
+        self.assertEqual(cache.rendered(), 0)
+        self.assertFalse(os.path.exists(cache.cache_dir))
+
+class TestRenderSharesAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmp_dir, "manim_fake.py"), "w") as f:
+            f.write(FAKE_MANIM)
+        self.cache = AssetCache(os.path.join(self.tmp_dir, "assets"), max_bytes=1024 * 1024)
+        self.patches = [
+            mock.patch.object(videoExecutionScript, "manim_command", [sys.executable, os.path.join(self.tmp_dir, "manim_fake.py")]),
+            mock.patch.object(videoExecutionScript, "asset_cache", self.cache),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def render(self, n, texts):
+        scene_file = os.path.join(self.tmp_dir, f"step_{n}_scene.py")
+        with open(scene_file, "w") as f:
+            f.write("\n".join(f'Text("{text}")' for text in texts))
+        return videoExecutionScript.render_scene(scene_file, f"Step{n}Scene", os.path.join(self.tmp_dir, "media", f"step_{n}"))
+    
+    def typeset(self):
+        with open(os.path.join(self.tmp_dir, "typeset.log")) as f:
+            return f.read().split()
+    
+    def test_later_renders_reuse_typeset_text(self):
+        self.render(1, ["left", "right"])
+        self.render(2, ["left", "right", "mid"])
+        
+        self.assertEqual(self.typeset(), ["left", "right", "mid"])
+        stats = self.cache.stats()
+        self.assertEqual((stats["renders"], stats["files"]), (2, 3))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "media", "step_2", "texts")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+
+# Add the parent and benchmarks directories to the path so we can import the benchmark suite
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from bench_nodes import compare, percentile, run_suite, summarize
+from load_test import find_knee, run_load_test, summarize_level, synthetic_trace
+
+class TestBenchmarkStatistics(unittest.TestCase):
+    def test_percentiles_interpolate_between_ranks(self):
+        values = [4, 1, 3, 2, 5]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 100), 5)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([], 50), 0.0)
+    
+    def test_summary_reports_ms_and_throughput(self):
+        summary = summarize([0.1, 0.2, 0.3], wall_seconds=0.6)
+        self.assertEqual(summary["runs"], 3)
+        self.assertEqual(summary["p50_ms"], 200.0)
+        self.assertEqual(summary["throughput"], 5.0)
+    
+    def test_gate_flags_only_slowdowns_beyond_tolerance(self):
+        def results(scrape_ms, graph_ms):
+            return {
+                "nodes": {"scrape_website": {"p50_ms": scrape_ms, "p95_ms": scrape_ms}},
+                "graph": {"p50_ms": graph_ms, "p95_ms": graph_ms},
+            }
+        baseline = results(100.0, 1000.0)
+        self.assertEqual(compare(results(115.0, 900.0), baseline, tolerance=0.2), [])
+        regressions = compare(results(130.0, 1000.0), baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith("scrape_website") for line in regressions))
+        # Benchmarks missing from the baseline are not compared
+        self.assertEqual(compare(results(130.0, 1000.0), {"nodes": {}}, tolerance=0.2), [])
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_suite_runs_offline(self):
+        results = run_suite(runs=1, llm_latency=0.0, llm_jitter=0.0, fetch_latency=0.0, render_latency=0.0)
+        self.assertEqual(set(results["nodes"]), {
+            "scrape_website", "profile_code", "generate_steps", "iter_steps", "generate_test_cases", "generate_scenes", "execute_video",
+        })
+        self.assertEqual(results["graph"]["runs"], 1)
+        self.assertGreater(results["llm_calls"], 0)
+
+class TestLoadTest(unittest.TestCase):
+    def test_synthetic_trace_arrivals(self):
+        trace = synthetic_trace(5, rate=10)
+        arrivals = [job["arrival"] for job in trace]
+        self.assertEqual(arrivals, sorted(arrivals))
+        self.assertEqual(arrivals[0], 0.0)
+        # Distinct submissions, so the service does not merge them
+        self.assertEqual(len({job["wrong_code"] for job in trace}), 5)
+        self.assertEqual({job["arrival"] for job in synthetic_trace(3, rate=0)}, {0.0})
+    
+    def test_knee_is_the_last_level_that_scales(self):
+        def levels(*throughputs):
+            return [{"concurrency": 2 ** i, "throughput": t} for i, t in enumerate(throughputs)]
+        self.assertEqual(find_knee(levels(1.0, 1.9, 3.6, 3.8)), 4)
+        self.assertEqual(find_knee(levels(1.0, 1.1)), 1)
+        self.assertEqual(find_knee(levels(1.0, 2.0, 4.0)), 4)
+        self.assertEqual(find_knee([]), 0)
+    
+    def test_level_summary_counts_node_errors(self):
+        records = [
+            {"latency": 1.0, "queued": 0.0, "error": "", "events": [{"node": "web_scraping", "elapsed": 0.5, "error": ""}]},
+            {"latency": 2.0, "queued": 1.0, "error": "boom", "events": [{"node": "web_scraping", "elapsed": 0.7, "error": "boom"}]},
+        ]
+        level = summarize_level(records, wall_seconds=2.0)
+        self.assertEqual((level["jobs"], level["throughput"], level["error_rate"]), (2, 1.0, 0.5))
+        self.assertEqual(level["latency"]["p50_ms"], 1500.0)
+        self.assertEqual((level["nodes"]["web_scraping"]["runs"], level["nodes"]["web_scraping"]["errors"]), (2, 1))
+    
+    def test_replay_ramps_concurrency(self):
+        results = run_load_test(synthetic_trace(2, rate=0), [1, 2], llm_latency=0.0, llm_jitter=0.0, fetch_latency=0.0, render_latency=0.0)
+        self.assertEqual([level["concurrency"] for level in results["levels"]], [1, 2])
+        for level in results["levels"]:
+            self.assertEqual((level["jobs"], level["error_rate"]), (2, 0.0))
+            self.assertGreater(level["disk_growth_bytes"], 0)
+        self.assertIn(results["knee"], (1, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import from workflow
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import checkpoints
+import workflow
+
+class TestCheckpointedRuns(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.calls = []
+        self.video_fails = True
+        self.crash_scenes = False
+        self.tests_fail = False
+        
+        def record(name, value):
+            def node(*args, **kwargs):
+                self.calls.append(name)
+                return value
+            return node
+        
+        def generate_test_cases(wrong_code):
+            self.calls.append("tests")
+            if self.tests_fail:
+                raise ConnectionError("rate limited")
+            return [[[1], 1, "case"]]
+        
+        def iter_scenes(steps, benchmark="", problem=""):
+            self.calls.append("scenes")
+            if self.crash_scenes:
+                raise KeyboardInterrupt()
+            yield 0, "scene code"
+        
+        def execute_video_stream(scene_iter):
+            list(scene_iter)
+            self.calls.append("video")
+            return "" if self.video_fails else "final.mp4"
+        
+        self.patches = [
+            mock.patch.object(checkpoints, "_checkpointers", {}),
+            mock.patch.object(workflow, "scrape_website", record("scrape", {"question": "q", "test_cases": []})),
+            mock.patch.object(workflow, "profile_code", record("profile", {"complexity": "", "timings": [], "error": ""})),
+            mock.patch.object(workflow, "generate_steps", record("steps", ["Step 1"])),
+            mock.patch.object(workflow, "generate_test_cases", generate_test_cases),
+            mock.patch.object(workflow, "iter_scenes", iter_scenes),
+            mock.patch.object(workflow, "execute_video_stream", execute_video_stream),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.graph = workflow.create_workflow(
+            pipeline=True, checkpointer=checkpoints.get_checkpointer(os.path.join(self.tmp_dir, "checkpoints.sqlite"))
+        )
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_failed_run_resumes_from_failed_node(self):
+        result = workflow.run_workflow("https://example.com/p", "def f(): pass", graph=self.graph, thread_id="job-1")
+        self.assertIn("no video was produced", result["error"])
+        self.assertEqual(workflow.list_jobs(self.graph)[0]["status"], "failed")
+        
+        self.calls.clear()
+        self.video_fails = False
+        result = workflow.resume_workflow("job-1", graph=self.graph)
+        
+        self.assertEqual(result["video_path"], "final.mp4")
+        self.assertFalse(result["error"])
+        self.assertEqual(result["problem_description"], "q")
+        self.assertEqual(self.calls, ["scenes", "video"])
+        self.assertEqual(workflow.list_jobs(self.graph)[0]["status"], "completed")
+    
+    def test_failed_branch_resumes_without_the_branches_that_succeeded(self):
+        self.tests_fail = True
+        self.video_fails = False
+        result = workflow.run_workflow("https://example.com/p", "def f(): pass", graph=self.graph, thread_id="job-4")
+        self.assertIn("rate limited", result["error"])
+        
+        self.calls.clear()
+        self.tests_fail = False
+        result = workflow.resume_workflow("job-4", graph=self.graph)
+        
+        self.assertEqual(result["video_path"], "final.mp4")
+        self.assertFalse(result["error"])
+        self.assertEqual((result["problem_description"], result["steps"]), ("q", ["Step 1"]))
+        self.assertEqual(self.calls, ["tests", "scenes", "video"])
+    
+    def test_interrupted_run_resumes_from_last_checkpoint(self):
+        self.crash_scenes = True
+        self.video_fails = False
+        with self.assertRaises(KeyboardInterrupt):
+            workflow.run_workflow("https://example.com/p", "def f(): pass", graph=self.graph, thread_id="job-2")
+        jobs = workflow.list_jobs(self.graph)
+        self.assertEqual((jobs[0]["status"], jobs[0]["next"]), ("interrupted", ["scene_video_generation"]))
+        
+        self.calls.clear()
+        self.crash_scenes = False
+        result = workflow.resume_workflow("job-2", graph=self.graph)
+        
+        self.assertEqual(result["video_path"], "final.mp4")
+        self.assertEqual(self.calls, ["scenes", "video"])
+    
+    def test_completed_run_is_not_rerun(self):
+        self.video_fails = False
+        workflow.run_workflow("https://example.com/p", "def f(): pass", graph=self.graph, thread_id="job-3")
+        self.calls.clear()
+        
+        self.assertEqual(workflow.resume_workflow("job-3", graph=self.graph)["video_path"], "final.mp4")
+        self.assertEqual(self.calls, [])
+    
+    def test_unknown_thread(self):
+        with self.assertRaises(ValueError):
+            workflow.resume_workflow("missing", graph=self.graph)
+
+if __name__ == '__main__':
+    unittest.main()
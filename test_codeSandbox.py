@@ -0,0 +1,123 @@
+import unittest
+import os
+import sys
+import json
+from unittest import mock
+
+# Add the parent directory to the path so we can import from codeSandbox
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import testCaseGenrationNode
+from codeSandbox import parse_signature, normalize_inputs, run_case, run_cases
+from testCaseGenrationNode import generate_test_cases
+
+TWO_SUM = """
+    def two_sum(nums, target):
+        for i in range(len(nums)):
+            for j in range(len(nums)):
+                if nums[i] + nums[j] == target:
+                    return [i, j]
+        return None
+"""
+
+SOLUTION = """
+class Solution:
+    def _helper(self, x):
+        return x
+
+    def maxProfit(self, prices: List[int]) -> int:
+        print("debug output")
+        return max(prices) - min(prices)
+"""
+
+class TestParseSignature(unittest.TestCase):
+    def test_indented_function(self):
+        self.assertEqual(parse_signature(TWO_SUM), {"function": "two_sum", "params": ["nums", "target"], "annotations": {}, "class_name": None})
+    
+    def test_solution_method_skips_self_and_private_helpers(self):
+        self.assertEqual(parse_signature(SOLUTION), {"function": "maxProfit", "params": ["prices"], "annotations": {"prices": "List[int]"}, "class_name": "Solution"})
+    
+    def test_multiline_signature_with_defaults(self):
+        code = "def f(\n    a: int,\n    b: Dict[str, int] = {},\n) -> int:\n    return a\n"
+        self.assertEqual(parse_signature(code)["params"], ["a", "b"])
+    
+    def test_invalid_code(self):
+        with self.assertRaises(ValueError):
+            parse_signature("def broken(:\n")
+        with self.assertRaises(ValueError):
+            parse_signature("x = 1\n")
+    
+    def test_normalize_inputs(self):
+        self.assertEqual(normalize_inputs({"target": 9, "nums": [2, 7]}, ["nums", "target"]), [[2, 7], 9])
+        self.assertEqual(normalize_inputs([1, 2, 3], ["prices"]), [[1, 2, 3]])
+        self.assertEqual(normalize_inputs([[1, 2, 3]], ["prices"]), [[1, 2, 3]])
+
+class TestSandbox(unittest.TestCase):
+    def test_actual_outputs_and_runtimes(self):
+        results = run_cases(TWO_SUM, parse_signature(TWO_SUM), [[[2, 7, 11, 15], 9], [[3, 3], 6], [[1], 5]])
+        
+        self.assertEqual([r["output"] for r in results], [[0, 1], [0, 0], None])
+        self.assertTrue(all(r["error"] == "" and r["runtime_ms"] >= 0 for r in results))
+    
+    def test_solution_class_with_prints(self):
+        result = run_case(SOLUTION, parse_signature(SOLUTION), [[7, 1, 5]])
+        
+        self.assertEqual(result["output"], 6)
+        self.assertEqual(result["error"], "")
+    
+    def test_exception_is_reported(self):
+        code = "def div(a, b):\n    return a / b\n"
+        result = run_case(code, parse_signature(code), [1, 0])
+        
+        self.assertEqual(result["error"], "ZeroDivisionError: division by zero")
+    
+    def test_runaway_loop_is_stopped(self):
+        code = "def spin(n):\n    while True:\n        n += 1\n"
+        result = run_case(code, parse_signature(code), [0], timeout=1)
+        
+        self.assertTrue(result["error"])
+        self.assertIsNone(result["output"])
+    
+    def test_printed_result_is_not_trusted(self):
+        code = "import os, json\ndef forge(n):\n    print(json.dumps({'output': 42, 'runtime_ms': 0.0, 'error': ''}))\n    os._exit(0)\n"
+        result = run_case(code, parse_signature(code), [0])
+        
+        self.assertIsNone(result["output"])
+        self.assertEqual(result["error"], "Exited with code 0")
+    
+    @unittest.skipUnless(sys.platform.startswith("linux"), "RLIMIT_AS is only enforced on Linux")
+    def test_memory_limit(self):
+        code = "def grow(n):\n    return len(bytearray(n))\n"
+        result = run_case(code, parse_signature(code), [4 * 1024 ** 3])
+        
+        self.assertEqual(result["error"], "Memory limit exceeded")
+
+class TestGenerateTestCases(unittest.TestCase):
+    def test_llm_proposes_inputs_and_sandbox_fills_actual_outputs(self):
+        reply = "```json\n" + json.dumps({"test_cases": [
+            {"inputs": [[2, 7, 11, 15], 9], "expected_output": [0, 1], "explanation": "normal"},
+            {"inputs": [[3, 2, 4], 6], "expected_output": [1, 2], "explanation": "reuses an index"},
+        ]}) + "\n```"
+        with mock.patch.object(testCaseGenrationNode, "invoke_llm", return_value=reply) as invoke:
+            test_cases = generate_test_cases(TWO_SUM)
+        
+        prompt = invoke.call_args[0][0][0].content
+        self.assertIn("'two_sum'", prompt)
+        self.assertNotIn("actual_output", prompt)
+        self.assertEqual([tc[:4] for tc in test_cases], [
+            [[[2, 7, 11, 15], 9], [0, 1], "normal", [0, 1]],
+            [[[3, 2, 4], 6], [1, 2], "reuses an index", [0, 0]],
+        ])
+        self.assertTrue(all(isinstance(tc[4], float) for tc in test_cases))
+
+    def test_sandbox_failure_runs_the_cases_once(self):
+        reply = "```json\n" + json.dumps({"test_cases": [{"inputs": [[3, 3], 6], "expected_output": [0, 1], "explanation": "duplicates"}]}) + "\n```"
+        with mock.patch.object(testCaseGenrationNode, "invoke_llm", return_value=reply), \
+             mock.patch.object(testCaseGenrationNode, "run_cases", side_effect=OSError("no processes left")) as run_cases:
+            test_cases = generate_test_cases(TWO_SUM)
+        
+        self.assertEqual(run_cases.call_count, 1)
+        self.assertEqual(test_cases[0][0], ["Sample input"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add the parent directory to the path so we can import from complexityProfiler
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import complexityProfiler
+from codeSandbox import parse_signature
+from complexityProfiler import fit_complexity, generate_inputs, profile_code, format_profile
+
+TWO_SUM = """
+    def two_sum(nums, target):
+        for i in range(len(nums)):
+            for j in range(len(nums)):
+                if nums[i] + nums[j] == target:
+                    return [i, j]
+        return None
+"""
+
+class TestFitComplexity(unittest.TestCase):
+    def timings(self, f):
+        return [{"n": n, "ms": f(n)} for n in (64, 128, 256, 512, 1024, 2048)]
+    
+    def test_known_curves(self):
+        self.assertEqual(fit_complexity(self.timings(lambda n: 0.002 * n)), "O(n)")
+        self.assertEqual(fit_complexity(self.timings(lambda n: 0.0001 * n * n)), "O(n^2)")
+        self.assertEqual(fit_complexity(self.timings(lambda n: 0.001 * n * (n.bit_length() - 1))), "O(n log n)")
+    
+    def test_runs_under_the_noise_floor_are_constant(self):
+        self.assertEqual(fit_complexity(self.timings(lambda n: 0.02)), "O(1)")
+    
+    def test_too_few_measurements(self):
+        self.assertEqual(fit_complexity([{"n": 64, "ms": 3.0}]), "")
+
+class TestProfileCode(unittest.TestCase):
+    def test_inputs_follow_annotations_and_names(self):
+        code = "def f(nums, target, s: str, grid: List[List[int]], n: int):\n    pass\n"
+        nums, target, s, grid, n = generate_inputs(parse_signature(code), 100)
+        
+        self.assertEqual(len(nums), 100)
+        self.assertEqual(target, 0)
+        self.assertEqual(len(s), 100)
+        self.assertEqual((len(grid), len(grid[0])), (10, 10))
+        self.assertEqual(n, 100)
+        self.assertEqual(generate_inputs(parse_signature(code), 100), generate_inputs(parse_signature(code), 100))
+    
+    def test_nested_loop_is_quadratic(self):
+        with mock.patch.object(complexityProfiler, "profile_min_size", 256), \
+             mock.patch.object(complexityProfiler, "profile_max_size", 4096):
+            profile = profile_code(TWO_SUM)
+        
+        self.assertEqual(profile["complexity"], "O(n^2)")
+        self.assertEqual([t["n"] for t in profile["timings"]], [256, 512, 1024, 2048, 4096])
+        self.assertIn("O(n^2)", format_profile(profile["complexity"], profile["timings"]))
+    
+    def test_profiling_stops_at_the_first_failure(self):
+        code = "def f(nums):\n    if len(nums) > 128:\n        raise ValueError('too big')\n    return sum(nums)\n"
+        profile = profile_code(code)
+        
+        self.assertEqual([t["n"] for t in profile["timings"]], [64, 128])
+        self.assertEqual(profile["error"], "")
+    
+    def test_code_without_a_function(self):
+        profile = profile_code("x = 1\n")
+        
+        self.assertEqual(profile["complexity"], "")
+        self.assertTrue(profile["error"])
+        self.assertEqual(format_profile(profile["complexity"], profile["timings"]), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path so we can import from contentReducer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contentReducer import reduce_content, split_chunks, merge_extractions, count_tokens
+
+STATEMENT = "Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target."
+
+NOISY_PAGE = f"""
+<html><head><script>var tracking = "{'x' * 2000}";</script><style>body {{ color: red; }}</style></head>
+<body>
+<nav>{' '.join(f'<a href="/p/{i}">Problem {i}</a>' for i in range(200))}</nav>
+<div class="layout">
+<div class="content">
+<p>{STATEMENT}</p>
+<pre>Example 1:
+Input: nums = [2,7,11,15], target = 9
+Output: [0,1]</pre>
+</div>
+<div class="sidebar">{' '.join(f'<a href="/d/{i}">Discussion thread {i}</a>' for i in range(100))}</div>
+</div>
+<footer>Copyright, terms, privacy, careers and more footer links</footer>
+</body></html>
+"""
+
+CODEFORCES_PAGE = f"""
+<html><body>
+<div id="header">Codeforces menu contests gym problemset groups rating</div>
+<div class="problem-statement"><div class="title">A. Two Sum</div><p>{STATEMENT}</p></div>
+<div class="comments">Great problem! {'Nice round. ' * 50}</div>
+</body></html>
+"""
+
+class TestContentReducer(unittest.TestCase):
+    def test_readability_fallback_drops_navigation_and_scripts(self):
+        reduced = reduce_content("https://example.com/problems/two-sum", NOISY_PAGE)
+        text = "\n".join(reduced["chunks"])
+        
+        self.assertEqual(reduced["rule"], "readability")
+        self.assertIn(STATEMENT, text)
+        self.assertIn("Input: nums = [2,7,11,15]", text)
+        for noise in ("tracking", "Problem 150", "Discussion thread", "Copyright"):
+            self.assertNotIn(noise, text)
+        self.assertGreater(reduced["stats"]["bytes_saved"], 0)
+        self.assertGreater(reduced["stats"]["tokens_saved"], 0)
+    
+    def test_site_rule_selects_problem_statement(self):
+        reduced = reduce_content("https://codeforces.com/problemset/problem/1/A", CODEFORCES_PAGE)
+        
+        self.assertEqual(reduced["rule"], "div.problem-statement")
+        self.assertEqual(len(reduced["chunks"]), 1)
+        self.assertIn("A. Two Sum", reduced["chunks"][0])
+        self.assertNotIn("Nice round", reduced["chunks"][0])
+    
+    def test_body_over_budget_is_chunked_on_paragraphs(self):
+        text = "\n".join(f"Paragraph {i}: " + "word " * 50 for i in range(20))
+        chunks = split_chunks(text, budget=100)
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(count_tokens(chunk) <= 100 for chunk in chunks))
+        self.assertEqual("\n".join(chunks), text)
+    
+    def test_merge_keeps_page_order_and_drops_duplicates(self):
+        merged = merge_extractions([
+            {"question": "Two Sum", "test_cases": ["Input: 1\nOutput: 1"]},
+            {"question": "", "test_cases": ["Input: 1\nOutput: 1", "Input: 2\nOutput: 2"]},
+            {"question": "Constraints: n <= 10^4", "test_cases": []},
+        ])
+        
+        self.assertEqual(merged["question"], "Two Sum\n\nConstraints: n <= 10^4")
+        self.assertEqual(merged["test_cases"], ["Input: 1\nOutput: 1", "Input: 2\nOutput: 2"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+import sys
+import json
+import subprocess
+
+# Add the parent and benchmarks directories to the path so we can import the import-time benchmark
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from bench_import import measure_import, over_budget, parse_importtime
+
+# Median cold-start import time allowed for the CLI and the graph, in ms (about 3x the measured time)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "400"))
+
+# Dependencies that must only be imported once a node actually runs
+LAZY_DEPENDENCIES = ("langchain", "langchain_core", "langchain_groq", "langgraph", "fastapi", "httpx", "bs4", "requests")
+
+class TestImportTime(unittest.TestCase):
+    def test_parse_importtime_reads_self_and_cumulative_times(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   posixpath",
+            "import time:      3000 |       3120 | main",
+        ])
+        entries = parse_importtime(stderr)
+        self.assertEqual([entry["module"] for entry in entries], ["posixpath", "main"])
+        self.assertEqual(entries[0]["depth"], 1)
+        self.assertEqual(entries[1], {"module": "main", "self_us": 3000, "cumulative_us": 3120, "depth": 0})
+    
+    def test_over_budget_lists_slow_modules(self):
+        results = {"main": {"median_ms": 90.0}, "service": {"median_ms": 600.0}}
+        self.assertEqual(over_budget(results, 400), ["service: 600.0 ms > 400.0 ms"])
+    
+    def test_cli_and_graph_import_within_budget(self):
+        for module in ("main", "workflow"):
+            totals = sorted(measure_import(module)["total_ms"] for _ in range(3))
+            self.assertLess(totals[1], IMPORT_TIME_BUDGET_MS, f"import {module} took {totals[1]:.1f} ms")
+    
+    def test_heavy_dependencies_are_not_imported_by_the_cli(self):
+        script = f"import json, sys, main; print(json.dumps([name for name in {list(LAZY_DEPENDENCIES)!r} if name in sys.modules]))"
+        result = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+    
+    def test_end_matches_langgraph(self):
+        from langgraph.graph import END
+        import workflow
+        self.assertEqual(workflow.END, END)
+
+if __name__ == "__main__":
+    unittest.main()
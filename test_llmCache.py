@@ -0,0 +1,173 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+# Add the parent and benchmarks directories to the path so we can import from llmCache and the shared fakes
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import llmCache
+from llmCache import LLMCache, SQLiteBackend, cached_invoke, cached_stream
+from fakes import FakeMessage, FakeResponse
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "cache.sqlite")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_key_ignores_trailing_whitespace_but_not_model(self):
+        cache = LLMCache()
+        key = cache.key("model-a", "Analyze:  \ndef f(x): return x\n\n")
+        self.assertEqual(key, cache.key("model-a", "Analyze:\ndef f(x): return x"))
+        self.assertNotEqual(key, cache.key("model-b", "Analyze:\ndef f(x): return x"))
+        self.assertNotEqual(key, cache.key("model-a", "Analyze:\ndef f(y): return y"))
+    
+    def test_key_keeps_indentation(self):
+        """Submissions that differ only in indentation are different code and must not share an entry."""
+        cache = LLMCache()
+        nested = "Analyze:\nfor x in xs:\n    if x:\n        return x\nreturn None"
+        flat = "Analyze:\nfor x in xs:\n    if x:\n        return x\n    return None"
+        self.assertNotEqual(cache.key("m", nested), cache.key("m", flat))
+        self.assertNotEqual(cache.key("m", "a  b"), cache.key("m", "a b"))
+    
+    def test_memory_lru_eviction(self):
+        cache = LLMCache(memory_size=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_backend_survives_restart(self):
+        """A new cache instance on the same database serves earlier responses."""
+        LLMCache(backend=SQLiteBackend(self.db_path)).set("k", "value")
+        cache = LLMCache(backend=SQLiteBackend(self.db_path))
+        
+        self.assertEqual(cache.get("k"), "value")
+        self.assertEqual(cache.get("k"), "value")
+        stats = cache.stats()
+        self.assertEqual((stats["backend_hits"], stats["memory_hits"]), (1, 1))
+    
+    def test_ttl_expiry(self):
+        cache = LLMCache(backend=SQLiteBackend(self.db_path), ttl=0.05)
+        cache.set("k", "value")
+        time.sleep(0.1)
+        
+        self.assertIsNone(cache.get("k"))
+        self.assertIsNone(cache.backend.get("k"))
+    
+    def test_backend_is_opened_on_first_use(self):
+        backend = SQLiteBackend(os.path.join(self.tmp_dir, "nested", "cache.sqlite"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "nested")))
+        backend.set("k", "v", time.time())
+        self.assertTrue(os.path.exists(backend.db_path))
+    
+    def test_build_cache_does_not_touch_the_disk(self):
+        db_path = os.path.join(self.tmp_dir, "lazy", "cache.sqlite")
+        with mock.patch.dict(os.environ, {"LLM_CACHE_PATH": db_path}):
+            cache = llmCache.build_cache()
+        self.assertFalse(os.path.exists(os.path.dirname(db_path)))
+        cache.set("k", "v")
+        self.assertTrue(os.path.exists(db_path))
+    
+    def test_unopenable_backend_falls_back_to_memory(self):
+        blocker = os.path.join(self.tmp_dir, "file")
+        open(blocker, "w").close()
+        cache = LLMCache(backend=SQLiteBackend(os.path.join(blocker, "cache.sqlite")))
+        cache.set("k", "v")
+        self.assertEqual(cache.get("k"), "v")
+        self.assertTrue(cache.backend.disabled)
+    
+    def test_expired_entry_delete_errors_are_handled(self):
+        backend = mock.Mock()
+        backend.get.return_value = ("old", time.time() - 100)
+        backend.delete.side_effect = RuntimeError("database is locked")
+        cache = LLMCache(backend=backend, ttl=1)
+        self.assertIsNone(cache.get("k"))
+        backend.delete.assert_called_once_with("k")
+    
+    def test_backend_size_eviction(self):
+        backend = SQLiteBackend(self.db_path)
+        for i in range(5):
+            backend.set(str(i), "v", time.time() + i)
+        backend.evict(max_entries=2, expired_before=0)
+        
+        self.assertEqual([k for k in map(str, range(5)) if backend.get(k)], ["3", "4"])
+    
+    def test_cached_invoke_calls_model_once(self):
+        chat = mock.Mock(model_name="mistral-saba-24B")
+        chat.invoke.return_value = FakeResponse("answer")
+        with mock.patch.object(llmCache, "llm_cache", LLMCache(backend=SQLiteBackend(self.db_path))):
+            first = cached_invoke(chat, [FakeMessage("prompt")])
+            second = cached_invoke(chat, [FakeMessage("prompt ")])
+            stats = llmCache.llm_cache.stats()
+        
+        self.assertEqual((first, second), ("answer", "answer"))
+        self.assertEqual(chat.invoke.call_count, 1)
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+    
+    def test_errors_are_not_cached(self):
+        chat = mock.Mock(model_name="m")
+        chat.invoke.side_effect = [RuntimeError("429"), FakeResponse("answer")]
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            with self.assertRaises(RuntimeError):
+                cached_invoke(chat, [FakeMessage("prompt")])
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")]), "answer")
+    
+    def test_completed_streams_are_cached(self):
+        chat = mock.Mock(model_name="m")
+        chat.stream.return_value = iter([FakeResponse("ans"), FakeResponse("wer")])
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            self.assertEqual(list(cached_stream(chat, [FakeMessage("prompt")])), ["ans", "wer"])
+            self.assertEqual(list(cached_stream(chat, [FakeMessage("prompt")])), ["answer"])
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")]), "answer")
+        self.assertEqual(chat.stream.call_count, 1)
+        chat.invoke.assert_not_called()
+    
+    def test_abandoned_streams_are_not_cached(self):
+        chat = mock.Mock(model_name="m")
+        chat.stream.return_value = iter([FakeResponse("ans"), FakeResponse("wer")])
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            chunks = cached_stream(chat, [FakeMessage("prompt")])
+            next(chunks)
+            chunks.close()
+            self.assertIsNone(llmCache.llm_cache.get(llmCache.llm_cache.key("m", "prompt")))
+
+    def test_rejected_replies_are_not_cached(self):
+        chat = mock.Mock(model_name="m")
+        chat.invoke.side_effect = [FakeResponse("not json"), FakeResponse("{}")]
+        is_json = lambda content: content.startswith("{")
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")], validate=is_json), "not json")
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")], validate=is_json), "{}")
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")], validate=is_json), "{}")
+        self.assertEqual(chat.invoke.call_count, 2)
+    
+    def test_cached_replies_the_validator_rejects_are_dropped(self):
+        chat = mock.Mock(model_name="m")
+        chat.invoke.return_value = FakeResponse("{}")
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            llmCache.llm_cache.set(llmCache.llm_cache.key("m", "prompt"), "stale bad reply")
+            self.assertEqual(cached_invoke(chat, [FakeMessage("prompt")], validate=lambda content: content == "{}"), "{}")
+        chat.invoke.assert_called_once()
+    
+    def test_rejected_streams_are_not_cached(self):
+        chat = mock.Mock(model_name="m")
+        chat.stream.side_effect = lambda messages: iter([FakeResponse("bad")])
+        with mock.patch.object(llmCache, "llm_cache", LLMCache()):
+            for _ in range(2):
+                self.assertEqual("".join(cached_stream(chat, [FakeMessage("prompt")], validate=lambda content: False)), "bad")
+        self.assertEqual(chat.stream.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add the parent directory to the path so we can import from llmClient
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llmCache
+import llmClient
+from llmClient import get_chat, invoke_llm, stream_llm
+from rateLimiter import LocalBuckets, RateLimiter
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Groq (OpenAI-compatible) chat completions endpoint."""
+    
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    requests = []
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append({"path": self.path, "port": self.client_address[1], "body": body})
+        status = type(self).statuses.pop(0) if type(self).statuses else 200
+        if status == 200 and body.get("stream"):
+            self.send_stream(body)
+            return
+        if status == 200:
+            payload = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"echo: {body['messages'][-1]['content']}"},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+            }
+        else:
+            payload = {"error": {"message": "slow down", "type": "rate_limit"}}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def send_stream(self, body):
+        """Answer a streaming request with server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        words = f"echo: {body['messages'][-1]['content']}".split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+    
+    def log_message(self, *args):
+        pass
+
+class TestLLMClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        ChatCompletionsHandler.statuses = []
+        ChatCompletionsHandler.requests = []
+        self.patches = [
+            mock.patch.object(llmClient, "groq_api_base", f"http://127.0.0.1:{self.server.server_address[1]}"),
+            mock.patch.object(llmClient, "groq_api_key", "test-key"),
+            mock.patch.object(llmClient, "llm_backoff_base", 0.01),
+            mock.patch.object(llmCache, "llm_cache", llmCache.LLMCache(enabled=False)),
+            mock.patch.object(llmClient, "rate_limiter", RateLimiter(LocalBuckets(0, 0), max_concurrency=10)),
+        ]
+        for patch in self.patches:
+            patch.start()
+        llmClient.reset_clients()
+    
+    def tearDown(self):
+        llmClient.reset_clients()
+        for patch in self.patches:
+            patch.stop()
+    
+    def test_client_is_shared_per_model(self):
+        self.assertIs(get_chat(), get_chat())
+        self.assertIsNot(get_chat(), get_chat("other-model"))
+        self.assertEqual(get_chat().model_name, llmClient.model_name)
+    
+    def test_connections_are_reused(self):
+        """Consecutive calls go over one keep-alive connection."""
+        for i in range(3):
+            self.assertEqual(invoke_llm(f"prompt {i}"), f"echo: prompt {i}")
+        
+        self.assertEqual(len(ChatCompletionsHandler.requests), 3)
+        self.assertEqual(len({r["port"] for r in ChatCompletionsHandler.requests}), 1)
+        self.assertTrue(ChatCompletionsHandler.requests[0]["path"].endswith("/chat/completions"))
+        self.assertEqual(ChatCompletionsHandler.requests[0]["body"]["model"], llmClient.model_name)
+    
+    def test_rate_limits_are_retried(self):
+        ChatCompletionsHandler.statuses = [429, 503]
+        self.assertEqual(invoke_llm("hello"), "echo: hello")
+        self.assertEqual(len(ChatCompletionsHandler.requests), 3)
+    
+    def test_retries_are_bounded(self):
+        ChatCompletionsHandler.statuses = [429] * 10
+        with mock.patch.object(llmClient, "llm_max_retries", 2):
+            with self.assertRaises(Exception):
+                invoke_llm("hello")
+        self.assertEqual(len(ChatCompletionsHandler.requests), 3)
+    
+    def test_rate_limits_shrink_concurrency(self):
+        ChatCompletionsHandler.statuses = [429]
+        invoke_llm("hello")
+        self.assertEqual(llmClient.rate_limiter.stats()["rate_limited"], 1)
+        self.assertLess(llmClient.rate_limiter.stats()["concurrency_limit"], 10)
+    
+    def test_client_errors_are_not_retried(self):
+        ChatCompletionsHandler.statuses = [400]
+        with self.assertRaises(Exception):
+            invoke_llm("hello")
+        self.assertEqual(len(ChatCompletionsHandler.requests), 1)
+    
+    def test_stream_yields_chunks_as_they_arrive(self):
+        chunks = list(stream_llm("one two three"))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "echo: one two three")
+        self.assertTrue(ChatCompletionsHandler.requests[0]["body"]["stream"])
+        self.assertEqual(llmClient.rate_limiter.stats()["in_flight"], 0)
+    
+    def test_stream_is_retried_before_the_first_chunk(self):
+        ChatCompletionsHandler.statuses = [429, 503]
+        self.assertEqual("".join(stream_llm("hello")), "echo: hello")
+        self.assertEqual(len(ChatCompletionsHandler.requests), 3)
+    
+    def test_closed_stream_releases_the_rate_limiter(self):
+        chunks = stream_llm("one two three")
+        next(chunks)
+        chunks.close()
+        self.assertEqual(llmClient.rate_limiter.stats()["in_flight"], 0)
+    
+    def test_backoff_has_jitter_and_cap(self):
+        with mock.patch.object(llmClient, "llm_backoff_base", 1), mock.patch.object(llmClient, "llm_backoff_max", 5):
+            delays = [llmClient.backoff_delay(10) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 5 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import from main
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from workflow import END
+
+class TestBatchMode(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.jobs_path = os.path.join(self.tmp_dir, "jobs.jsonl")
+        self.output_path = os.path.join(self.tmp_dir, "results.jsonl")
+        with open(self.jobs_path, "w") as f:
+            for i in range(4):
+                f.write(json.dumps({"id": f"job{i}", "link": f"https://example.com/{i}", "wrong_code": "def f(x): return x"}) + "\n")
+            f.write(json.dumps({"link": "https://example.com/fail", "wrong_code": "def g(): pass"}) + "\n")
+        self.ran = []
+        
+        def fake_stream(link, wrong_code, priority_level, graph, thread_id):
+            self.ran.append(link)
+            self.assertIs(graph, main.create_workflow.return_value)
+            yield "web_scraping", {"problem_description": "q"}
+            if link.endswith("fail"):
+                yield END, {"error": "Error in web scraping: boom", "video_path": ""}
+            else:
+                yield END, {"error": "", "video_path": f"{link}.mp4"}
+        
+        self.patches = [
+            mock.patch.object(main, "create_workflow", return_value=mock.Mock(checkpointer=None)),
+            mock.patch.object(main, "stream_workflow", side_effect=fake_stream),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def read_results(self):
+        with open(self.output_path) as f:
+            return [json.loads(line) for line in f]
+    
+    def test_batch_writes_one_record_per_job(self):
+        records = main.run_batch(self.jobs_path, self.output_path, workers=3)
+        results = self.read_results()
+        
+        self.assertEqual(len(records), 5)
+        self.assertEqual(main.create_workflow.call_count, 1)
+        self.assertEqual(sorted(r["id"] for r in results), sorted(r["id"] for r in records))
+        failed = [r for r in results if r["status"] == "error"]
+        self.assertEqual(len(failed), 1)
+        self.assertIn("boom", failed[0]["error"])
+        self.assertIn("web_scraping", results[0]["node_timings"])
+    
+    def test_resume_skips_completed_jobs(self):
+        """Only failed or missing jobs run again, and a truncated last line is ignored."""
+        with open(self.output_path, "w") as f:
+            f.write(json.dumps({"id": "job0", "status": "ok"}) + "\n")
+            f.write(json.dumps({"id": "job1", "status": "error"}) + "\n")
+            f.write('{"id": "job2", "sta')
+        main.run_batch(self.jobs_path, self.output_path, workers=2)
+        
+        self.assertEqual(sorted(self.ran), ["https://example.com/1", "https://example.com/2", "https://example.com/3", "https://example.com/fail"])
+        self.assertEqual(main.completed_job_ids(self.output_path), {"job0", "job1", "job2", "job3"})
+
+    def test_failed_resume_does_not_report_a_stale_video(self):
+        graph = mock.Mock()
+        graph.get_state.return_value.values = {"link": "https://example.com/0"}
+        resumed = {"error": "Error in video execution: no video was produced", "video_path": "old.mp4"}
+        with mock.patch.object(main, "resume_workflow", return_value=resumed):
+            record = main.run_job({"id": "job0", "link": "https://example.com/0", "wrong_code": "x"}, graph)
+        
+        self.assertTrue(record["resumed"])
+        self.assertEqual((record["status"], record["video_path"]), ("error", ""))
+
+if __name__ == '__main__':
+    unittest.main()
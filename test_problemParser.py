@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to the path so we can import from problemParser
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import telemetry
+from problemParser import ProblemParser, text_examples, split_question
+
+CODEFORCES_PAGE = """
+<html><body>
+<div class="problem-statement">
+<div class="header"><div class="title">A. Watermelon</div></div>
+<div><p>Pete and Billy bought a watermelon of w kilos. Can they divide it into two parts, each weighing an even number of kilos?</p></div>
+<div class="sample-tests"><div class="section-title">Examples</div>
+<div class="sample-test">
+<div class="input"><div class="title">Input</div><pre>8<br/></pre></div>
+<div class="output"><div class="title">Output</div><pre>YES<br/></pre></div>
+</div></div>
+</div>
+</body></html>
+"""
+
+ATCODER_PAGE = """
+<html><body><div id="task-statement"><span class="lang-en">
+<h3>Problem Statement</h3><p>Given two integers A and B, print the sum of A and B on a single line.</p>
+<h3>Sample Input 1</h3><pre>1 2
+</pre>
+<h3>Sample Output 1</h3><pre>3
+</pre>
+<h3>Sample Input 2</h3><pre>10 -4
+</pre>
+<h3>Sample Output 2</h3><pre>6
+</pre>
+</span></div></body></html>
+"""
+
+LEETCODE_PAGE = """
+<html><head><meta name="description" content="Given a string s, return the length of the longest substring without repeating characters.
+
+Example 1:
+
+Input: s = &quot;abcabcbb&quot;
+Output: 3
+Explanation: The answer is &quot;abc&quot;.
+
+Example 2:
+
+Input: s = &quot;bbbbb&quot;
+Output: 1
+
+Constraints:
+ * 0 &lt;= s.length &lt;= 5 * 10^4"></head><body><div id="app"></div></body></html>
+"""
+
+# No site rule matches, so the generic fallback removes the <aside> that holds the samples
+ASIDE_SAMPLES_PAGE = """
+<html><body><main><h1>Digit Sum</h1>
+<p>Given a positive integer n, print the sum of its decimal digits on a single line of output.</p></main>
+<aside class="samples"><div class="sample-test">
+<div class="input"><pre>123</pre></div>
+<div class="output"><pre>6</pre></div>
+</div></aside></body></html>
+"""
+
+UNSTRUCTURED_PAGE = """
+<html><body><div class="blog"><p>Today we look at a classic interview question about arrays and how to reason about it.</p></div></body></html>
+"""
+
+class TestProblemParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = ProblemParser()
+    
+    def test_codeforces_sample_tests(self):
+        result = self.parser.parse("https://codeforces.com/problemset/problem/4/A", CODEFORCES_PAGE)
+        
+        self.assertIn("Pete and Billy", result["question"])
+        self.assertNotIn("Examples", result["question"])
+        self.assertEqual(result["test_cases"], ["Input: 8\nOutput: YES"])
+    
+    def test_labelled_sample_blocks(self):
+        result = self.parser.parse("https://atcoder.jp/contests/abc000/tasks/abc000_a", ATCODER_PAGE)
+        
+        self.assertIn("print the sum of A and B", result["question"])
+        self.assertEqual(result["test_cases"], ["Input: 1 2\nOutput: 3", "Input: 10 -4\nOutput: 6"])
+    
+    def test_leetcode_description_examples(self):
+        result = self.parser.parse("https://leetcode.com/problems/longest-substring-without-repeating-characters/", LEETCODE_PAGE)
+        
+        self.assertEqual(result["question"], "Given a string s, return the length of the longest substring without repeating characters.")
+        self.assertEqual(result["test_cases"], ['Input: s = "abcabcbb"\nOutput: 3', 'Input: s = "bbbbb"\nOutput: 1'])
+    
+    def test_samples_outside_the_main_text(self):
+        result = self.parser.parse("https://judge.example.com/problems/digit-sum", ASIDE_SAMPLES_PAGE)
+        
+        self.assertIn("sum of its decimal digits", result["question"])
+        self.assertEqual(result["test_cases"], ["Input: 123\nOutput: 6"])
+    
+    def test_unstructured_page_falls_back_and_counts_a_miss(self):
+        hits = telemetry.parser_requests.value(result="parsed")
+        misses = telemetry.parser_requests.value(result="fallback")
+        self.parser.parse("https://leetcode.com/problems/two-sum/", LEETCODE_PAGE)
+        result = self.parser.parse("https://example.com/blog/arrays", UNSTRUCTURED_PAGE)
+        
+        self.assertIsNone(result)
+        self.assertEqual(self.parser.stats(), {"hits": 1, "misses": 1, "hit_rate": 0.5})
+        self.assertEqual(telemetry.parser_requests.value(result="parsed"), hits + 1)
+        self.assertEqual(telemetry.parser_requests.value(result="fallback"), misses + 1)
+    
+    def test_disabled_parser_always_defers_to_the_llm(self):
+        parser = ProblemParser(enabled=False)
+        
+        self.assertIsNone(parser.parse("https://codeforces.com/problemset/problem/4/A", CODEFORCES_PAGE))
+        self.assertEqual(parser.stats()["hits"], 0)
+    
+    def test_text_rules_on_llm_reply(self):
+        reply = "Reverse a list.\nExample 1:\nInput: [1,2]\nOutput: [2,1]\nExample 2:\nInput: []\nOutput: []"
+        
+        self.assertEqual(split_question(reply), "Reverse a list.")
+        self.assertEqual(text_examples(reply), ["Input: [1,2]\nOutput: [2,1]", "Input: []\nOutput: []"])
+
+if __name__ == "__main__":
+    unittest.main()
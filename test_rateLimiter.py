@@ -0,0 +1,115 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path so we can import from rateLimiter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rateLimiter import BATCH, INTERACTIVE, LocalBuckets, RateLimiter, SQLiteBuckets, current_priority, priority
+
+class TestBuckets(unittest.TestCase):
+    def test_requests_per_minute(self):
+        buckets = LocalBuckets(requests_per_minute=120, tokens_per_minute=0)
+        for _ in range(120):
+            self.assertEqual(buckets.try_take(1, 0), 0)
+        wait = buckets.try_take(1, 0)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.5)
+    
+    def test_tokens_per_minute_and_adjustment(self):
+        buckets = LocalBuckets(requests_per_minute=0, tokens_per_minute=1000)
+        self.assertEqual(buckets.try_take(1, 900), 0)
+        self.assertGreater(buckets.try_take(1, 500), 0)
+        # The call only used 100 of the 900 reserved tokens
+        buckets.adjust_tokens(800)
+        self.assertEqual(buckets.try_take(1, 500), 0)
+    
+    def test_sqlite_buckets_are_shared(self):
+        """Two limiters on the same database draw from the same buckets."""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "limits.sqlite")
+            first = SQLiteBuckets(60, 0, path)
+            second = SQLiteBuckets(60, 0, path)
+            taken = sum(1 for i in range(70) if (first if i % 2 else second).try_take(1, 0) == 0)
+            self.assertEqual(taken, 60)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_priority_order(self):
+        """Interactive callers are admitted before batch callers that queued earlier."""
+        limiter = RateLimiter(LocalBuckets(0, 0), max_concurrency=1)
+        limiter.acquire()
+        order = []
+        
+        def call(name, level):
+            limiter.acquire(priority_level=level)
+            order.append(name)
+            limiter.release()
+        
+        threads = [threading.Thread(target=call, args=(f"batch{i}", BATCH)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        threads.append(threading.Thread(target=call, args=("interactive", INTERACTIVE)))
+        threads[-1].start()
+        time.sleep(0.05)
+        
+        limiter.release()
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(order, ["interactive", "batch0", "batch1", "batch2"])
+    
+    def test_waits_for_bucket_refill(self):
+        limiter = RateLimiter(LocalBuckets(requests_per_minute=600, tokens_per_minute=0), max_concurrency=10)
+        limiter.buckets.state["requests"] = (0, time.monotonic())
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+    
+    def test_adaptive_concurrency(self):
+        limiter = RateLimiter(LocalBuckets(0, 0), max_concurrency=8)
+        limiter.acquire()
+        limiter.release(rate_limited=True)
+        self.assertEqual(limiter.stats()["concurrency_limit"], 4)
+        for _ in range(30):
+            limiter.acquire()
+            limiter.release()
+        self.assertEqual(limiter.stats()["concurrency_limit"], 8)
+    
+    def test_slow_buckets_do_not_block_release(self):
+        """A bucket update waiting on another process does not hold up release() and stats()."""
+        taking = threading.Event()
+        finish = threading.Event()
+        
+        class SlowBuckets(LocalBuckets):
+            def try_take(self, requests, tokens):
+                taking.set()
+                finish.wait(2)
+                return super().try_take(requests, tokens)
+        
+        limiter = RateLimiter(SlowBuckets(0, 0), max_concurrency=4)
+        waiter = threading.Thread(target=limiter.acquire)
+        waiter.start()
+        self.assertTrue(taking.wait(2))
+        
+        start = time.monotonic()
+        self.assertEqual(limiter.stats()["queued"], 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+        finish.set()
+        waiter.join(2)
+        self.assertEqual(limiter.stats()["in_flight"], 1)
+    
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with priority(BATCH):
+            self.assertEqual(current_priority(), BATCH)
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+if __name__ == '__main__':
+    unittest.main()
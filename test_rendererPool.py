@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add the parent directory to the path so we can import from rendererPool
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rendererPool
+import videoExecutionScript
+from assetCache import AssetCache
+from rendererPool import RendererPool
+
+def fake_render(scene_file, scene_name, media_dir, quality):
+    """Stand-in for manim_render: writes the worker's pid as the video, or fails on request."""
+    source = open(scene_file).read()
+    if "CRASH" in source:
+        os._exit(3)
+    if "HANG" in source:
+        time.sleep(60)
+    if "FAIL" in source:
+        raise ValueError("bad scene")
+    os.makedirs(media_dir, exist_ok=True)
+    video_path = os.path.join(media_dir, f"{scene_name}.mp4")
+    with open(video_path, "w") as f:
+        f.write(f"{os.getpid()} {quality}")
+    return video_path
+
+class TestRendererPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pools = []
+    
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close()
+        shutil.rmtree(self.tmp_dir)
+    
+    def pool(self, **kwargs):
+        settings = {"size": 1, "renderer": "test_rendererPool:fake_render", "preload": [], "timeout": 30}
+        settings.update(kwargs)
+        pool = RendererPool(**settings)
+        self.pools.append(pool)
+        return pool
+    
+    def render(self, pool, n, source="scene"):
+        scene_file = os.path.join(self.tmp_dir, f"step_{n}_scene.py")
+        with open(scene_file, "w") as f:
+            f.write(source)
+        video_path = pool.render(scene_file, f"Step{n}Scene", os.path.join(self.tmp_dir, "media", f"step_{n}"), "l")
+        with open(video_path) as f:
+            return f.read().split()[0]
+    
+    def test_worker_is_reused_across_jobs(self):
+        pool = self.pool()
+        pids = {self.render(pool, n) for n in range(1, 4)}
+        self.assertEqual(len(pids), 1)
+        self.assertNotEqual(pids, {str(os.getpid())})
+        self.assertEqual(pool.stats()["started"], 1)
+    
+    def test_worker_is_recycled_after_max_jobs(self):
+        pool = self.pool(max_jobs=2)
+        pids = [self.render(pool, n) for n in range(1, 4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        stats = pool.stats()
+        self.assertEqual((stats["started"], stats["recycled"]), (2, 1))
+    
+    def test_render_error_keeps_the_worker(self):
+        pool = self.pool()
+        first = self.render(pool, 1)
+        with self.assertRaisesRegex(Exception, "ValueError: bad scene"):
+            self.render(pool, 2, "FAIL")
+        self.assertEqual(self.render(pool, 3), first)
+        self.assertEqual(pool.stats()["errors"], 1)
+    
+    def test_crashed_worker_is_replaced(self):
+        pool = self.pool()
+        first = self.render(pool, 1)
+        with self.assertRaisesRegex(Exception, "exited with code 3"):
+            self.render(pool, 2, "CRASH")
+        self.assertNotEqual(self.render(pool, 3), first)
+        self.assertEqual(pool.stats()["crashed"], 1)
+    
+    def test_hung_render_times_out(self):
+        pool = self.pool(timeout=1)
+        with self.assertRaisesRegex(Exception, "timed out"):
+            self.render(pool, 1, "HANG")
+        self.assertEqual(pool.stats()["workers"], 0)
+        self.render(pool, 2)
+    
+    def test_concurrent_renders_use_every_worker(self):
+        pool = self.pool(size=2)
+        pool.start()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pids = list(executor.map(lambda n: self.render(pool, n), range(1, 9)))
+        self.assertLessEqual(len(set(pids)), 2)
+        self.assertEqual(pool.stats()["started"], 2)
+
+class TestRenderSceneUsesPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pool = RendererPool(size=1, renderer="test_rendererPool:fake_render", preload=[], timeout=30)
+        self.patches = [
+            mock.patch.object(rendererPool, "render_pool_enabled", True),
+            mock.patch.object(rendererPool, "renderer_pool", self.pool),
+            mock.patch.object(videoExecutionScript, "asset_cache", AssetCache(os.path.join(self.tmp_dir, "assets"), max_bytes=1024)),
+            mock.patch.object(videoExecutionScript, "manim_command", ["false"]),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.pool.close()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_render_scene_goes_through_the_pool(self):
+        scene_file = os.path.join(self.tmp_dir, "step_1_scene.py")
+        with open(scene_file, "w") as f:
+            f.write("scene")
+        video_path = videoExecutionScript.render_scene(scene_file, "Step1Scene", os.path.join(self.tmp_dir, "media"))
+        with open(video_path) as f:
+            self.assertEqual(f.read().split()[1], videoExecutionScript.render_quality)
+        self.assertEqual(self.pool.stats()["jobs"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+import re
+import threading
+import time
+from unittest import mock
+
+# Add the parent and benchmarks directories to the path so we can import from sceneGenrationNode and the shared fakes
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import llmClient
+import sceneGenrationNode
+from sceneGenrationNode import generate_scenes
+from fakes import FakeResponse, chat_model
+
+class FakeChat:
+    """Chat model stand-in that answers scene prompts with a fenced code block."""
+    
+    def __init__(self, delays=None, failures=None):
+        self.delays = delays or {}
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+    
+    def invoke(self, messages):
+        step_number = int(re.search(r"Step(\d+)Scene", messages[0].content).group(1))
+        with self.lock:
+            self.calls.append(step_number)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(step_number, 0.05))
+            with self.lock:
+                if self.failures.get(step_number, 0) > 0:
+                    self.failures[step_number] -= 1
+                    raise ConnectionError("connection reset")
+            return FakeResponse(f"```python\nfrom manim import *\n\nclass Step{step_number}Scene(Scene):\n    def construct(self):\n        pass\n```")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+class TestGenerateScenes(unittest.TestCase):
+    def run_with(self, chat, steps, **kwargs):
+        with chat_model(chat), mock.patch.object(llmClient, "backoff_delay", return_value=0):
+            return generate_scenes(steps, **kwargs)
+    
+    def test_scenes_keep_step_order(self):
+        """Scenes come back in step order even when later steps finish first."""
+        chat = FakeChat(delays={1: 0.3, 2: 0.1, 3: 0.0})
+        scenes = self.run_with(chat, ["a", "b", "c"], max_concurrency=3)
+        
+        self.assertEqual(len(scenes), 3)
+        for i, scene in enumerate(scenes):
+            self.assertIn(f"class Step{i+1}Scene", scene)
+    
+    def test_iter_scenes_yields_in_completion_order(self):
+        chat = FakeChat(delays={1: 0.3, 2: 0.0})
+        with chat_model(chat):
+            order = [i for i, _ in sceneGenrationNode.iter_scenes(["a", "b"], max_concurrency=2)]
+        self.assertEqual(order, [1, 0])
+    
+    def test_iter_scenes_starts_before_the_last_step_arrives(self):
+        """Steps from a stream are submitted one by one, so scene 1 is ready while step 2 is still being written."""
+        chat = FakeChat(delays={1: 0.0})
+        step_written = threading.Event()
+        
+        def steps():
+            yield "a"
+            step_written.wait(5)
+            yield "b"
+        
+        with chat_model(chat):
+            scenes = sceneGenrationNode.iter_scenes(steps(), max_concurrency=2)
+            first = next(scenes)
+            step_written.set()
+            rest = list(scenes)
+        
+        self.assertEqual(first[0], 0)
+        self.assertIn("class Step1Scene", first[1])
+        self.assertEqual([i for i, _ in rest], [1])
+    
+    def test_step_stream_errors_are_raised(self):
+        def steps():
+            yield "a"
+            raise RuntimeError("stream broke")
+        
+        with chat_model(FakeChat()):
+            with self.assertRaises(RuntimeError):
+                list(sceneGenrationNode.iter_scenes(steps()))
+    
+    def test_concurrency_limit(self):
+        """No more than max_concurrency prompts are in flight at once."""
+        chat = FakeChat()
+        start = time.perf_counter()
+        self.run_with(chat, [f"step {i}" for i in range(8)], max_concurrency=4)
+        elapsed = time.perf_counter() - start
+        
+        self.assertEqual(chat.max_in_flight, 4)
+        self.assertLess(elapsed, 8 * 0.05)
+    
+    def test_failed_step_is_retried_alone(self):
+        """A failing step is retried without regenerating the other steps."""
+        chat = FakeChat(failures={2: 1})
+        scenes = self.run_with(chat, ["a", "b", "c"])
+        
+        self.assertEqual(sorted(chat.calls), [1, 2, 2, 3])
+        self.assertIn("class Step2Scene", scenes[1])
+    
+    def test_step_fallback_after_retries(self):
+        """A step that keeps failing gets a placeholder scene with the expected class name."""
+        chat = FakeChat(failures={2: 10})
+        scenes = self.run_with(chat, ["a", "b", "c"])
+        
+        self.assertEqual(chat.calls.count(2), sceneGenrationNode.scene_max_retries + 1)
+        self.assertIn("class Step2Scene", scenes[1])
+        self.assertIn("Error generating animation for step 2", scenes[1])
+        self.assertIn("class Step3Scene", scenes[2])
+
+if __name__ == '__main__':
+    unittest.main()
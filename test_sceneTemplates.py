@@ -0,0 +1,129 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import textwrap
+from unittest import mock
+
+# Add the parent directory to the path so we can import from sceneTemplates
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llmClient
+import sceneTemplates
+import videoExecutionScript
+from renderCache import RenderCache
+from sceneGenrationNode import generate_scenes
+from sceneTemplates import TEMPLATES, match_template, render_template, default_params, prewarm_templates
+from sceneValidator import validate_scene
+
+# Manim stand-in that writes the scene code as the "video"
+FAKE_MANIM = textwrap.dedent("""
+    import os, sys
+    args = sys.argv[1:]
+    media_dir = args[args.index("--media_dir") + 1]
+    scene_file, scene_name = args[-2], args[-1]
+    out_dir = os.path.join(media_dir, "videos", "scene", "480p15")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, scene_name + ".mp4"), "w") as f:
+        f.write(open(scene_file).read())
+""")
+
+PROBLEM = "Given an array of integers nums and an integer target, return indices of the two numbers that add up to target.\nExample 1:\nInput: nums = [3, 2, 4], target = 6\nOutput: [1, 2]"
+
+# Steps as the steps prompt writes them, with the template each should get (None: the LLM draws it)
+STEP_OUTPUTS = [
+    ("Step 1: The current code uses a nested loop to check all pairs of numbers, which is inefficient with O(n²) time complexity.", "nested_loops"),
+    ("Step 2: A more efficient approach is to use a hash map to store previously seen numbers and their indices.", "complement_lookup"),
+    ("Step 3: Move the left pointer right when the sum is too small and the right pointer left when it is too big.", "array_pointers"),
+    ("Step 4: Compare the O(n^2) brute force with the O(n) single pass: the gap grows with n.", "complexity_chart"),
+    ("Step 1: The code uses a dictionary to count characters.", None),
+    ("Step 2: The function dereferences a null pointer when the list is empty.", None),
+    ("Step 3: Instead of checking every pair of intervals, sort them by start time.", None),
+    ("Step 4: The loop variable shadows the function argument, so the original value is lost.", None),
+    ("Step 5: Return the answer as a list of two indices.", None),
+    ("Step 6: The time complexity is O(n log n) because of the sort.", None),
+]
+
+class TestTemplateClassifier(unittest.TestCase):
+    def test_step_outputs_are_classified(self):
+        for step, template in STEP_OUTPUTS:
+            match = match_template(step, PROBLEM)
+            self.assertEqual(match[0] if match else None, template, step)
+    
+    def test_one_keyword_is_not_enough(self):
+        for step in ("Use a dictionary to count characters", "It dereferences a null pointer", "Check every pair of intervals, sort them"):
+            self.assertIsNone(match_template(step, PROBLEM), step)
+    
+    def test_parameters_come_from_the_step_then_the_problem(self):
+        self.assertEqual(match_template("Use a hash map on nums = [1, 5, 9] with target = 14", PROBLEM)[1], {"values": [1, 5, 9], "target": 14})
+        self.assertEqual(match_template("Store seen values in a hash map", PROBLEM)[1], {"values": [3, 2, 4], "target": 6})
+        self.assertEqual(match_template("Nested loops over every pair of [1, 2, 3]")[1], {"values": [1, 2, 3]})
+        self.assertEqual(match_template("Move the left pointer or the right pointer of the sorted array", PROBLEM)[1], {"values": [2, 3, 4], "target": 6})
+        self.assertEqual(match_template("Compare O(n) versus O(n log n) and O(n*n)")[1], {"complexities": ["O(n)", "O(n log n)", "O(n^2)"]})
+    
+    def test_steps_without_data_go_to_the_llm(self):
+        self.assertIsNone(match_template("Store seen values in a hash map"))
+        self.assertIsNone(match_template("Use a nested loop over every pair"))
+    
+    def test_steps_with_the_same_data_share_a_scene(self):
+        with mock.patch.object(sceneTemplates, "scene_templates_enabled", True):
+            first = sceneTemplates.template_scene("Step 1: Use a nested loop to check every pair of [3, 1, 4, 1].", 1)
+            second = sceneTemplates.template_scene("Step 4: Checking all pairs of [3, 1, 4, 1] with nested loops is O(n^2).", 4)
+        self.assertEqual(first.replace("Step1Scene", "Step4Scene"), second)
+        cache = videoExecutionScript.render_cache
+        self.assertEqual(cache.key(first, "Step1Scene", "l"), cache.key(second, "Step4Scene", "l"))
+    
+    def test_templates_are_valid_scenes(self):
+        for name, params in default_params():
+            self.assertEqual(validate_scene(render_template(name, params, 3), 3), [], name)
+        self.assertEqual(len(default_params()), len(TEMPLATES))
+
+class TestTemplateScenes(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        manim_fake = os.path.join(self.tmp_dir, "manim_fake.py")
+        with open(manim_fake, "w") as f:
+            f.write(FAKE_MANIM)
+        self.cache = RenderCache(os.path.join(self.tmp_dir, "cache"), max_bytes=1024 * 1024)
+        self.patches = [
+            mock.patch.object(videoExecutionScript, "manim_command", [sys.executable, manim_fake]),
+            mock.patch.object(videoExecutionScript, "render_cache", self.cache),
+            mock.patch.object(sceneTemplates, "scene_templates_enabled", True),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_matched_steps_skip_the_llm(self):
+        with mock.patch.object(llmClient, "get_chat", side_effect=AssertionError("LLM called")):
+            scenes = generate_scenes(["Use a nested loop over every pair", "Store each seen value in a hash map"], problem=PROBLEM)
+        
+        self.assertIn("class Step1Scene(Scene)", scenes[0])
+        self.assertIn("Nested loops", scenes[0])
+        self.assertIn("values = [3, 2, 4]", scenes[0])
+        self.assertIn("class Step2Scene(Scene)", scenes[1])
+        self.assertIn("complement lookup", scenes[1])
+        self.assertIn("target = 6", scenes[1])
+    
+    def test_disabled_templates(self):
+        with mock.patch.object(sceneTemplates, "scene_templates_enabled", False):
+            self.assertIsNone(sceneTemplates.template_scene("Use a nested loop over every pair", 1))
+    
+    def test_prewarmed_templates_are_render_cache_hits_at_any_step(self):
+        results = prewarm_templates()
+        self.assertEqual([r["cached"] for r in results], [False] * len(TEMPLATES))
+        self.assertTrue(all(not r["error"] for r in results))
+        
+        output_dir = os.path.join(self.tmp_dir, "job")
+        os.makedirs(os.path.join(output_dir, "scenes"))
+        scene_code = sceneTemplates.template_scene("Step 7: Use a nested loop to check every pair of [3, 1, 4, 1].", 7)
+        result = videoExecutionScript.render_scene_job(6, scene_code, output_dir)
+        self.assertTrue(result["cached"])
+
+if __name__ == "__main__":
+    unittest.main()
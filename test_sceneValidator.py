@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import textwrap
+import time
+from unittest import mock
+
+# Add the parent and benchmarks directories to the path so we can import from sceneValidator and the shared fakes
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import sceneGenrationNode
+import videoExecutionScript
+from sceneValidator import validate_scene, dry_run_scene, star_import_names
+from sceneGenrationNode import generate_scenes
+from fakes import ScriptedChat, chat_model
+
+# Manim stand-in whose dry run fails on scenes that divide by zero
+FAKE_MANIM = textwrap.dedent("""
+    import sys
+    args = sys.argv[1:]
+    assert "--dry_run" in args
+    if "1 / 0" in open(args[-2]).read():
+        sys.exit("ZeroDivisionError: division by zero")
+""")
+
+def scene(n, body="self.play(Write(Text('hi')))", header="from manim import *\n\n", base="Scene", name=None):
+    return f"{header}class {name or f'Step{n}Scene'}({base}):\n    def construct(self):\n        {body}\n"
+
+def repair_chat(*scenes):
+    return ScriptedChat(*[f"```python\n{scene_code}\n```" for scene_code in scenes])
+
+class TestValidateScene(unittest.TestCase):
+    def test_valid_scene(self):
+        self.assertEqual(validate_scene(scene(1), 1), [])
+    
+    def test_syntax_error(self):
+        problems = validate_scene(scene(1, body="self.play(Write(Text('hi'))"), 1)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("Syntax error on line"))
+    
+    def test_wrong_class_name(self):
+        self.assertEqual(validate_scene(scene(2, name="TwoSumScene"), 2), ["The scene class must be named Step2Scene (classes found: TwoSumScene)"])
+    
+    def test_scene_base(self):
+        self.assertEqual(validate_scene(scene(1, base="object"), 1), ["Step1Scene must extend Scene from manim"])
+        self.assertEqual(validate_scene(scene(1, base="MovingCameraScene"), 1), [])
+    
+    def test_missing_import(self):
+        problems = validate_scene(scene(1, header="from manim import Scene\n\n"), 1)
+        self.assertEqual(problems, ["Name 'Text' is used but never defined or imported", "Name 'Write' is used but never defined or imported"])
+    
+    def test_star_imports_are_read_in_a_subprocess(self):
+        self.assertIn("check", star_import_names("tabnanny"))
+        self.assertNotIn("tabnanny", sys.modules)
+        self.assertEqual(star_import_names("no_such_module"), frozenset())
+    
+    def test_validation_takes_milliseconds(self):
+        start = time.perf_counter()
+        for n in range(1, 51):
+            validate_scene(scene(n), n)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+class TestDryRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        manim_fake = os.path.join(self.tmp_dir, "manim_fake.py")
+        with open(manim_fake, "w") as f:
+            f.write(FAKE_MANIM)
+        self.patch = mock.patch.object(videoExecutionScript, "manim_command", [sys.executable, manim_fake])
+        self.patch.start()
+    
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_dry_run_reports_construct_errors(self):
+        self.assertEqual(dry_run_scene(scene(1), 1), [])
+        self.assertEqual(dry_run_scene(scene(1, body="x = 1 / 0"), 1), ["Dry run failed: ZeroDivisionError: division by zero"])
+
+class TestSceneRepair(unittest.TestCase):
+    def run_with(self, chat, steps):
+        with chat_model(chat):
+            return generate_scenes(steps)
+    
+    def test_invalid_scene_is_repaired(self):
+        chat = repair_chat(scene(1, name="Intro"), scene(1))
+        scenes = self.run_with(chat, ["a"])
+        
+        self.assertEqual(scenes, [scene(1).strip()])
+        self.assertEqual(len(chat.prompts), 2)
+        self.assertIn("The scene class must be named Step1Scene", chat.prompts[1])
+        self.assertIn("class Intro(Scene)", chat.prompts[1])
+    
+    def test_repairs_are_bounded(self):
+        chat = repair_chat(scene(1, header=""))
+        with mock.patch.object(sceneGenrationNode, "scene_repair_retries", 2):
+            scenes = self.run_with(chat, ["a"])
+        
+        self.assertEqual(len(chat.prompts), 3)
+        self.assertEqual(scenes, [sceneGenrationNode.fallback_scene(1)])
+
+if __name__ == "__main__":
+    unittest.main()
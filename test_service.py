@@ -0,0 +1,169 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import from service
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import service
+from workflow import END
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.release = threading.Event()
+        self.runs = []
+        
+        def fake_stream(link, wrong_code, graph, thread_id):
+            self.runs.append(link)
+            yield "web_scraping", {"problem_description": "q"}
+            self.release.wait(5)
+            if "fail" in link:
+                yield "join_results", {"error": "Error in web scraping: boom"}
+                yield END, {"error": "Error in web scraping: boom", "video_path": ""}
+                return
+            video_path = os.path.join(self.tmp_dir, "final.mp4")
+            with open(video_path, "wb") as f:
+                f.write(b"video")
+            yield "scene_video_generation", {"scenes": ["code"], "video_path": video_path}
+            yield END, {"error": "", "video_path": video_path}
+        
+        self.patches = [
+            mock.patch.object(service, "manager", service.JobManager(workers=2)),
+            mock.patch.object(service, "create_workflow", return_value="compiled graph"),
+            mock.patch.object(service, "stream_workflow", side_effect=fake_stream),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.client = TestClient(service.app)
+        self.client.__enter__()
+    
+    def tearDown(self):
+        self.release.set()
+        self.client.__exit__(None, None, None)
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def restart(self, manager):
+        self.client.__exit__(None, None, None)
+        self.patches[0].stop()
+        self.patches[0] = mock.patch.object(service, "manager", manager)
+        self.patches[0].start()
+        self.client = TestClient(service.app)
+        self.client.__enter__()
+    
+    def wait_for_status(self, job_id, status):
+        for _ in range(100):
+            if self.client.get(f"/jobs/{job_id}").json()["status"] == status:
+                return
+            time.sleep(0.02)
+        self.fail(f"Job {job_id} never became {status}")
+    
+    def read_events(self, job_id):
+        events = []
+        with self.client.stream("GET", f"/jobs/{job_id}/events") as response:
+            for line in response.iter_lines():
+                if line.startswith("data: "):
+                    events.append(json.loads(line[len("data: "):]))
+        return events
+    
+    def test_job_lifecycle(self):
+        response = self.client.post("/jobs", json={"link": "https://example.com/two-sum", "wrong_code": "def f(): pass"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertEqual(self.client.get(f"/jobs/{job_id}/video").status_code, 409)
+        
+        self.release.set()
+        events = self.read_events(job_id)
+        
+        self.assertEqual([e["event"] for e in events], ["queued", "started", "node", "node", "completed"])
+        self.assertEqual([e["node"] for e in events if e["event"] == "node"], ["web_scraping", "scene_video_generation"])
+        self.assertEqual(self.client.get(f"/jobs/{job_id}").json()["status"], "completed")
+        video = self.client.get(f"/jobs/{job_id}/video")
+        self.assertEqual((video.status_code, video.content), (200, b"video"))
+    
+    def test_identical_in_flight_jobs_are_deduplicated(self):
+        payload = {"link": "https://example.com/two-sum", "wrong_code": "def f(): pass"}
+        first = self.client.post("/jobs", json=payload).json()
+        second = self.client.post("/jobs", json=payload).json()
+        other = self.client.post("/jobs", json=dict(payload, wrong_code="def g(): pass")).json()
+        
+        self.assertEqual(first["job_id"], second["job_id"])
+        self.assertTrue(second["deduplicated"])
+        self.assertNotEqual(first["job_id"], other["job_id"])
+        
+        self.release.set()
+        self.read_events(first["job_id"])
+        self.read_events(other["job_id"])
+        self.assertEqual(len(self.runs), 2)
+        # Once finished, the same submission starts a new job
+        third = self.client.post("/jobs", json=payload).json()
+        self.assertNotEqual(third["job_id"], first["job_id"])
+    
+    def test_failed_job(self):
+        self.release.set()
+        job_id = self.client.post("/jobs", json={"link": "https://example.com/fail", "wrong_code": "x"}).json()["job_id"]
+        events = self.read_events(job_id)
+        
+        self.assertEqual(events[-1]["event"], "failed")
+        self.assertIn("boom", events[-1]["error"])
+        self.assertEqual(self.client.get(f"/jobs/{job_id}/video").status_code, 409)
+    
+    def test_metrics_count_finished_jobs(self):
+        before = service.jobs_total.value(status="failed")
+        self.release.set()
+        job_id = self.client.post("/jobs", json={"link": "https://example.com/fail", "wrong_code": "metrics"}).json()["job_id"]
+        self.read_events(job_id)
+        
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE workflow_jobs_total counter", response.text)
+        self.assertEqual(service.jobs_total.value(status="failed"), before + 1)
+        self.assertIn(f'workflow_jobs_total{{status="failed"}} {before + 1}', response.text)
+    
+    def test_full_queue_rejects_jobs(self):
+        self.restart(service.JobManager(workers=1, queue_size=1))
+        running = self.client.post("/jobs", json={"link": "https://example.com/a", "wrong_code": "x"}).json()
+        self.wait_for_status(running["job_id"], "running")
+        queued = self.client.post("/jobs", json={"link": "https://example.com/b", "wrong_code": "x"})
+        rejected = self.client.post("/jobs", json={"link": "https://example.com/c", "wrong_code": "x"})
+        
+        self.assertEqual(queued.status_code, 202)
+        self.assertEqual(rejected.status_code, 503)
+        self.assertIn("Retry-After", rejected.headers)
+        # Deduplicated submissions do not take a queue slot
+        self.assertEqual(self.client.post("/jobs", json={"link": "https://example.com/b", "wrong_code": "x"}).status_code, 202)
+    
+    def test_finished_jobs_are_evicted(self):
+        self.release.set()
+        with mock.patch.object(service, "service_max_finished_jobs", 1):
+            first = self.client.post("/jobs", json={"link": "https://example.com/fail", "wrong_code": "1"}).json()["job_id"]
+            self.read_events(first)
+            second = self.client.post("/jobs", json={"link": "https://example.com/fail", "wrong_code": "2"}).json()["job_id"]
+            self.read_events(second)
+        
+        self.assertEqual(self.client.get(f"/jobs/{first}").status_code, 404)
+        self.assertEqual(self.client.get(f"/jobs/{second}").json()["status"], "failed")
+    
+    def test_finished_jobs_keep_only_their_final_event(self):
+        self.release.set()
+        with mock.patch.object(service, "service_event_ttl", 0):
+            job_id = self.client.post("/jobs", json={"link": "https://example.com/fail", "wrong_code": "x"}).json()["job_id"]
+            self.wait_for_status(job_id, "failed")
+        
+        self.assertEqual([e["event"] for e in self.read_events(job_id)], ["failed"])
+        self.assertEqual(self.client.get(f"/jobs/{job_id}").json()["events"], 5)
+    
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get("/jobs/missing").status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
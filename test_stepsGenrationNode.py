@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import json
+from unittest import mock
+
+# Add the parent directory to the path so we can import from stepsGenrationNode
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import stepsGenrationNode
+from stepsGenrationNode import ERROR_STEP, StepStreamParser, iter_steps
+
+STEPS = ["Step 1: The nested loop is O(n^2).", "Step 2: Use a \"seen\" map: {value: index}.", "Step 3: Return [i, j]."]
+RESPONSE = "```json\n" + json.dumps({"steps": STEPS}, indent=4) + "\n```"
+
+def chunked(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class TestStepStreamParser(unittest.TestCase):
+    def test_steps_are_emitted_at_their_closing_quote(self):
+        parser = StepStreamParser()
+        for position, char in enumerate(RESPONSE):
+            completed = parser.feed(char)
+            if completed:
+                # The step is complete as soon as its closing quote was fed
+                self.assertTrue(RESPONSE[:position + 1].endswith(json.dumps(completed[0])))
+        self.assertEqual(parser.steps, STEPS)
+        self.assertTrue(parser.done)
+    
+    def test_chunk_boundaries_do_not_matter(self):
+        for size in (1, 3, 7, 64, len(RESPONSE)):
+            parser = StepStreamParser()
+            steps = [step for chunk in chunked(RESPONSE, size) for step in parser.feed(chunk)]
+            self.assertEqual(steps, STEPS)
+    
+    def test_non_string_elements_and_raw_newlines(self):
+        parser = StepStreamParser()
+        parser.feed('{"steps": ["line one\nline two", {"title": "x"}, 42]}')
+        self.assertEqual(parser.steps, ["line one\nline two", '{"title": "x"}', "42"])
+    
+    def test_text_before_the_array_is_ignored(self):
+        parser = StepStreamParser()
+        self.assertEqual(parser.feed('Here are the steps ["not", "these"]\n'), [])
+        self.assertEqual(parser.feed('{"steps": ["a"]}'), ["a"])
+
+class TestIterSteps(unittest.TestCase):
+    def test_first_step_is_yielded_before_the_stream_ends(self):
+        sent = []
+        
+        def stream_llm(messages, validate=None):
+            for chunk in chunked(RESPONSE):
+                sent.append(chunk)
+                yield chunk
+        
+        with mock.patch.object(stepsGenrationNode, "stream_llm", stream_llm):
+            steps = iter_steps("def f(x): return x")
+            self.assertEqual(next(steps), STEPS[0])
+            self.assertLess(len(sent), len(chunked(RESPONSE)) / 2)
+            self.assertEqual(list(steps), STEPS[1:])
+    
+    def test_failed_stream_is_finished_with_a_full_request(self):
+        def stream_llm(messages, validate=None):
+            yield RESPONSE[:RESPONSE.index(STEPS[2]) + 5]
+            raise ConnectionError("connection reset")
+        
+        with mock.patch.object(stepsGenrationNode, "stream_llm", stream_llm), \
+             mock.patch.object(stepsGenrationNode, "invoke_llm", return_value=RESPONSE) as invoke_llm:
+            self.assertEqual(list(iter_steps("def f(x): return x")), STEPS)
+        invoke_llm.assert_called_once()
+    
+    def test_retried_reply_with_other_steps_fails(self):
+        def stream_llm(messages, validate=None):
+            yield RESPONSE[:RESPONSE.index(STEPS[2]) + 5]
+            raise ConnectionError("connection reset")
+        
+        other = "```json\n" + json.dumps({"steps": ["Step 1: Something else.", STEPS[1], STEPS[2]]}) + "\n```"
+        with mock.patch.object(stepsGenrationNode, "stream_llm", stream_llm), \
+             mock.patch.object(stepsGenrationNode, "invoke_llm", return_value=other):
+            steps = iter_steps("def f(x): return x")
+            self.assertEqual([next(steps), next(steps)], STEPS[:2])
+            with self.assertRaises(Exception):
+                next(steps)
+    
+    def test_unreadable_response_yields_the_error_step(self):
+        with mock.patch.object(stepsGenrationNode, "stream_llm", return_value=iter(["no json here"])):
+            self.assertEqual(list(iter_steps("def f(x): return x")), [ERROR_STEP])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the parent and benchmarks directories to the path so we can import from telemetry and the shared fakes
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import telemetry
+import workflow
+import llmClient
+from telemetry import FileSpanExporter, MetricsRegistry, job_context, span, traced_node
+from langchain_core.messages import HumanMessage
+from fakes import FakeResponse, ScriptedChat
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.trace_path = os.path.join(self.tmp_dir, "traces.jsonl")
+        self.patch = mock.patch.object(telemetry, "exporter", FileSpanExporter(self.trace_path))
+        self.patch.start()
+    
+    def tearDown(self):
+        self.patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def spans(self):
+        with open(self.trace_path) as f:
+            return [json.loads(line) for line in f]
+    
+    def test_spans_nest_and_carry_the_job_id(self):
+        job_id = "0123456789abcdef0123456789abcdef"
+        with job_context(job_id):
+            with span("outer", link="x"):
+                with span("inner"):
+                    pass
+        inner, outer = self.spans()
+        self.assertEqual((inner["name"], outer["name"]), ("inner", "outer"))
+        self.assertEqual(inner["parent_span_id"], outer["span_id"])
+        self.assertEqual(outer["parent_span_id"], "")
+        self.assertEqual({inner["trace_id"], outer["trace_id"]}, {job_id})
+        self.assertEqual(outer["attributes"], {"link": "x", "job.id": job_id})
+        self.assertLessEqual(outer["start_time_unix_nano"], inner["start_time_unix_nano"])
+        self.assertGreaterEqual(outer["end_time_unix_nano"], inner["end_time_unix_nano"])
+    
+    def test_errors_mark_the_span(self):
+        errors = telemetry.span_errors.value(span="failing")
+        with self.assertRaises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        node = traced_node("check", lambda state: {"error": "bad state"})
+        self.assertEqual(node({}), {"error": "bad state"})
+        
+        failing, checked = self.spans()
+        self.assertEqual(failing["status"], {"code": "ERROR", "message": "ValueError: boom"})
+        self.assertEqual((checked["name"], checked["status"]["message"]), ("node.check", "bad state"))
+        self.assertEqual(telemetry.span_errors.value(span="failing"), errors + 1)
+    
+    def test_workflow_spans_share_the_job_trace(self):
+        patches = [
+            mock.patch.object(workflow, "scrape_website", return_value={"question": "q", "test_cases": []}),
+            mock.patch.object(workflow, "profile_code", return_value={"complexity": "", "timings": [], "error": ""}),
+            mock.patch.object(workflow, "generate_steps", return_value=["step"]),
+            mock.patch.object(workflow, "generate_test_cases", return_value=[[[1], 1, "case"]]),
+            mock.patch.object(workflow, "generate_scenes", return_value=["scene"]),
+            mock.patch.object(workflow, "execute_video", return_value="video.mp4"),
+        ]
+        for patch in patches:
+            patch.start()
+        try:
+            workflow.run_workflow("https://example.com", "def f(x): return x", graph=workflow.create_workflow(pipeline=False))
+        finally:
+            for patch in patches:
+                patch.stop()
+        
+        spans = self.spans()
+        names = {s["name"] for s in spans}
+        self.assertTrue({"workflow", "node.web_scraping", "node.steps_generation", "node.video_execution"} <= names)
+        self.assertEqual(len({s["trace_id"] for s in spans}), 1)
+        self.assertEqual(len({s["attributes"]["job.id"] for s in spans}), 1)
+        root = next(s for s in spans if s["name"] == "workflow")
+        node = next(s for s in spans if s["name"] == "node.web_scraping")
+        self.assertEqual(node["parent_span_id"], root["span_id"])
+    
+    def test_llm_calls_record_tokens(self):
+        prompt = telemetry.llm_tokens.value(model="fake-model", kind="prompt")
+        completion = telemetry.llm_tokens.value(model="fake-model", kind="completion")
+        with mock.patch.object(llmClient, "rate_limiter", mock.Mock()):
+            llmClient.invoke_with_retry(ScriptedChat(FakeResponse("ok", {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15})), [HumanMessage(content="hi")])
+            # Without reported usage, tokens are estimated from the text
+            llmClient.invoke_with_retry(ScriptedChat(FakeResponse("x" * 40)), [HumanMessage(content="y" * 80)])
+        self.assertEqual(telemetry.llm_tokens.value(model="fake-model", kind="prompt"), prompt + 12 + 20)
+        self.assertEqual(telemetry.llm_tokens.value(model="fake-model", kind="completion"), completion + 3 + 10)
+        self.assertEqual([s["name"] for s in self.spans()], ["llm.call", "llm.call"])
+
+    def test_stream_closed_early_ends_its_span_normally(self):
+        errors = telemetry.span_errors.value(span="llm.stream")
+        with mock.patch.object(llmClient, "rate_limiter", mock.Mock()):
+            stream = llmClient.stream_with_retry(ScriptedChat(FakeResponse("one two three")), [HumanMessage(content="hi")])
+            self.assertEqual(next(stream), "one ")
+            stream.close()
+        
+        [streamed] = self.spans()
+        self.assertEqual(streamed["name"], "llm.stream")
+        self.assertEqual(streamed["status"]["code"], "OK")
+        self.assertEqual(telemetry.span_errors.value(span="llm.stream"), errors)
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests")
+        duration = registry.histogram("duration_seconds", "Duration", buckets=(0.1, 1))
+        requests.inc(cache="llm", result="hit")
+        requests.inc(2, cache="llm", result="hit")
+        duration.observe(0.05, span="a")
+        duration.observe(0.5, span="a")
+        duration.observe(5, span="a")
+        
+        text = registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{cache="llm",result="hit"} 3', text)
+        self.assertIn('duration_seconds_bucket{span="a",le="0.1"} 1', text)
+        self.assertIn('duration_seconds_bucket{span="a",le="1"} 2', text)
+        self.assertIn('duration_seconds_bucket{span="a",le="+Inf"} 3', text)
+        self.assertIn('duration_seconds_count{span="a"} 3', text)
+        self.assertIn('duration_seconds_sum{span="a"} 5.55', text)
+        # Registering a metric twice returns the existing one
+        self.assertIs(registry.counter("requests_total", "Requests"), requests)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import textwrap
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import from videoExecutionScript
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import videoExecutionScript
+from renderCache import RenderCache
+from assetCache import AssetCache
+from videoExecutionScript import execute_video
+
+# Minimal stand-ins for the manim and ffmpeg command lines used by execute_video
+FAKE_MANIM = textwrap.dedent("""
+    import os, sys, time
+    args = sys.argv[1:]
+    media_dir = args[args.index("--media_dir") + 1]
+    scene_file, scene_name = args[-2], args[-1]
+    source = open(scene_file).read()
+    time.sleep(0.2)
+    if "FAIL" in source:
+        sys.exit("render error")
+    module = os.path.splitext(os.path.basename(scene_file))[0]
+    out_dir = os.path.join(media_dir, "videos", module, "480p15")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, scene_name + ".mp4"), "w") as f:
+        f.write(scene_name + "\\n")
+""")
+
+FAKE_FFMPEG = textwrap.dedent("""
+    import sys
+    args = sys.argv[1:]
+    list_file, output = args[args.index("-i") + 1], args[-1]
+    with open(output, "w") as out:
+        for line in open(list_file):
+            out.write(open(line.strip()[len("file '"):-1]).read())
+""")
+
+class TestExecuteVideo(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        for name, source in (("manim_fake.py", FAKE_MANIM), ("ffmpeg_fake.py", FAKE_FFMPEG)):
+            with open(os.path.join(self.tmp_dir, name), "w") as f:
+                f.write(source)
+        self.patches = [
+            mock.patch.object(videoExecutionScript, "manim_command", [sys.executable, os.path.join(self.tmp_dir, "manim_fake.py")]),
+            mock.patch.object(videoExecutionScript, "ffmpeg_command", [sys.executable, os.path.join(self.tmp_dir, "ffmpeg_fake.py")]),
+            mock.patch.object(videoExecutionScript, "render_cache", RenderCache(os.path.join(self.tmp_dir, "cache"), max_bytes=1024)),
+            mock.patch.object(videoExecutionScript, "asset_cache", AssetCache(os.path.join(self.tmp_dir, "assets"), max_bytes=1024)),
+            mock.patch.object(videoExecutionScript, "video_output_dir", os.path.join(self.tmp_dir, "videos")),
+        ]
+        for patch in self.patches:
+            patch.start()
+        os.chdir(self.tmp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.cwd)
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def scene(self, n, body=None):
+        # Distinct bodies, since identical scenes share a cached video whatever their step
+        body = body or f"self.wait({n})"
+        return f"from manim import *\n\nclass Step{n}Scene(Scene):\n    def construct(self):\n        {body}\n"
+    
+    def test_scenes_render_in_parallel_and_concat_in_order(self):
+        """Every scene gets its own process and the final video keeps scene order."""
+        start = time.perf_counter()
+        video_path = execute_video([self.scene(n) for n in range(1, 5)], max_workers=4)
+        elapsed = time.perf_counter() - start
+        
+        self.assertTrue(video_path.endswith(".mp4"))
+        self.assertTrue(video_path.startswith(os.path.join(self.tmp_dir, "videos", "output_video_")))
+        with open(video_path) as f:
+            self.assertEqual(f.read().split(), [f"Step{n}Scene" for n in range(1, 5)])
+        self.assertLess(elapsed, 4 * 0.2)
+    
+    def test_failed_scene_is_left_out(self):
+        """A scene that fails to render does not cost the other scenes."""
+        scenes = [self.scene(1), self.scene(2, "FAIL"), self.scene(3)]
+        results = videoExecutionScript.render_scenes(scenes, "out", max_workers=3)
+        
+        self.assertEqual([bool(r["error"]) for r in results], [False, True, False])
+        with open(execute_video(scenes)) as f:
+            self.assertEqual(f.read().split(), ["Step1Scene", "Step3Scene"])
+    
+    def test_all_scenes_failing_returns_empty_path(self):
+        """No video path is returned when nothing rendered."""
+        self.assertEqual(execute_video([self.scene(1, "FAIL")]), "")
+
+    def test_scenes_render_while_later_scenes_are_generated(self):
+        """A scene starts rendering as soon as it arrives from the generator."""
+        first_video = os.path.join("out", "media", "step_1", "videos", "step_1_scene", "480p15", "Step1Scene.mp4")
+        
+        def scene_stream():
+            yield 0, self.scene(1)
+            # Scene 2 is only produced once scene 1 has finished rendering
+            deadline = time.monotonic() + 5
+            while not os.path.exists(first_video) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(first_video), "Scene 1 was not rendered before scene 2 arrived")
+            yield 1, self.scene(2)
+        
+        results = videoExecutionScript.render_scene_stream(scene_stream(), "out", max_workers=2)
+        self.assertEqual([r["scene"] for r in results], [1, 2])
+        self.assertTrue(all(r["video_path"] for r in results))
+    
+    def test_render_cache_skips_rendering(self):
+        """A re-run of identical scenes is served from the render cache."""
+        scenes = [self.scene(1), self.scene(2)]
+        first = videoExecutionScript.render_scenes(scenes, "first")
+        start = time.perf_counter()
+        second = videoExecutionScript.render_scenes(scenes, "second")
+        
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual([r["cached"] for r in first], [False, False])
+        self.assertEqual([r["cached"] for r in second], [True, True])
+        with open(second[1]["video_path"]) as f:
+            self.assertEqual(f.read().strip(), "Step2Scene")
+
+    def test_render_evicted_after_lookup_is_rendered(self):
+        """A cached video removed between the lookup and the copy counts as a miss."""
+        gone = os.path.join(self.tmp_dir, "evicted.mp4")
+        with mock.patch.object(videoExecutionScript.render_cache, "get", return_value=gone):
+            results = videoExecutionScript.render_scenes([self.scene(1)], "out")
+        
+        self.assertEqual([(r["cached"], r["error"]) for r in results], [(False, "")])
+        with open(results[0]["video_path"]) as f:
+            self.assertEqual(f.read().strip(), "Step1Scene")
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = RenderCache(os.path.join(self.tmp_dir, "cache"), max_bytes=20)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+    
+    def video(self, name, size=8):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+    
+    def test_key_depends_on_source_and_settings(self):
+        key = self.cache.key("code", "Step1Scene", "l")
+        self.assertEqual(key, self.cache.key("code", "Step1Scene", "l"))
+        self.assertNotEqual(key, self.cache.key("code ", "Step1Scene", "l"))
+        self.assertNotEqual(key, self.cache.key("code", "Step1Scene", "h"))
+        self.assertNotEqual(key, self.cache.key("code", "Step1Scene", "l", fps=30))
+        # The same scene as another step shares the rendered video
+        self.assertEqual(self.cache.key("class Step1Scene(Scene): pass", "Step1Scene", "l"), self.cache.key("class Step4Scene(Scene): pass", "Step4Scene", "l"))
+    
+    def test_lru_eviction_under_size_cap(self):
+        """The least recently used video is evicted first."""
+        self.cache.put("a", self.video("a.mp4"))
+        time.sleep(0.01)
+        self.cache.put("b", self.video("b.mp4"))
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get("a"))
+        time.sleep(0.01)
+        self.cache.put("c", self.video("c.mp4"))
+        
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+# Add the parent directory to the path so we can import from webScrapingNode
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import webScrapingNode
+from scrapeCache import ScrapeCache
+from problemParser import ProblemParser
+from webScrapingNode import scrape_website
+
+PROBLEM_PAGE = """
+<html><body>
+<nav>Problems Discuss</nav>
+<div class="question">
+<p>Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.</p>
+<pre>Example 1:
+Input: nums = [2,7,11,15], target = 9
+Output: [0,1]</pre>
+</div>
+</body></html>
+"""
+
+class ProblemPageHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a judge site that supports ETag revalidation."""
+    
+    etag = '"v1"'
+    requests = []
+    delay = 0
+    
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get("If-None-Match")))
+        time.sleep(type(self).delay)
+        if self.headers.get("If-None-Match") == type(self).etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PROBLEM_PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", type(self).etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+class TestScrapeCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ProblemPageHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        ProblemPageHandler.requests = []
+        ProblemPageHandler.delay = 0
+        ProblemPageHandler.etag = '"v1"'
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ScrapeCache(os.path.join(self.tmp_dir, "scrape.sqlite"), ttl=60)
+        self.extractions = []
+        
+        def extract(content):
+            self.extractions.append(content)
+            return {"question": "Two Sum", "test_cases": ["Input: nums = [2,7,11,15], target = 9\nOutput: [0,1]"]}
+        
+        self.patches = [
+            mock.patch.object(webScrapingNode, "scrape_cache", self.cache),
+            mock.patch.object(webScrapingNode, "extract_problem", side_effect=extract),
+            mock.patch.object(webScrapingNode, "problem_parser", ProblemParser(enabled=False)),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.tmp_dir)
+    
+    def test_database_is_opened_on_first_use(self):
+        db_path = os.path.join(self.tmp_dir, "lazy", "scrape.sqlite")
+        cache = ScrapeCache(db_path)
+        self.assertFalse(os.path.exists(os.path.dirname(db_path)))
+        self.assertIsNone(cache.lookup("https://example.com/"))
+        self.assertTrue(os.path.exists(db_path))
+    
+    def test_fresh_entry_is_served_from_cache(self):
+        url = f"{self.base_url}/problems/two-sum/"
+        first = scrape_website(url)
+        second = scrape_website(url)
+        
+        self.assertEqual(first, second)
+        self.assertEqual(len(ProblemPageHandler.requests), 1)
+        self.assertEqual(len(self.extractions), 1)
+        self.assertIn("Input: nums = [2,7,11,15]", self.extractions[0])
+        self.assertNotIn("<pre>", self.extractions[0])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+    
+    def test_stale_entry_is_revalidated_with_etag(self):
+        """A 304 refreshes the entry without downloading or extracting again."""
+        url = f"{self.base_url}/problems/two-sum/"
+        self.cache.ttl = 0
+        scrape_website(url)
+        result = scrape_website(url)
+        
+        self.assertEqual(result["question"], "Two Sum")
+        self.assertEqual([etag for _, etag in ProblemPageHandler.requests], [None, '"v1"'])
+        self.assertEqual(len(self.extractions), 1)
+        self.assertEqual(self.cache.stats()["revalidated"], 1)
+    
+    def test_changed_page_is_extracted_again(self):
+        url = f"{self.base_url}/problems/two-sum/"
+        self.cache.ttl = 0
+        scrape_website(url)
+        ProblemPageHandler.etag = '"v2"'
+        scrape_website(url)
+        
+        self.assertEqual(len(self.extractions), 2)
+        self.assertEqual(self.cache.lookup(url)["etag"], '"v2"')
+    
+    def test_concurrent_requests_share_one_fetch(self):
+        url = f"{self.base_url}/problems/two-sum/"
+        ProblemPageHandler.delay = 0.3
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(scrape_website, [url] * 5))
+        
+        self.assertTrue(all(r["question"] == "Two Sum" for r in results))
+        self.assertEqual(len(ProblemPageHandler.requests), 1)
+        self.assertEqual(self.cache.stats()["collapsed"], 4)
+    
+    def test_failed_fetch_is_not_cached(self):
+        result = scrape_website("http://127.0.0.1:1/unreachable")
+        
+        self.assertEqual(result, {"question": "", "test_cases": []})
+        self.assertIsNone(self.cache.lookup("http://127.0.0.1:1/unreachable"))
+    
+    def test_body_over_budget_is_extracted_in_chunks(self):
+        url = f"{self.base_url}/problems/two-sum/"
+        with mock.patch("contentReducer.scrape_token_budget", 20):
+            result = scrape_website(url)
+        
+        self.assertGreater(len(self.extractions), 1)
+        self.assertEqual(result["question"], "Two Sum")
+        self.assertEqual(len(result["test_cases"]), 1)
+    
+    def test_structured_page_skips_the_llm(self):
+        url = f"{self.base_url}/problems/two-sum/"
+        parser = ProblemParser()
+        with mock.patch.object(webScrapingNode, "problem_parser", parser):
+            result = scrape_website(url)
+        
+        self.assertEqual(self.extractions, [])
+        self.assertTrue(result["question"].startswith("Given an array of integers nums"))
+        self.assertEqual(result["test_cases"], ["Input: nums = [2,7,11,15], target = 9\nOutput: [0,1]"])
+        self.assertEqual(parser.stats()["hit_rate"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,29 @@
 import unittest
 import os
 import sys
-import shutil
+import tempfile
+import time
+from unittest import mock
 
 # Add the parent directory to the path so we can import from workflow
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import workflow
+import videoExecutionScript
 from workflow import run_workflow
 
 class TestExplanatoryVideoWorkflow(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.test_output_dir = "test_output"
-        if not os.path.exists(self.test_output_dir):
-            os.makedirs(self.test_output_dir)
+        # Rendered videos go to a temporary directory instead of the working directory
+        self.test_output_dir = tempfile.TemporaryDirectory(prefix="test_output_")
+        self.output_patch = mock.patch.object(videoExecutionScript, "video_output_dir", self.test_output_dir.name)
+        self.output_patch.start()
     
     def tearDown(self):
         """Clean up test fixtures after each test method."""
-        if os.path.exists(self.test_output_dir):
-            shutil.rmtree(self.test_output_dir)
+        self.output_patch.stop()
+        self.test_output_dir.cleanup()
     
     def test_full_workflow(self):
         """Test the full workflow with a sample problem and wrong code."""
@@ -103,5 +108,170 @@ def two_sum(nums, target)
         self.assertTrue(result.get("steps"), "No steps generated for invalid code")
         self.assertGreater(len(result.get("steps")), 0, "Steps list is empty for invalid code")
 
+class TestParallelWorkflowGraph(unittest.TestCase):
+    """Offline tests for the graph structure, with every node function stubbed."""
+    
+    def setUp(self):
+        self.calls = []
+        
+        def slow(name, value, delay=0.2):
+            def node(*args, **kwargs):
+                self.calls.append(name)
+                time.sleep(delay)
+                return value
+            return node
+        
+        self.patches = [
+            mock.patch.object(workflow, "scrape_website", slow("scrape", {"question": "Two Sum", "test_cases": ["Input: 1\nOutput: 1"]})),
+            mock.patch.object(workflow, "profile_code", slow("profile", {"complexity": "O(n^2)", "timings": [{"n": 64, "ms": 0.2}], "error": ""}, delay=0)),
+            mock.patch.object(workflow, "generate_steps", slow("steps", ["Step 1"])),
+            mock.patch.object(workflow, "iter_steps", self.iter_steps),
+            mock.patch.object(workflow, "generate_test_cases", slow("tests", [[[1], 1, "basic"]])),
+            mock.patch.object(workflow, "generate_scenes", slow("scenes", ["scene code"], delay=0)),
+            mock.patch.object(workflow, "execute_video", slow("video", "final.mp4", delay=0)),
+            mock.patch.object(workflow, "iter_scenes", self.iter_scenes),
+            mock.patch.object(workflow, "execute_video_stream", self.execute_video_stream),
+        ]
+        for patch in self.patches:
+            patch.start()
+    
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+    
+    def iter_steps(self, code, profile=""):
+        self.calls.append("stream steps")
+        for step in ["Step 1", "Step 2"]:
+            self.calls.append(step)
+            yield step
+    
+    def iter_scenes(self, steps, benchmark="", problem=""):
+        self.calls.append("scenes")
+        self.benchmark = benchmark
+        for i, step in enumerate(steps):
+            self.calls.append(f"scene {i + 1}")
+            yield i, f"scene for {step}"
+    
+    def execute_video_stream(self, scene_iter):
+        self.calls.append("video")
+        self.rendered = [scene for _, scene in scene_iter]
+        return "final.mp4"
+    
+    def test_independent_nodes_run_concurrently(self):
+        """The three independent branches should cost one latency, not three."""
+        start = time.perf_counter()
+        result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        elapsed = time.perf_counter() - start
+        
+        self.assertFalse(result.get("error"))
+        self.assertLess(elapsed, 0.5, "Branches appear to run sequentially")
+        self.assertEqual(result["problem_description"], "Two Sum")
+        self.assertEqual(result["test_cases"], [[[1], 1, "basic"]])
+        self.assertEqual(result["video_path"], "final.mp4")
+    
+    def test_pipelined_scenes_stream_into_the_renderer(self):
+        result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        self.assertEqual(self.rendered, ["scene for Step 1"])
+        self.assertEqual(result["scenes"], ["scene for Step 1"])
+    
+    def test_unpipelined_graph(self):
+        """With pipelining off, scene generation and video execution are separate nodes."""
+        graph = workflow.create_workflow(pipeline=False)
+        result = graph.invoke({"link": "https://example.com/problem", "wrong_code": "def f(x):\n    return x\n", "error": ""})
+        
+        self.assertIn("video_execution", graph.get_graph().nodes)
+        self.assertEqual(result["scenes"], ["scene code"])
+        self.assertEqual(result["video_path"], "final.mp4")
+    
+    def test_streamed_steps_feed_scenes_and_renderer(self):
+        """With streaming on, each step's scene is generated and rendered as soon as the step is written."""
+        graph = workflow.create_workflow(pipeline=True, stream=True)
+        result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n", graph=graph)
+        
+        self.assertIn("steps_scene_video_generation", graph.get_graph().nodes)
+        self.assertNotIn("steps", self.calls)
+        self.assertLess(self.calls.index("scene 1"), self.calls.index("Step 2"))
+        self.assertEqual(result["steps"], ["Step 1", "Step 2"])
+        self.assertEqual(result["scenes"], ["scene for Step 1", "scene for Step 2"])
+        self.assertEqual(self.rendered, result["scenes"])
+        self.assertEqual(result["video_path"], "final.mp4")
+        self.assertEqual(result["complexity"], "O(n^2)")
+        self.assertIn("n=64: 0.2 ms", self.benchmark)
+    
+    def test_streamed_steps_without_pipeline(self):
+        """Without pipelining, the streamed scenes are rendered by video_execution after the join."""
+        graph = workflow.create_workflow(pipeline=False, stream=True)
+        result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n", graph=graph)
+        
+        self.assertIn("steps_scene_generation", graph.get_graph().nodes)
+        self.assertNotIn("scene_generation", graph.get_graph().nodes)
+        self.assertEqual(result["scenes"], ["scene for Step 1", "scene for Step 2"])
+        self.assertEqual(result["video_path"], "final.mp4")
+        self.assertLess(self.calls.index("scrape"), self.calls.index("video"))
+    
+    def test_profile_reaches_steps_and_scenes(self):
+        """The measured complexity is stored in the state and quoted to steps and scene generation."""
+        with mock.patch.object(workflow, "generate_steps", return_value=["Step 1"]) as generate_steps:
+            result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        
+        self.assertEqual(result["complexity"], "O(n^2)")
+        self.assertEqual(result["timings"], [{"n": 64, "ms": 0.2}])
+        self.assertIn("O(n^2)", generate_steps.call_args.kwargs["profile"])
+        self.assertIn("n=64: 0.2 ms", self.benchmark)
+        self.assertLess(self.calls.index("profile"), self.calls.index("scenes"))
+    
+    def test_slow_profile_does_not_delay_the_steps(self):
+        """A profile that is not ready in time is left out of the steps prompt but still reaches the scenes."""
+        profile = {"complexity": "O(n^2)", "timings": [{"n": 64, "ms": 0.2}], "error": ""}
+        
+        def slow_profile(code):
+            time.sleep(0.3)
+            self.calls.append("profile")
+            return profile
+        
+        with mock.patch.object(workflow, "profile_wait", 0.05), \
+             mock.patch.object(workflow, "profile_code", slow_profile), \
+             mock.patch.object(workflow, "generate_steps", return_value=["Step 1"]) as generate_steps:
+            result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        
+        self.assertEqual(generate_steps.call_args.kwargs["profile"], "")
+        self.assertEqual(result["complexity"], "O(n^2)")
+        self.assertIn("n=64: 0.2 ms", self.benchmark)
+        self.assertLess(self.calls.index("profile"), self.calls.index("scenes"))
+    
+    def test_profile_wait_is_bounded(self):
+        """A profile that outlasts profile_timeout is left out instead of blocking the workflow."""
+        def stuck_profile(code):
+            time.sleep(1)
+            return {"complexity": "O(n^2)", "timings": [{"n": 64, "ms": 0.2}], "error": ""}
+        
+        start = time.perf_counter()
+        with mock.patch.object(workflow, "profile_wait", 0.05), \
+             mock.patch.object(workflow, "profile_timeout", 0.1), \
+             mock.patch.object(workflow, "profile_code", stuck_profile), \
+             mock.patch.object(workflow, "generate_steps", return_value=["Step 1"]):
+            result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertFalse(result.get("complexity"))
+        self.assertEqual(result["steps"], ["Step 1"])
+    
+    def test_scraped_test_cases_are_the_fallback(self):
+        """Scraped test cases are used when test case generation returns nothing."""
+        with mock.patch.object(workflow, "generate_test_cases", return_value=[]):
+            result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        self.assertEqual(result["test_cases"], ["Input: 1\nOutput: 1"])
+    
+    def test_branch_errors_short_circuit(self):
+        """Errors from concurrent branches are merged and stop the workflow at the join."""
+        with mock.patch.object(workflow, "scrape_website", side_effect=RuntimeError("boom")), \
+             mock.patch.object(workflow, "generate_steps", side_effect=RuntimeError("bad code")):
+            result = run_workflow("https://example.com/problem", "def f(x):\n    return x\n")
+        
+        self.assertIn("web scraping", result["error"])
+        self.assertIn("steps generation", result["error"])
+        self.assertNotIn("scenes", self.calls)
+        self.assertNotIn("video", self.calls)
+
 if __name__ == '__main__':
     unittest.main()
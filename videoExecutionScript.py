@@ -1,126 +1,273 @@
 # input: scenes: [[scene1: code], [scene2: code], [scene3: code], ....]
 # output: file creation and running the using subprocess.....
 import os
+import re
+import shlex
 import subprocess
 import shutil
-from typing import List
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
 import datetime
+from renderCache import render_cache
+from assetCache import asset_cache
+import rendererPool
+from telemetry import cache_requests, current_span, traced
 
-def execute_video(scenes: List[str]) -> str:
+# Commands used to render scenes and concatenate videos
+manim_command = shlex.split(os.getenv("MANIM_BIN", "manim"))
+ffmpeg_command = shlex.split(os.getenv("FFMPEG_BIN", "ffmpeg"))
+
+# Manim quality flag (l, m, h, p, k) and number of scenes rendered at once
+render_quality = os.getenv("RENDER_QUALITY", "l")
+render_workers = int(os.getenv("RENDER_WORKERS", "0")) or os.cpu_count() or 1
+
+# Directory the output_video_* directory of each run is created in
+video_output_dir = os.getenv("OUTPUT_DIR", ".")
+
+def scene_class_name(scene_code: str, step_number: int) -> str:
     """
-    Save scene code to files and execute Manim to generate the final video.
+    Find the name of the Scene class defined in the scene code.
     
     Args:
-        scenes (List[str]): List of Manim scene code strings
+        scene_code (str): Manim scene code
+        step_number (int): The 1-based step number of the scene
         
     Returns:
-        str: Path to the generated video file
+        str: Step{n}Scene if it is defined, otherwise the first class that extends a Scene
     """
-    try:
-        # Create a timestamp for unique folder naming
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = f"output_video_{timestamp}"
-        scenes_dir = os.path.join(output_dir, "scenes")
+    expected = f"Step{step_number}Scene"
+    if re.search(rf'class\s+{expected}\b', scene_code):
+        return expected
+    class_match = re.search(r'class\s+(\w+)\s*\([^)]*Scene[^)]*\)', scene_code)
+    if class_match:
+        return class_match.group(1)
+    return expected
+
+@traced("render.scene")
+def render_scene(scene_file: str, scene_name: str, media_dir: str) -> str:
+    """
+    Render a single scene in its own Manim process, or in the warm renderer pool if RENDER_POOL is set.
+    
+    Args:
+        scene_file (str): Path to the file containing the scene
+        scene_name (str): Name of the Scene class to render
+        media_dir (str): Media directory used by this render only
+        
+    Returns:
+        str: Path to the rendered video file
+    """
+    current_span().set_attribute("scene", scene_name)
+    if rendererPool.render_pool_enabled:
+        # The workers point Manim at the asset cache themselves
+        with asset_cache.in_use():
+            video_path = rendererPool.renderer_pool.render(scene_file, scene_name, media_dir, render_quality)
+        asset_cache.rendered()
+        return video_path
+    
+    render_command = manim_command + ["render", f"-q{render_quality}", "--media_dir", media_dir]
+    # Reuse Tex/Text typesetting done by earlier renders
+    config_file = asset_cache.config_file()
+    if config_file:
+        render_command += ["--config_file", config_file]
+    with asset_cache.in_use():
+        result = subprocess.run(render_command + [scene_file, scene_name], capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Manim rendering failed: {result.stderr}")
+    asset_cache.rendered()
+    
+    # Find the rendered video file
+    video_files = []
+    for root, _, files in os.walk(os.path.join(media_dir, "videos")):
+        for file in files:
+            if file.endswith(".mp4") and "partial_movie_files" not in root:
+                video_files.append(os.path.join(root, file))
+    
+    if not video_files:
+        raise Exception("No video file was generated")
+    
+    return video_files[0]
+
+def render_scene_job(i: int, scene_code: str, output_dir: str) -> Dict:
+    """
+    Save one scene to a file and render it, or copy it from the render cache.
+    
+    Args:
+        i (int): The 0-based scene index
+        scene_code (str): Manim scene code
+        output_dir (str): Directory for the scene files and media
         
-        # Create output directories
-        os.makedirs(scenes_dir, exist_ok=True)
+    Returns:
+        Dict: The result with "scene", "video_path", "error" and "cached" keys
+    """
+    try:
+        scene_file = os.path.join(output_dir, "scenes", f"step_{i+1}_scene.py")
+        with open(scene_file, "w") as f:
+            f.write(scene_code)
+        scene_name = scene_class_name(scene_code, i + 1)
+        media_dir = os.path.join(output_dir, "media", f"step_{i+1}")
         
-        # Save each scene to a separate file
-        scene_files = []
-        for i, scene_code in enumerate(scenes):
-            scene_file = os.path.join(scenes_dir, f"step_{i+1}_scene.py")
-            with open(scene_file, "w") as f:
-                f.write(scene_code)
-            scene_files.append(scene_file)
+        # Serve identical scenes from the render cache
+        cache_key = render_cache.key(scene_code, scene_name, render_quality)
+        cached_path = render_cache.get(cache_key)
+        if cached_path:
+            video_path = os.path.join(media_dir, f"{scene_name}.mp4")
+            os.makedirs(media_dir, exist_ok=True)
+            try:
+                shutil.copyfile(cached_path, video_path)
+            except OSError as e:
+                # Evicted between the lookup and the copy: render it like any other miss
+                print(f"Cached render of scene {i+1} is gone ({str(e)}), rendering it")
+                cached_path = None
+        cache_requests.inc(cache="render", result="hit" if cached_path else "miss")
+        if cached_path:
+            return {"scene": i + 1, "video_path": video_path, "error": "", "cached": True}
         
-        # Create a main file that imports and renders all scenes
-        main_file_content = """
-from manim import *
-import sys
-import os
+        video_path = render_scene(scene_file, scene_name, media_dir)
+        render_cache.put(cache_key, video_path)
+        return {"scene": i + 1, "video_path": video_path, "error": "", "cached": False}
+    except Exception as e:
+        print(f"Error rendering scene {i+1}: {str(e)}")
+        return {"scene": i + 1, "video_path": "", "error": str(e), "cached": False}
 
-# Add scenes directory to path
-# Get the directory of the current script (render_all_scenes.py)
-script_dir = os.path.dirname(os.path.abspath(__file__))
-scenes_path = os.path.join(script_dir, 'scenes')
-sys.path.append(scenes_path)
+def render_scene_stream(scene_iter: Iterable[Tuple[int, str]], output_dir: str, max_workers: int = None) -> List[Dict]:
+    """
+    Render scenes as they arrive from an iterator.
+    
+    Each scene is handed to the worker pool as soon as the iterator yields
+    it, so rendering overlaps with the generation of the remaining scenes.
+    
+    Args:
+        scene_iter (Iterable[Tuple[int, str]]): (0-based index, scene code) pairs, in any order
+        output_dir (str): Directory for the scene files and media
+        max_workers (int): Maximum number of concurrent renders (defaults to RENDER_WORKERS or the CPU count)
+        
+    Returns:
+        List[Dict]: One result per scene, in scene order, with "scene", "video_path", "error" and "cached" keys
+    """
+    if max_workers is None:
+        max_workers = render_workers
+    
+    os.makedirs(os.path.join(output_dir, "scenes"), exist_ok=True)
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # Each render keeps the caller's context, so its span joins the job's trace
+        futures = [
+            executor.submit(contextvars.copy_context().run, render_scene_job, i, scene_code, output_dir)
+            for i, scene_code in scene_iter
+        ]
+        results = [future.result() for future in futures]
+    
+    return sorted(results, key=lambda r: r["scene"])
 
-# Import all scene classes
-"""
-        for i in range(len(scenes)):
-            main_file_content += f"from step_{i+1}_scene import Step{i+1}Scene\n"
+def render_scenes(scenes: List[str], output_dir: str, max_workers: int = None) -> List[Dict]:
+    """
+    Save each scene to a file and render all of them in parallel.
+    
+    Each scene runs in its own Manim process, at most max_workers at a time.
+    A failing scene only marks its own result as failed. Scenes found in the
+    render cache are copied from it instead of being rendered.
+    
+    Args:
+        scenes (List[str]): List of Manim scene code strings
+        output_dir (str): Directory for the scene files and media
+        max_workers (int): Maximum number of concurrent renders (defaults to RENDER_WORKERS or the CPU count)
         
-        main_file_content += """
-# Configure Manim
-# Set media directory relative to the script
-config.media_dir = os.path.join(script_dir, 'media')
-config.flush_cache = True
+    Returns:
+        List[Dict]: One result per scene, in scene order, with "scene", "video_path", "error" and "cached" keys
+    """
+    if max_workers is None:
+        max_workers = render_workers
+    return render_scene_stream(enumerate(scenes), output_dir, min(max_workers, max(1, len(scenes))))
 
-# Render all scenes
-if __name__ == "__main__":
-    scenes = [
-"""
-        for i in range(len(scenes)):
-            main_file_content += f"        Step{i+1}Scene,\n"
+@traced("render.concat")
+def concat_videos(video_files: List[str], output_path: str) -> str:
+    """
+    Concatenate videos in the given order using ffmpeg.
+    
+    Args:
+        video_files (List[str]): Paths of the videos to concatenate
+        output_path (str): Path of the concatenated video
         
-        main_file_content += """
+    Returns:
+        str: Path to the concatenated video
+    """
+    # Create a file list for ffmpeg
+    concat_list_file = os.path.join(os.path.dirname(output_path), "concat_list.txt")
+    with open(concat_list_file, "w") as f:
+        for video_file in video_files:
+            f.write(f"file '{os.path.abspath(video_file)}'\n")
+    
+    # Concatenate videos using ffmpeg
+    concat_command = ffmpeg_command + [
+        "-f", "concat", "-safe", "0",
+        "-i", concat_list_file, "-c", "copy", output_path
     ]
+    result = subprocess.run(concat_command, capture_output=True, text=True)
     
-    for scene_class in scenes:
-        scene = scene_class()
-        scene.render()
+    if result.returncode != 0:
+        print(f"Error concatenating videos: {result.stderr}")
+        raise Exception(f"Video concatenation failed: {result.stderr}")
     
-    print("All scenes rendered successfully!")
-"""
-        
-        # Save the main file
-        main_file = os.path.join(output_dir, "render_all_scenes.py")
-        with open(main_file, "w") as f:
-            f.write(main_file_content)
+    return output_path
+
+def execute_video(scenes: List[str], max_workers: int = None) -> str:
+    """
+    Save scene code to files and execute Manim to generate the final video.
+    
+    Scenes are rendered in parallel and concatenated in order. Scenes that
+    fail to render are left out of the final video.
+    
+    Args:
+        scenes (List[str]): List of Manim scene code strings
+        max_workers (int): Maximum number of concurrent renders
         
-        # Execute Manim to render the scenes
-        print("Rendering Manim scenes...")
-        render_command = ["manim", main_file, "-pql"]
-        result = subprocess.run(render_command, capture_output=True, text=True)
+    Returns:
+        str: Path to the generated video file
+    """
+    return execute_video_stream(enumerate(scenes), max_workers)
+
+def execute_video_stream(scene_iter: Iterable[Tuple[int, str]], max_workers: int = None) -> str:
+    """
+    Render scenes as they arrive and concatenate them once the last one lands.
+    
+    The scenes, media and final video go to a new output_video_* directory
+    under OUTPUT_DIR.
+    
+    Args:
+        scene_iter (Iterable[Tuple[int, str]]): (0-based index, scene code) pairs, in any order
+        max_workers (int): Maximum number of concurrent renders
         
-        if result.returncode != 0:
-            print(f"Error rendering scenes: {result.stderr}")
-            raise Exception(f"Manim rendering failed: {result.stderr}")
+    Returns:
+        str: Path to the generated video file
+    """
+    try:
+        # Create a timestamp for unique folder naming
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        # mkdtemp keeps concurrent jobs started in the same second apart
+        os.makedirs(video_output_dir, exist_ok=True)
+        output_dir = tempfile.mkdtemp(prefix=f"output_video_{timestamp}_", dir=video_output_dir)
+        if not os.path.isabs(video_output_dir):
+            output_dir = os.path.relpath(output_dir)
         
-        # Find the rendered video files
-        media_dir = os.path.join(output_dir, "media", "videos")
-        video_files = []
+        # Render every scene in its own process as soon as it arrives
+        print("Rendering Manim scenes...")
+        results = render_scene_stream(scene_iter, output_dir, max_workers)
         
-        if os.path.exists(media_dir):
-            for root, _, files in os.walk(media_dir):
-                for file in files:
-                    if file.endswith(".mp4"):
-                        video_files.append(os.path.join(root, file))
+        failed = [r["scene"] for r in results if r["error"]]
+        if failed:
+            print(f"Scenes failed to render: {failed}")
         
+        video_files = [r["video_path"] for r in results if r["video_path"]]
         if not video_files:
             raise Exception("No video files were generated")
         
         # If there are multiple videos, concatenate them
         if len(video_files) > 1:
-            # Create a file list for ffmpeg
-            concat_list_file = os.path.join(output_dir, "concat_list.txt")
-            with open(concat_list_file, "w") as f:
-                for video_file in video_files:
-                    f.write(f"file '{video_file}'\n")
-            
-            # Concatenate videos using ffmpeg
             final_video_path = os.path.join(output_dir, f"final_video_{timestamp}.mp4")
-            concat_command = [
-                "ffmpeg", "-f", "concat", "-safe", "0", 
-                "-i", concat_list_file, "-c", "copy", final_video_path
-            ]
-            result = subprocess.run(concat_command, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"Error concatenating videos: {result.stderr}")
-                raise Exception(f"Video concatenation failed: {result.stderr}")
-            
-            return final_video_path
+            return concat_videos(video_files, final_video_path)
         else:
             # If there's only one video, return its path
             return video_files[0]
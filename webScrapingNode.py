@@ -1,115 +1,204 @@
 # Input: https://link.com 
 # Output: question: str , test cases: [str]
-from crewai_tools import ScrapeWebsiteTool
 from typing import Dict, List
 import re
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.prompts import PromptTemplate
-# Input: https://link.com 
-# Output: question: str , test cases: [str]
-from crewai_tools import ScrapeWebsiteTool
-from typing import Dict, List
-import re
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.prompts import PromptTemplate
 import os
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import config
+from llmClient import invoke_llm, parses_with
+from scrapeCache import scrape_cache
+from contentReducer import reduce_content, merge_extractions
+from problemParser import problem_parser, split_question, text_examples
+from telemetry import cache_requests, traced
 
-# Load environment variables
-load_dotenv()
+# Browser-like headers, the same ones ScrapeWebsiteTool sends
+SCRAPE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.google.com/",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
 
-# Configure the Groq API
-print(os.getenv("GROQ_API_KEY"))
-groq_api_key = os.getenv("GROQ_API_KEY")
+# Shared HTTP session so repeated scrapes reuse connections, created on first use
+session = None
+_session_lock = threading.Lock()
 
-def scrape_website(url: str) -> Dict:
+def get_session():
     """
-    Scrape a coding problem website to extract the problem description and test cases.
+    Get the shared HTTP session, importing requests on first use.
+    
+    Returns:
+        requests.Session: The session
+    """
+    global session
+    with _session_lock:
+        if session is None:
+            import requests
+            session = requests.Session()
+        return session
+
+def page_text(text: str) -> str:
+    """
+    Wrap reduced page content into the text used in the extraction prompt.
     
     Args:
-        url (str): The URL of the coding problem
+        text (str): The reduced page content
         
     Returns:
-        Dict: A dictionary containing the problem description and test cases
+        str: The text with its scraped-content preamble
     """
-    try:
-        # Create a scraping tool for the given URL
-        tool = ScrapeWebsiteTool(website_url=url)
+    return "The following text is scraped website content:\n\n" + text
+
+@traced("scrape.fetch")
+def fetch_page(url: str, entry: Dict = None) -> Dict:
+    """
+    Download a page, revalidating a cached copy with a conditional request.
+    
+    Args:
+        url (str): The page URL
+        entry (Dict): The cached entry for the URL, if any
         
-        # Run the scraping tool to get the website content
-        content = tool.run()
+    Returns:
+        Dict: The page entry, with "modified" set to False if the server returned 304
+    """
+    headers = dict(SCRAPE_HEADERS)
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    
+    response = get_session().get(url, headers=headers, timeout=15)
+    if response.status_code == 304 and entry:
+        return dict(entry, fetched_at=time.time(), modified=False)
+    response.raise_for_status()
+    response.encoding = response.apparent_encoding
+    
+    return {
+        "html": response.text,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+        "result": None,
+        "modified": True,
+    }
+
+def extract_problem(content: str) -> Dict:
+    """
+    Extract the problem description and test cases from scraped page text.
+    
+    Args:
+        content (str): The scraped page text
         
-        # Define the response schemas for structured output
-        response_schemas = [
-            ResponseSchema(name="question", description="The problem description or question statement"),
-            ResponseSchema(name="test_cases", description="List of test cases with input and output", type="List[str]")
-        ]
-        output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-        format_instructions = output_parser.get_format_instructions()
+    Returns:
+        Dict: A dictionary containing the problem description and test cases
+    """
+    from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+    from langchain.prompts import PromptTemplate
+    from langchain_core.messages import HumanMessage
+    
+    # Define the response schemas for structured output
+    response_schemas = [
+        ResponseSchema(name="question", description="The problem description or question statement"),
+        ResponseSchema(name="test_cases", description="List of test cases with input and output", type="List[str]")
+    ]
+    output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+    format_instructions = output_parser.get_format_instructions()
+    
+    # Prompt for structured extraction of content
+    prompt = PromptTemplate(
+        template="""
+        Extract the problem description and test cases from the following scraped website content:
         
-        # Create a ChatGroq instance
-        chat = ChatGroq(temperature=0, groq_api_key=groq_api_key, model_name="mistral-saba-24B")
+        {content}
         
-        # Prompt for structured extraction of content
-        prompt = PromptTemplate(
-            template="""
-            Extract the problem description and test cases from the following scraped website content:
-            
-            {content}
-            
-            Return the information in the following format:
-            {format_instructions}
-            """,
-            input_variables=["content"],
-            partial_variables={"format_instructions": format_instructions}
-        )
+        Return the information in the following format:
+        {format_instructions}
+        """,
+        input_variables=["content"],
+        partial_variables={"format_instructions": format_instructions}
+    )
+    
+    # Format the prompt with the scraped content
+    formatted_prompt = prompt.format(content=content)
+    
+    # Generate the structured response
+    messages = [HumanMessage(content=formatted_prompt)]
+    # Replies that do not parse are not cached, so a retry asks the model again
+    content = invoke_llm(messages, validate=parses_with(output_parser))
+    
+    # Parse the response
+    try:
+        structured_output = output_parser.parse(content)
+        return structured_output
+    except Exception as e:
+        print(f"Error parsing structured output: {str(e)}")
+        # Fallback to manual extraction if parsing fails
         
-        # Format the prompt with the scraped content
-        formatted_prompt = prompt.format(content=content)
+        # Same rule-based parsing as the fast path, applied to the model's reply
+        problem_description = split_question(content)
+        test_cases = text_examples(content)
         
-        # Generate the structured response
-        messages = [HumanMessage(content=formatted_prompt)]
-        response = chat.invoke(messages)
-        content = response.content
+        return {
+            "question": problem_description,
+            "test_cases": test_cases
+        }
+
+def extract_page(url: str, html: str) -> Dict:
+    """
+    Extract the problem from a raw page.
+    
+    Well-structured pages are parsed with deterministic rules. Other pages
+    are reduced to their problem body and extracted with the LLM; bodies
+    over the token budget are split into chunks that are extracted
+    concurrently and merged back in page order.
+    
+    Args:
+        url (str): The page URL
+        html (str): The raw page
+        
+    Returns:
+        Dict: A dictionary containing the problem description and test cases
+    """
+    result = problem_parser.parse(url, html)
+    if result is not None:
+        return result
+    
+    reduced = reduce_content(url, html)
+    stats = reduced["stats"]
+    print(f"Reduced {url} with {reduced['rule']}: {stats['raw_bytes']} -> {stats['reduced_bytes']} bytes, "
+          f"{stats['raw_tokens']} -> {stats['reduced_tokens']} tokens in {stats['chunks']} chunk(s)")
+    
+    chunks = reduced["chunks"] or [""]
+    if len(chunks) == 1:
+        return extract_problem(page_text(chunks[0]))
+    with ThreadPoolExecutor(max_workers=min(len(chunks), 4)) as executor:
+        # Each chunk keeps the caller's context, so LLM calls keep the job's priority
+        futures = [executor.submit(contextvars.copy_context().run, extract_problem, page_text(chunk)) for chunk in chunks]
+        results = [future.result() for future in futures]
+    return merge_extractions(results)
+
+def scrape_website(url: str) -> Dict:
+    """
+    Scrape a coding problem website to extract the problem description and test cases.
+    
+    Pages and extraction results are cached by URL. Stale entries are
+    revalidated with ETag/Last-Modified, and concurrent requests for the
+    same URL share a single fetch.
+    
+    Args:
+        url (str): The URL of the coding problem
         
-        # Parse the response
-        try:
-            structured_output = output_parser.parse(content)
-            return structured_output
-        except Exception as e:
-            print(f"Error parsing structured output: {str(e)}")
-            # Fallback to manual extraction if parsing fails
-            
-            # Extract problem description - assuming it's the text before "Example" or "Examples"
-            description_match = re.split(r'Example[s]?', content, 1)
-            problem_description = description_match[0].strip() if len(description_match) > 1 else content
-            
-            # Extract test cases - assuming they're in the format "Input: ... Output: ..."
-            test_cases = []
-            examples = re.findall(r'Example \d+:(.*?)(?=Example \d+:|$)', content, re.DOTALL)
-            if not examples:
-                examples = re.findall(r'Input:(.*?)Output:(.*?)(?=Input:|$)', content, re.DOTALL)
-                
-            for example in examples:
-                if isinstance(example, tuple):
-                    input_text = example[0].strip()
-                    output_text = example[1].strip()
-                    test_cases.append(f"Input: {input_text}\nOutput: {output_text}")
-                else:
-                    input_match = re.search(r'Input:(.*?)Output:', example, re.DOTALL)
-                    output_match = re.search(r'Output:(.*)', example, re.DOTALL)
-                    
-                    if input_match and output_match:
-                        input_text = input_match.group(1).strip()
-                        output_text = output_match.group(1).strip()
-                        test_cases.append(f"Input: {input_text}\nOutput: {output_text}")
-            
-            return {
-                "question": problem_description,
-                "test_cases": test_cases
-            }
+    Returns:
+        Dict: A dictionary containing the problem description and test cases
+    """
+    try:
+        return scrape_cache.single_flight(url, lambda: scrape_with_cache(url))
     except Exception as e:
         print(f"Error scraping website: {str(e)}")
         # Return empty values in case of error
@@ -118,6 +207,38 @@ def scrape_website(url: str) -> Dict:
             "test_cases": []
         }
 
+def scrape_with_cache(url: str) -> Dict:
+    """
+    Serve a scrape from the cache, revalidating or fetching the page as needed.
+    
+    Args:
+        url (str): The URL of the coding problem
+        
+    Returns:
+        Dict: A dictionary containing the problem description and test cases
+    """
+    entry = scrape_cache.lookup(url)
+    if entry and entry["result"] and scrape_cache.is_fresh(entry):
+        scrape_cache.count("hits")
+        cache_requests.inc(cache="scrape", result="hit")
+        return entry["result"]
+    cache_requests.inc(cache="scrape", result="miss")
+    
+    # Download the page, or confirm the cached copy is still current
+    entry = fetch_page(url, entry)
+    if entry.pop("modified"):
+        scrape_cache.count("fetches")
+    else:
+        scrape_cache.count("revalidated")
+    
+    if not entry["result"]:
+        entry["result"] = extract_page(url, entry["html"])
+    
+    # Only cache pages whose extraction produced something
+    if entry["result"].get("question"):
+        scrape_cache.store(url, entry)
+    return entry["result"]
+
 # Example usage
 if __name__ == "__main__":
     url = "https://leetcode.com/problems/two-sum/"
@@ -1,76 +1,243 @@
-from typing import Dict, List, TypedDict, Annotated, Sequence
+from typing import TYPE_CHECKING, Dict, Iterator, List, TypedDict, Annotated, Sequence, Tuple
 import os
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langgraph.graph import StateGraph, END
-from dotenv import load_dotenv
 import json
+import time
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+import config
+from rateLimiter import INTERACTIVE, priority
+from checkpoints import get_checkpointer, thread_ids
+from telemetry import job_context, span, traced_node
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 # Import nodes modules
 # Note: These are placeholder imports. The actual implementations need to be completed in each file.
 from webScrapingNode import scrape_website
-from stepsGenrationNode import generate_steps
+from stepsGenrationNode import generate_steps, iter_steps
 from testCaseGenrationNode import generate_test_cases
-from sceneGenrationNode import generate_scenes
-from videoExecutionScript import execute_video
+from complexityProfiler import profile_budget, profile_code, format_profile
+from sceneGenrationNode import generate_scenes, iter_scenes
+from videoExecutionScript import execute_video, execute_video_stream
+
+# Same value as langgraph.graph.END, defined here so that importing this module
+# does not load LangGraph; the graph itself is built on first use
+END = "__end__"
+
+# Nodes that only depend on the initial input and can run concurrently
+PARALLEL_BRANCHES = ("web_scraping", "steps_generation", "test_case_generation")
+
+# Stream scenes into the renderer as they are generated instead of waiting for all of them
+pipeline_render = os.getenv("PIPELINE_RENDER", "1") != "0"
+
+# Stream the steps into scene generation as the LLM writes them. Scenes (and, when pipelined,
+# renders) then start inside the steps branch, before the join has checked the other branches.
+stream_steps = os.getenv("STREAM_STEPS", "0") != "0"
+
+# Seconds past PROFILE_BUDGET the profiler may take to stop its last run
+PROFILE_GRACE = 2.0
+
+# Longest wait for the complexity profile, after which the workflow carries on without it
+profile_timeout = profile_budget + PROFILE_GRACE
+
+# Seconds the steps prompt waits for the complexity profile, by default as long as profiling
+# may take. A shorter wait lets the steps start sooner, and the profile then only reaches the
+# scenes and the final state.
+profile_wait = float(os.getenv("PROFILE_WAIT", str(profile_timeout)))
+
+# Reducer for the error channel: parallel branches may fail in the same step
+def merge_errors(left: str, right: str) -> str:
+    """
+    Combine error messages written by concurrent branches.
+    
+    Args:
+        left (str): The current error message
+        right (str): The incoming error message
+        
+    Returns:
+        str: Both messages joined, or whichever one is non-empty
+    """
+    if not left:
+        return right or ""
+    if not right or right in left:
+        return left
+    return f"{left}; {right}"
 
 # Define the state schema
 class WorkflowState(TypedDict):
     link: str
     wrong_code: str
     problem_description: str
+    scraped_test_cases: List[str]
     test_cases: List[str]
+    complexity: str
+    timings: List[Dict]
     steps: List[str]
     scenes: List[str]
     video_path: str
-    error: str
+    error: Annotated[str, merge_errors]
 
 # Define the workflow graph
-def create_workflow() -> StateGraph:
+def create_workflow(pipeline: bool = None, checkpointer=None, stream: bool = None) -> "StateGraph":
     """
     Create a workflow graph that connects all nodes for generating an explanatory video.
     
+    Web scraping, steps generation and test case generation only depend on the
+    initial input, so they run as concurrent branches. Steps generation
+    profiles the code and waits up to profile_wait for it before its LLM call:
+    the steps quote the measured numbers if the profile is ready by then, and
+    the scenes get them if it is ready within profile_timeout. A join node merges the results of the branches and
+    stops the workflow if any branch failed.
+    A branch whose result is already in the state, carried over from a failed
+    run by resume_workflow, is skipped.
+    
+    Args:
+        pipeline (bool): Render each scene as soon as its code is generated, in a single
+            scene_video_generation node (defaults to PIPELINE_RENDER)
+        checkpointer: Checkpointer saving the state after every node, which makes
+            runs resumable by thread_id (see checkpoints.get_checkpointer)
+        stream (bool): Generate each step's scene as soon as the LLM has written the step,
+            in the steps branch itself (defaults to STREAM_STEPS)
+    
     Returns:
         StateGraph: The workflow graph
     """
+    from langgraph.graph import StateGraph, START
+    
+    if pipeline is None:
+        pipeline = pipeline_render
+    if stream is None:
+        stream = stream_steps
+    
     # Initialize the graph
     workflow = StateGraph(WorkflowState)
     
     # Define nodes
     
+    # Measured complexity and timing table, as quoted in the prompts
+    def benchmark(state: Dict) -> str:
+        return format_profile(state.get("complexity", ""), state.get("timings", []))
+    
     # Web scraping node - extracts problem description and test cases from a link
     def web_scraping(state: WorkflowState) -> WorkflowState:
+        if state.get("problem_description"):
+            # Carried over from the failed run being resumed
+            return {}
         try:
             result = scrape_website(state["link"])
             return {
                 "problem_description": result["question"],
-                "test_cases": result["test_cases"]
+                "scraped_test_cases": result["test_cases"]
             }
         except Exception as e:
             return {"error": f"Error in web scraping: {str(e)}"}
     
-    # Steps generation node - breaks down the solution into explanation steps
+    # Measured complexity and timings of the code, as stored in the state
+    def profiled_state(state: WorkflowState) -> Dict:
+        profile = profile_code(state["wrong_code"])
+        if profile["error"]:
+            # Profiling is best effort: the steps fall back to the LLM's own analysis
+            print(f"Skipping complexity profiling: {profile['error']}")
+        return {"complexity": profile["complexity"], "timings": profile["timings"]}
+    
+    # Profiles the code in the background of the steps node, so it overlaps the LLM call
+    # instead of preceding it
+    def start_profiling(state: WorkflowState) -> Future:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profiler")
+        profiling = executor.submit(contextvars.copy_context().run, profiled_state, state)
+        executor.shutdown(wait=False)
+        return profiling
+    
+    # The profile, if it is ready within the timeout
+    def wait_for_profile(profiling: Future, timeout: float) -> Dict:
+        try:
+            return profiling.result(timeout=max(timeout, 0))
+        except TimeoutError:
+            print(f"Profiling still running after {max(timeout, 0):.1f}s, continuing without it")
+            return {}
+    
+    # The profile after the LLM call, waiting only for what is left of profile_timeout
+    def final_profile(profiling: Future, profile: Dict, started: float) -> Dict:
+        return profile or wait_for_profile(profiling, started + profile_timeout - time.monotonic())
+    
+    # Steps generation node - breaks down the solution into explanation steps while the code is profiled
     def steps_generation(state: WorkflowState) -> WorkflowState:
+        if state.get("steps"):
+            return {}
         try:
-            steps = generate_steps(state["wrong_code"])
-            return {"steps": steps}
+            started = time.monotonic()
+            profiling = start_profiling(state)
+            profile = wait_for_profile(profiling, profile_wait)
+            steps = generate_steps(state["wrong_code"], profile=benchmark(profile))
+            # Usually finished by now; the scenes quote it even when the steps could not
+            return dict(final_profile(profiling, profile, started), steps=steps)
         except Exception as e:
             return {"error": f"Error in steps generation: {str(e)}"}
     
+    # Streamed steps node - generates the scene of every step as soon as the LLM has written it
+    # while the code is profiled, and renders each scene as it arrives when pipelined
+    def streamed_generation(state: WorkflowState) -> WorkflowState:
+        if state.get("scenes") and (state.get("video_path") or not pipeline):
+            return {}
+        try:
+            started = time.monotonic()
+            profiling = start_profiling(state)
+            # Steps and scenes start at once here, so both only get a profile that is ready in time
+            ready = wait_for_profile(profiling, profile_wait)
+            profile = benchmark(ready)
+            steps = []
+            scenes = {}
+            
+            def step_stream():
+                for step in iter_steps(state["wrong_code"], profile=profile):
+                    steps.append(step)
+                    yield step
+            
+            def scene_stream():
+                for i, scene_code in iter_scenes(step_stream(), benchmark=profile):
+                    scenes[i] = scene_code
+                    yield i, scene_code
+            
+            update = {}
+            if pipeline:
+                update["video_path"] = execute_video_stream(scene_stream())
+                if not update["video_path"]:
+                    update["error"] = "Error in streamed generation: no video was produced"
+            else:
+                for _ in scene_stream():
+                    pass
+            update.update(final_profile(profiling, ready, started))
+            update["steps"] = steps
+            update["scenes"] = [scenes[i] for i in sorted(scenes)]
+            return update
+        except Exception as e:
+            return {"error": f"Error in streamed generation: {str(e)}"}
+    
     # Test case generation node - generates test cases for the solution
     def test_case_generation(state: WorkflowState) -> WorkflowState:
+        if state.get("test_cases"):
+            return {}
         try:
             test_cases = generate_test_cases(state["wrong_code"])
             return {"test_cases": test_cases}
         except Exception as e:
             return {"error": f"Error in test case generation: {str(e)}"}
     
+    # Join node - merges the results of the parallel branches
+    def join_results(state: WorkflowState) -> WorkflowState:
+        if state.get("error"):
+            print(f"Workflow error: {state['error']}")
+            return {}
+        # Generated test cases take precedence, scraped ones are the fallback
+        if not state.get("test_cases") and state.get("scraped_test_cases"):
+            return {"test_cases": state["scraped_test_cases"]}
+        return {}
+    
     # Scene generation node - converts explanation steps into animation scenes
     def scene_generation(state: WorkflowState) -> WorkflowState:
         try:
-            scenes = generate_scenes(state["steps"])
+            scenes = generate_scenes(state["steps"], benchmark=benchmark(state), problem=state.get("problem_description", ""))
             return {"scenes": scenes}
         except Exception as e:
             return {"error": f"Error in scene generation: {str(e)}"}
@@ -79,82 +246,106 @@ def create_workflow() -> StateGraph:
     def video_execution(state: WorkflowState) -> WorkflowState:
         try:
             video_path = execute_video(state["scenes"])
+            if not video_path:
+                return {"error": "Error in video execution: no video was produced"}
             return {"video_path": video_path}
         except Exception as e:
             return {"error": f"Error in video execution: {str(e)}"}
     
+    # Pipelined scene and video node - renders each scene as soon as it is generated
+    def scene_video_generation(state: WorkflowState) -> WorkflowState:
+        try:
+            scenes = {}
+            
+            def scene_stream():
+                for i, scene_code in iter_scenes(state["steps"], benchmark=benchmark(state), problem=state.get("problem_description", "")):
+                    scenes[i] = scene_code
+                    yield i, scene_code
+            
+            video_path = execute_video_stream(scene_stream())
+            update = {
+                "scenes": [scenes[i] for i in sorted(scenes)],
+                "video_path": video_path
+            }
+            if not video_path:
+                update["error"] = "Error in scene and video generation: no video was produced"
+            return update
+        except Exception as e:
+            return {"error": f"Error in scene and video generation: {str(e)}"}
+    
     # Error checking node
     def check_error(state: WorkflowState) -> WorkflowState:
         if "error" in state and state["error"]:
             print(f"Workflow error: {state['error']}")
-            # Return the state to propagate the error
-            return state
-        # Return the state to continue the workflow
-        return state
+        # No state update, the conditional edge decides whether to continue
+        return {}
+    
+    # In streaming mode the steps branch produces the scenes (and the video, when pipelined) itself
+    if stream:
+        steps_node = "steps_scene_video_generation" if pipeline else "steps_scene_generation"
+    else:
+        steps_node = "steps_generation"
+    branches = [steps_node if branch == "steps_generation" else branch for branch in PARALLEL_BRANCHES]
     
     # Add nodes to workflow
-    workflow.add_node("web_scraping", web_scraping)
-    workflow.add_node("steps_generation", steps_generation)
-    workflow.add_node("test_case_generation", test_case_generation)
-    workflow.add_node("scene_generation", scene_generation)
-    workflow.add_node("video_execution", video_execution)
-    workflow.add_node("check_error_web", check_error)
-    workflow.add_node("check_error_steps", check_error)
-    workflow.add_node("check_error_test", check_error)
-    workflow.add_node("check_error_scene", check_error)
-    workflow.add_node("check_error_video", check_error)
+    workflow.add_node("web_scraping", traced_node("web_scraping", web_scraping))
+    workflow.add_node(steps_node, traced_node(steps_node, streamed_generation if stream else steps_generation))
+    workflow.add_node("test_case_generation", traced_node("test_case_generation", test_case_generation))
+    workflow.add_node("join_results", traced_node("join_results", join_results))
+    if stream:
+        if not pipeline:
+            workflow.add_node("video_execution", traced_node("video_execution", video_execution))
+    elif pipeline:
+        workflow.add_node("scene_video_generation", traced_node("scene_video_generation", scene_video_generation))
+    else:
+        workflow.add_node("scene_generation", traced_node("scene_generation", scene_generation))
+        workflow.add_node("video_execution", traced_node("video_execution", video_execution))
+        workflow.add_node("check_error_scene", traced_node("check_error_scene", check_error))
+    workflow.add_node("check_error_video", traced_node("check_error_video", check_error))
     
     # Define edges
     
-    # Set the entry point
-    workflow.set_entry_point("web_scraping")
-    
-    # Start with web scraping
-    workflow.add_edge("web_scraping", "check_error_web")
-    workflow.add_conditional_edges(
-        "check_error_web",
-        lambda state: "error" if state.get("error") else "continue",
-        {
-            "error": END,
-            "continue": "steps_generation"
-        }
-    )
-    
-    # Generate steps
-    workflow.add_edge("steps_generation", "check_error_steps")
-    workflow.add_conditional_edges(
-        "check_error_steps",
-        lambda state: "error" if state.get("error") else "continue",
-        {
-            "error": END,
-            "continue": "test_case_generation"
-        }
-    )
+    # Fan out: the three independent nodes start together
+    for branch in branches:
+        workflow.add_edge(START, branch)
     
-    # Generate test cases
-    workflow.add_edge("test_case_generation", "check_error_test")
+    # Fan in: the join waits for every branch to finish
+    workflow.add_edge(branches, "join_results")
+    if stream:
+        after_join = "check_error_video" if pipeline else "video_execution"
+    else:
+        after_join = "scene_video_generation" if pipeline else "scene_generation"
     workflow.add_conditional_edges(
-        "check_error_test",
+        "join_results",
         lambda state: "error" if state.get("error") else "continue",
         {
             "error": END,
-            "continue": "scene_generation"
+            "continue": after_join
         }
     )
     
-    # Generate scenes
-    workflow.add_edge("scene_generation", "check_error_scene")
-    workflow.add_conditional_edges(
-        "check_error_scene",
-        lambda state: "error" if state.get("error") else "continue",
-        {
-            "error": END,
-            "continue": "video_execution"
-        }
-    )
+    if stream:
+        # Scenes were generated in the steps branch, only the rendering may be left
+        if not pipeline:
+            workflow.add_edge("video_execution", "check_error_video")
+    elif pipeline:
+        # Generate scenes and render them in one streaming node
+        workflow.add_edge("scene_video_generation", "check_error_video")
+    else:
+        # Generate scenes
+        workflow.add_edge("scene_generation", "check_error_scene")
+        workflow.add_conditional_edges(
+            "check_error_scene",
+            lambda state: "error" if state.get("error") else "continue",
+            {
+                "error": END,
+                "continue": "video_execution"
+            }
+        )
+        
+        # Execute video
+        workflow.add_edge("video_execution", "check_error_video")
     
-    # Execute video
-    workflow.add_edge("video_execution", "check_error_video")
     workflow.add_conditional_edges(
         "check_error_video",
         lambda state: "error" if state.get("error") else "continue",
@@ -165,36 +356,203 @@ def create_workflow() -> StateGraph:
     )
     
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
-# Function to run the workflow
-def run_workflow(link: str, wrong_code: str) -> Dict:
+def initial_state(link: str, wrong_code: str) -> Dict:
     """
-    Run the explanatory video generation workflow.
+    Build the initial state of a workflow run.
     
     Args:
         link (str): The URL of the coding problem
         wrong_code (str): The incorrect code solution
         
     Returns:
-        Dict: The final state of the workflow
+        Dict: The initial workflow state
     """
-    # Create the workflow
-    workflow = create_workflow()
-    
-    # Initialize the state
-    initial_state = {
+    return {
         "link": link,
         "wrong_code": wrong_code,
         "problem_description": "",
+        "scraped_test_cases": [],
         "test_cases": [],
+        "complexity": "",
+        "timings": [],
         "steps": [],
         "scenes": [],
         "video_path": "",
         "error": ""
     }
+
+def run_config(thread_id: str = None) -> Dict:
+    """
+    Build the run config that ties a run to its checkpoints.
+    
+    Args:
+        thread_id (str): The job's thread ID
+        
+    Returns:
+        Dict: The LangGraph run config
+    """
+    return {"configurable": {"thread_id": thread_id}} if thread_id else {}
+
+def checkpointed_workflow(graph=None):
+    """
+    Get a graph that saves checkpoints, creating one if needed.
+    
+    Args:
+        graph: A compiled workflow to reuse
+        
+    Returns:
+        The compiled workflow
+    """
+    if graph is None:
+        graph = create_workflow(checkpointer=get_checkpointer())
+    return graph
+
+# Function to run the workflow
+def run_workflow(link: str, wrong_code: str, priority_level: int = INTERACTIVE, graph=None, thread_id: str = None) -> Dict:
+    """
+    Run the explanatory video generation workflow.
+    
+    Args:
+        link (str): The URL of the coding problem
+        wrong_code (str): The incorrect code solution
+        priority_level (int): Priority of this run's LLM calls (rateLimiter.INTERACTIVE or rateLimiter.BATCH)
+        graph: A compiled workflow to reuse (a new one is created if not given)
+        thread_id (str): ID under which the run is checkpointed, so it can be resumed
+        
+    Returns:
+        Dict: The final state of the workflow
+    """
+    # Create the workflow
+    if graph is None:
+        graph = checkpointed_workflow() if thread_id else create_workflow()
     
     # Run the workflow
-    result = workflow.invoke(initial_state)
+    # Every span of the run is tagged with the thread ID, or a new job ID
+    with job_context(thread_id), priority(priority_level), span("workflow", link=link):
+        result = graph.invoke(initial_state(link, wrong_code), run_config(thread_id))
     
     return result
+
+def stream_workflow(link: str, wrong_code: str, priority_level: int = INTERACTIVE, graph=None, thread_id: str = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Run the workflow and report each node as it finishes.
+    
+    Args:
+        link (str): The URL of the coding problem
+        wrong_code (str): The incorrect code solution
+        priority_level (int): Priority of this run's LLM calls
+        graph: A compiled workflow to reuse (a new one is created if not given)
+        thread_id (str): ID under which the run is checkpointed, so it can be resumed
+        
+    Yields:
+        Tuple[str, Dict]: (node name, state update) for every finished node,
+            then (END, final state)
+    """
+    if graph is None:
+        graph = checkpointed_workflow() if thread_id else create_workflow()
+    
+    final_state = {}
+    with job_context(thread_id), priority(priority_level), span("workflow", link=link):
+        for mode, chunk in graph.stream(initial_state(link, wrong_code), run_config(thread_id), stream_mode=["updates", "values"]):
+            if mode == "updates":
+                for node, update in chunk.items():
+                    yield node, update or {}
+            else:
+                final_state = chunk
+    
+    yield END, final_state
+
+def job_status(snapshot) -> str:
+    """
+    Classify a checkpointed run from its latest state.
+    
+    Args:
+        snapshot: The latest StateSnapshot of the run
+        
+    Returns:
+        str: "completed", "failed" or "interrupted"
+    """
+    if snapshot.values.get("error"):
+        return "failed"
+    if snapshot.next:
+        return "interrupted"
+    return "completed"
+
+def list_jobs(graph=None) -> List[Dict]:
+    """
+    List the checkpointed runs and their status.
+    
+    Args:
+        graph: A compiled workflow with a checkpointer (the default one is used if not given)
+        
+    Returns:
+        List[Dict]: One entry per thread ID with status, next nodes, error and update time
+    """
+    graph = checkpointed_workflow(graph)
+    if graph.checkpointer is None:
+        return []
+    
+    jobs = []
+    for thread_id in thread_ids(graph.checkpointer):
+        snapshot = graph.get_state(run_config(thread_id))
+        jobs.append({
+            "thread_id": thread_id,
+            "status": job_status(snapshot),
+            "next": list(snapshot.next),
+            "link": snapshot.values.get("link", ""),
+            "error": snapshot.values.get("error", ""),
+            "updated_at": snapshot.created_at,
+        })
+    return jobs
+
+def resume_workflow(thread_id: str, priority_level: int = INTERACTIVE, graph=None) -> Dict:
+    """
+    Resume a failed or interrupted run from its last completed node.
+    
+    An interrupted run continues from its latest checkpoint. A failed run is
+    forked from the newest checkpoint taken before the error. LangGraph
+    checkpoints a fan-out as a single step, so the results of the parallel
+    branches that succeeded in the failed step are copied into the fork and
+    those branches are skipped: only the nodes that failed and the ones after
+    them run again.
+    
+    Args:
+        thread_id (str): The thread ID of the run
+        priority_level (int): Priority of this run's LLM calls
+        graph: A compiled workflow with a checkpointer (the default one is used if not given)
+        
+    Returns:
+        Dict: The final state of the workflow
+    """
+    from langgraph.graph import START
+    
+    graph = checkpointed_workflow(graph)
+    if graph.checkpointer is None:
+        raise ValueError("Checkpoints are disabled, runs cannot be resumed")
+    
+    snapshot = graph.get_state(run_config(thread_id))
+    if not snapshot.values:
+        raise ValueError(f"No checkpoints found for thread {thread_id}")
+    if job_status(snapshot) == "completed":
+        return snapshot.values
+    
+    # History runs from the newest checkpoint back, so the step that failed is seen just before its parent
+    failed = None
+    for candidate in graph.get_state_history(run_config(thread_id)):
+        if candidate.next and not candidate.values.get("error"):
+            checkpoint_config = candidate.config
+            writes = (failed.metadata or {}).get("writes") if failed else None
+            completed = {}
+            for update in (writes or {}).values():
+                if update and not update.get("error"):
+                    completed.update(update)
+            if completed:
+                # Only the fan-out from START runs several nodes in one step
+                checkpoint_config = graph.update_state(checkpoint_config, completed, as_node=START)
+            with job_context(thread_id), priority(priority_level), span("workflow.resume"):
+                return graph.invoke(None, checkpoint_config)
+        failed = candidate
+    
+    raise ValueError(f"No resumable checkpoint found for thread {thread_id}")